@@ -4,24 +4,30 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import scipy
-import scipy.io
+from matplotlib.patches import Rectangle
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, 
-                           QWidget, QLabel, QFileDialog, QMessageBox, QFrame, QTableWidget, 
-                           QTableWidgetItem, QSplitter, QTabWidget, QScrollArea, QSlider,
+                           QWidget, QLabel, QFileDialog, QMessageBox, QFrame, 
+                           QSplitter, QTabWidget, QScrollArea, QSlider,
                            QDialog, QLineEdit, QGridLayout, QDoubleSpinBox, QCheckBox, QInputDialog,
-                           QFormLayout, QDialogButtonBox, QTextBrowser, QSizePolicy)
-from PyQt5.QtCore import Qt, QRectF, QPoint, QPropertyAnimation, QSize, pyqtSlot, QSequentialAnimationGroup, QEasingCurve, QPointF
+                           QFormLayout, QDialogButtonBox, QTextBrowser, QSizePolicy, QTableView,
+                           QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QRectF, QPoint, QPropertyAnimation, QSize, pyqtSlot, QSequentialAnimationGroup, QEasingCurve, QPointF
 from PyQt5.QtGui import QColor, QPalette, QFont, QDrag, QIcon, QLinearGradient, QRadialGradient, QPainter, QPen, QBrush, QPainterPath
-from scipy.io import wavfile
 import pandas as pd
 from datetime import datetime
+
+from katydid.audio import read_wav
+from katydid import binning
+from katydid.cache import default_cache
+from katydid.csvdata import PeriodColumns, round_as_shown
+from katydid.envelope import EnvelopePyramid
+from katydid.segments import CopySegment, write_combined_wav
+from katydid.sequencing import classify_pulses, copy_windows, mark_copies, sequence_markers
+
 # Flag to track if Excel export is available
 EXCEL_EXPORT_AVAILABLE = False
 try:
-    import openpyxl
-    from openpyxl.styles import PatternFill, Font, Alignment
-    from openpyxl.utils.dataframe import dataframe_to_rows
+    from katydid.excel import write_table_xlsx
     EXCEL_EXPORT_AVAILABLE = True
 except ImportError:
     print("openpyxl not installed. Excel export will not be available.")
@@ -139,6 +145,242 @@ class AnimatedGradientWidget(QWidget):
             painter.drawEllipse(QPointF(p['x'], p['y']), size, size)
 
 
+class PeriodTableModel(QAbstractTableModel):
+    """
+    Read-only table over the CSV's PeriodColumns.
+
+    Nothing is stored per cell: the view asks data() for the rows it is
+    showing, and text and colors are produced from the column arrays then.
+    """
+
+    HEADERS = ["Pulse", "Amplitude", "Time", "TimeB", "Period Duration",
+               "Ratio", "ex & in", "Sequencing", "Copy"]
+
+    # Row background states
+    ROW_PLAIN = 0
+    ROW_VALID = 1
+    ROW_INVALID = 2
+    ROW_DEVIATION = 3
+
+    def __init__(self, periods, parent=None):
+        super().__init__(parent)
+        self.periods = periods
+        n = len(periods)
+        
+        # Time as shown in the table (2 decimals); TimeB and copy ranges use these
+        self.shown_time = round_as_shown(periods.time, 2)
+        self.time_between = np.full(n, np.nan)
+        self.time_between[1:] = np.diff(self.shown_time)
+        
+        # Classification columns, filled in once ranges are set
+        self.labels = np.full(n, '', dtype='<U3')      # ex & in
+        self.sequencing = np.full(n, '', dtype='<U3')  # B / | / Eex / Ein
+        self.copy_numbers = np.zeros(n, dtype=np.int64)  # 0 = not copied
+        self.row_states = np.zeros(n, dtype=np.int8)
+        # Optional per-row brush for the Ratio column (pulse patterns)
+        self.ratio_states = None
+        
+        self.row_brushes = {
+            self.ROW_VALID: QBrush(QColor(255, 255, 255)),      # Valid pulse (white)
+            self.ROW_INVALID: QBrush(QColor(255, 200, 200)),    # Invalid pulse (light red)
+            self.ROW_DEVIATION: QBrush(QColor(255, 220, 180)),  # Deviation (light orange)
+        }
+        self.copy_brush = QBrush(QColor(255, 255, 0))  # Yellow
+        self.pattern_brushes = {1: QBrush(QColor(200, 255, 200)), 2: QBrush(QColor(255, 200, 200))}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.periods)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def text(self, row, col):
+        """Cell text, exactly as displayed."""
+        if col == 0:
+            return f"{row+1}"
+        if col == 6:
+            return str(self.labels[row])
+        if col == 7:
+            return str(self.sequencing[row])
+        if col == 8:
+            return f"Copy {self.copy_numbers[row]}" if self.copy_numbers[row] > 0 else ""
+        
+        if col == 1:
+            value = self.periods.amplitude[row]
+        elif col == 2:
+            value = self.periods.time[row]
+        elif col == 3:
+            value = self.time_between[row]
+        elif col == 4:
+            value = self.periods.duration[row]
+        else:
+            value = self.periods.ratio[row]
+        if np.isnan(value):
+            return ""
+        if col == 5:
+            return f"{value:.4f}"
+        if col == 1:
+            return f"{value}"
+        return f"{value:.2f}"
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return self.text(row, col)
+        if role == Qt.BackgroundRole:
+            if col == 8 and self.copy_numbers[row] > 0:
+                return self.copy_brush
+            if col == 5 and self.ratio_states is not None and self.ratio_states[row]:
+                return self.pattern_brushes[self.ratio_states[row]]
+            return self.row_brushes.get(int(self.row_states[row]))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def columns_changed(self, first_col, last_col):
+        """Tell the view that columns first_col..last_col changed for every row."""
+        if len(self.periods) > 0:
+            self.dataChanged.emit(self.index(0, first_col),
+                                  self.index(len(self.periods) - 1, last_col))
+
+    def column_text(self, col):
+        """Text of a whole column, formatted like text() but a column at a time."""
+        n = len(self.periods)
+        if col == 0:
+            return np.arange(1, n + 1).astype(str)
+        if col == 6:
+            return self.labels.copy()
+        if col == 7:
+            return self.sequencing.copy()
+        if col == 8:
+            copied = self.copy_numbers > 0
+            texts = np.full(n, "", dtype=object)
+            texts[copied] = np.char.add("Copy ", self.copy_numbers[copied].astype(str))
+            return texts
+
+        values = [None, self.periods.amplitude, self.periods.time, self.time_between,
+                  self.periods.duration, self.periods.ratio][col]
+        present = ~np.isnan(values)
+        texts = np.full(n, "", dtype=object)
+        if col == 1:
+            texts[present] = [f"{v}" for v in values[present].tolist()]
+        else:
+            texts[present] = np.char.mod("%.4f" if col == 5 else "%.2f", values[present])
+        return texts
+
+    def display_frame(self):
+        """The whole table as displayed, as a DataFrame of strings."""
+        return pd.DataFrame({header: self.column_text(col) for col, header in enumerate(self.HEADERS)},
+                            columns=self.HEADERS)
+
+
+class RangeHistogramPreview:
+    """
+    Live preview of a range being picked on a histogram.
+
+    The bars are drawn once, from precomputed counts, on the main
+    histogram and on the dialog's preview. A spinbox change only moves
+    the range lines and band, and redraws are debounced so dragging a
+    spinbox renders once it settles rather than once per tick.
+    """
+
+    # Quiet time before a range change is drawn
+    DEBOUNCE_MS = 40
+
+    def __init__(self, ax, canvas, preview_ax, preview_canvas, values, counts, draw_edges,
+                 mode_value, value_format, unit, xlabel, title, color, preview_xlim):
+        self.ax = ax
+        self.canvas = canvas
+        self.preview_ax = preview_ax
+        self.preview_canvas = preview_canvas
+        self.value_format = value_format
+        self.unit = unit
+        # In-range counts by binary search over the sorted values
+        self.counter = binning.RangeCounter(values)
+        self.range = (0, 0)
+
+        # Main histogram, keeping the user's zoom
+        current_xlim = ax.get_xlim()
+        current_ylim = ax.get_ylim()
+        ax.clear()
+        ax.stairs(counts, draw_edges, fill=True, alpha=0.7, facecolor=color,
+                  edgecolor='black', linewidth=0.5)
+        mode_line = ax.axvline(x=mode_value, color='red', linestyle='-', linewidth=2,
+                               label=f'Mode: {self._format(mode_value)}')
+        self.min_line = ax.axvline(x=0, color='blue', linestyle='--', linewidth=1.5, label='Min')
+        self.max_line = ax.axvline(x=0, color='blue', linestyle='--', linewidth=1.5, label='Max')
+        self.band = self._add_band(ax, alpha=0.3, color='green', label='Range')
+        ax.set_xlabel(xlabel, fontsize=10, fontweight='bold')
+        ax.set_ylabel('Frequency', fontsize=10, fontweight='bold')
+        ax.set_title(title, fontsize=12, fontweight='bold')
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.tick_params(axis='both', which='major', labelsize=9)
+        # Legend of exactly these artists; its texts are kept by label to relabel the range entries
+        handles = [mode_line, self.min_line, self.max_line, self.band]
+        self.legend = ax.legend(handles=handles, loc='upper right', fontsize=8)
+        self.legend_texts = {handle.get_label(): text
+                             for handle, text in zip(handles, self.legend.get_texts())}
+        ax.set_xlim(current_xlim)
+        ax.set_ylim(current_ylim)
+
+        # Preview histogram in the dialog
+        preview_ax.clear()
+        preview_ax.stairs(counts, draw_edges, fill=True, alpha=0.7, facecolor=color,
+                          edgecolor='black', linewidth=0.5)
+        preview_ax.axvline(x=mode_value, color='red', linestyle='-', linewidth=2)
+        self.preview_band = self._add_band(preview_ax, alpha=0.3, color='blue')
+        preview_ax.set_xlabel(xlabel)
+        preview_ax.set_ylabel('Frequency')
+        preview_ax.set_xlim(*preview_xlim)
+        preview_ax.grid(True, linestyle='--', alpha=0.7)
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.redraw)
+
+    @staticmethod
+    def _add_band(ax, **kwargs):
+        # Full-height rectangle in data x / axes y coordinates (what axvspan draws),
+        # which can be moved with set_x / set_width
+        band = Rectangle((0, 0), 0, 1, transform=ax.get_xaxis_transform(), **kwargs)
+        ax.add_patch(band)
+        return band
+
+    def _format(self, value):
+        return f"{value:.{self.value_format}f}{self.unit}"
+
+    def count(self, range_min, range_max):
+        """Number of values inside the range."""
+        return self.counter.count(range_min, range_max)
+
+    def set_range(self, range_min, range_max):
+        """Move the range; the histograms are redrawn once changes settle."""
+        self.range = (range_min, range_max)
+        self.timer.start()
+
+    def redraw(self):
+        """Move the range artists to the current range and redraw both canvases."""
+        range_min, range_max = self.range
+        self.min_line.set_xdata([range_min, range_min])
+        self.max_line.set_xdata([range_max, range_max])
+        for band in (self.band, self.preview_band):
+            band.set_x(range_min)
+            band.set_width(range_max - range_min)
+
+        self.legend_texts['Min'].set_text(f'Min: {self._format(range_min)}')
+        self.legend_texts['Max'].set_text(f'Max: {self._format(range_max)}')
+        self.legend_texts['Range'].set_text(f'Range: {range_min:.{self.value_format}f}-{self._format(range_max)}')
+
+        self.canvas.draw_idle()
+        self.preview_canvas.draw_idle()
+
+
 class KatydidAnalyzer2(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -157,8 +399,9 @@ class KatydidAnalyzer2(QMainWindow):
         self.wav_data = None
         self.wav_file_path = None
         self.sample_rate = None
-        self.pulses = []
-        self.periods = []
+        # On-disk cache shared with Wav Analyzer (None if disabled)
+        self.cache = default_cache()
+        self.periods = PeriodColumns()
         self.double_pulses = []
         self.double_pulse_sequences = []
         self.selected_peak = None
@@ -168,6 +411,7 @@ class KatydidAnalyzer2(QMainWindow):
         self.copy_backward_ms = 200  # Default: 200ms before end marker
         self.copy_forward_ms = 300   # Default: 300ms after begin marker
         self.max_error_duration_ms = 10.0  # Default maximum error duration
+        self.save_copy_wavs = False  # Also save each copy as its own WAV file
         
         # Create status label for later use
         self.status_label = QLabel("Ready")
@@ -427,7 +671,7 @@ class KatydidAnalyzer2(QMainWindow):
     def process_csv_data(self):
         """Process the CSV data to extract pulse information"""
         # Reset pulse data
-        self.periods = []
+        self.periods = PeriodColumns()
         
         # Check if CSV data is loaded
         if self.csv_data is None or self.csv_data.empty:
@@ -440,43 +684,9 @@ class KatydidAnalyzer2(QMainWindow):
             QMessageBox.warning(self, "Warning", "CSV file does not contain required columns (Duration, Pulse Ratio)")
             return
         
-        # Extract pulse information
-        for i, (_, row) in enumerate(self.csv_data.iterrows()):
-            period = {}
-            
-            # Add period number if available
-            if period_col and pd.notna(row[period_col]):
-                period['period'] = row[period_col]
-            else:
-                period['period'] = i + 1
-            
-            # Add duration
-            if pd.notna(row[duration_col]):
-                period['duration'] = row[duration_col]
-            
-            # Add pulse ratio
-            if pd.notna(row[ratio_col]):
-                period['ratio'] = row[ratio_col]
-            
-            # Add amplitude if available
-            if amplitude_col and pd.notna(row[amplitude_col]):
-                period['amplitude'] = row[amplitude_col]
-            
-            # Add time if available
-            if time_col and pd.notna(row[time_col]):
-                period['time'] = row[time_col]
-            
-            # Add to periods list
-            self.periods.append(period)
-        
-        # Extract pulse information for waveform display
-        self.pulses = []
-        for period in self.periods:
-            if 'time' in period and 'amplitude' in period:
-                self.pulses.append({
-                    'time': period['time'],
-                    'amplitude': period['amplitude']
-                })
+        # Keep the resolved columns as typed arrays (NaN where a value is missing)
+        self.periods = PeriodColumns.from_frame(self.csv_data, period_col, duration_col, ratio_col,
+                                                amplitude_col, time_col)
         
         print(f"Processed {len(self.periods)} periods from CSV data")
     
@@ -491,18 +701,23 @@ class KatydidAnalyzer2(QMainWindow):
             return False
         
         try:
-            # Load WAV file
-            self.sample_rate, self.wav_data = wavfile.read(file_path)
+            # Memory-map the WAV file as mono float samples (from the cache if it was decoded before)
+            self.sample_rate, wav_data = read_wav(file_path, self.cache)
             self.wav_file_path = file_path
             
-            # Convert to mono if stereo
-            if len(self.wav_data.shape) > 1 and self.wav_data.shape[1] > 1:
-                self.wav_data = np.mean(self.wav_data, axis=1)
+            # Build the waveform envelope once for the waveform tab; Wav Analyzer
+            # caches the same envelope, so a recording opened there needs no pass here
+            digest = self.cache.file_digest(file_path) if self.cache is not None else None
+            envelope = EnvelopePyramid.cached(self.cache, ('mono', digest), wav_data)
             
-            # Normalize the data
-            self.wav_data = self.wav_data.astype(np.float32)
-            if np.max(np.abs(self.wav_data)) > 0:
-                self.wav_data = self.wav_data / np.max(np.abs(self.wav_data))
+            # Normalize the data to its peak (applied on demand, no copy)
+            peak = envelope.abs_max()
+            if peak > 0:
+                self.wav_data = wav_data.scaled(1.0 / peak)
+                self.wav_envelope = envelope.scaled(1.0 / peak, self.wav_data)
+            else:
+                self.wav_data = wav_data
+                self.wav_envelope = envelope
             
             # Update status
             self.status_label.setText(f"Loaded WAV file: {os.path.basename(file_path)}")
@@ -529,12 +744,12 @@ class KatydidAnalyzer2(QMainWindow):
                 color: #1a1a1a;
                 border: 1px solid #ccc;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #ffffff;
                 color: #1a1a1a;
                 gridline-color: #e0e0e0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 color: #1a1a1a;
             }
             QHeaderView::section {
@@ -637,69 +852,17 @@ class KatydidAnalyzer2(QMainWindow):
         tab = QWidget()
         layout = QVBoxLayout(tab)
         
-        # Create table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels(["Pulse", "Amplitude", "Time", "TimeB", "Period Duration", 
-                                              "Ratio", "ex & in", "Sequencing", "Copy"])
+        # Create table - a view over the CSV columns, only visible rows are rendered
+        self.table_model = PeriodTableModel(self.periods, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         
         # Make the table read-only to prevent user edits
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        
-        # Populate table with data
-        self.table.setRowCount(len(self.csv_data))
-        
-        period_col, period_duration_col, ratio_col, amplitude_col, time_col = self._csv_column_names()
-        for row, (_, csv_row) in enumerate(self.csv_data.iterrows()):
-            # Add pulse number (1-based) to first column
-            pulse_item = QTableWidgetItem(f"{row+1}")
-            self.table.setItem(row, 0, pulse_item)
-            
-            # Set data for each column (starting from column 1 since we already set column 0 with pulse number)
-            for col, (header, csv_col) in enumerate(zip(
-                ["Amplitude", "Time", "TimeB", "Period Duration", "Ratio"],
-                [amplitude_col, time_col, None, period_duration_col, ratio_col]
-            ), start=1):
-                if header == "TimeB":
-                    # TimeB will be calculated after all rows are populated
-                    item = QTableWidgetItem("")
-                elif csv_col and pd.notna(csv_row[csv_col]):
-                    value = csv_row[csv_col]
-                    if isinstance(value, (int, float)):
-                        if header in ["Time", "TimeB", "Period Duration"]:
-                            item = QTableWidgetItem(f"{value:.2f}")
-                        elif header == "Ratio":
-                            item = QTableWidgetItem(f"{value:.4f}")
-                        else:
-                            item = QTableWidgetItem(f"{value}")
-                    else:
-                        item = QTableWidgetItem(str(value))
-                else:
-                    item = QTableWidgetItem("")
-                
-                self.table.setItem(row, col, item)
-        
-        # Calculate TimeB values (time between pulses)
-        for row in range(1, self.table.rowCount()):
-            time_item_prev = self.table.item(row-1, 2)  # Previous Time column
-            time_item_curr = self.table.item(row, 2)    # Current Time column
-            
-            if time_item_prev and time_item_curr and time_item_prev.text() and time_item_curr.text():
-                try:
-                    time_prev = float(time_item_prev.text())
-                    time_curr = float(time_item_curr.text())
-                    time_between = time_curr - time_prev
-                    self.table.setItem(row, 3, QTableWidgetItem(f"{time_between:.2f}"))
-                except ValueError:
-                    self.table.setItem(row, 3, QTableWidgetItem(""))
-            else:
-                self.table.setItem(row, 3, QTableWidgetItem(""))
-                
-        # Add empty cells for the new columns
-        for row in range(self.table.rowCount()):
-            for col in range(6, 9):
-                self.table.setItem(row, col, QTableWidgetItem(""))
-                
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        
+        # Fixed row heights so the view never measures every row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        
         # Set up key event handling for the table
         self.table.installEventFilter(self)
         
@@ -707,7 +870,7 @@ class KatydidAnalyzer2(QMainWindow):
         self.table.resizeColumnsToContents()
         
         # Make columns 1.25x bigger
-        for col in range(self.table.columnCount()):
+        for col in range(self.table_model.columnCount()):
             width = self.table.columnWidth(col)
             self.table.setColumnWidth(col, int(width * 1.25))
         
@@ -778,35 +941,50 @@ class KatydidAnalyzer2(QMainWindow):
             move_amount = view_width * 0.2
             self.waveform_ax.set_xlim(xmin + move_amount, xmax + move_amount)
         
-        # Update the canvas
-        self.waveform_canvas.draw()
+        # Update the canvas (the envelope follows the new limits through xlim_changed)
+        self.waveform_canvas.draw_idle()
         
         # Update status
         self.status_label.setText(f"View: {xmin:.1f} - {xmax:.1f} ms, Zoom: {1/self.waveform_view_limits['zoom_factor']:.1f}x")
     
+    def on_waveform_xlim_changed(self, ax):
+        """Re-query the envelope whenever the waveform view changes, however it changed."""
+        self.refresh_waveform_envelope()
+    
+    def refresh_waveform_envelope(self):
+        """Re-query the waveform envelope for the current x limits."""
+        if self.wav_data is None or not hasattr(self, 'waveform_line'):
+            return
+        xmin, xmax = self.waveform_ax.get_xlim()
+        start = int(xmin * self.sample_rate / 1000)
+        stop = int(np.ceil(xmax * self.sample_rate / 1000)) + 1
+        positions, values = self.wav_envelope.query(start, stop)
+        self.waveform_line.set_data(positions * 1000 / self.sample_rate, values)
+    
     def update_waveform_plot(self):
         # Clear the plot
         self.waveform_ax.clear()
         
         # Plot the waveform
         if self.wav_data is not None and self.sample_rate is not None:
-            # Create time array in milliseconds
-            time_ms = np.arange(len(self.wav_data)) / self.sample_rate * 1000
+            # Plot the min/max envelope of the whole recording
+            positions, values = self.wav_envelope.query(0, len(self.wav_data))
+            self.waveform_line, = self.waveform_ax.plot(positions * 1000 / self.sample_rate, values,
+                                                         'k-', linewidth=0.5, label='Waveform')
             
-            # Plot the waveform
-            self.waveform_ax.plot(time_ms, self.wav_data, 'k-', linewidth=0.5, label='Waveform')
-            
-            # Plot pulses if available
-            if hasattr(self, 'pulses') and self.pulses:
-                for pulse in self.pulses:
-                    if 'time' in pulse and 'amplitude' in pulse:
-                        self.waveform_ax.plot(pulse['time'], pulse['amplitude'], 'ro', markersize=5)
+            # Plot pulses if available (all markers in one artist)
+            if len(self.periods) > 0:
+                has_pulse = self.periods.has_pulse
+                self.waveform_ax.plot(self.periods.time[has_pulse], self.periods.amplitude[has_pulse],
+                                      'ro', markersize=5)
             
             # Mark double pulses if identified
             if hasattr(self, 'double_pulses') and self.double_pulses:
-                for pulse in self.double_pulses:
-                    if 'time' in pulse and 'amplitude' in pulse:
-                        self.waveform_ax.plot(pulse['time'], pulse['amplitude'], 'bo', markersize=5)
+                double_pulses = [pulse for pulse in self.double_pulses if 'time' in pulse and 'amplitude' in pulse]
+                if double_pulses:
+                    self.waveform_ax.plot([pulse['time'] for pulse in double_pulses],
+                                          [pulse['amplitude'] for pulse in double_pulses],
+                                          'bo', markersize=5)
             
             # Set labels and title
             self.waveform_ax.set_xlabel('Time (ms)')
@@ -819,8 +997,13 @@ class KatydidAnalyzer2(QMainWindow):
             # Set grid
             self.waveform_ax.grid(True, linestyle='--', alpha=0.7)
             
+            # Follow every change of the view with an envelope at its resolution
+            # (clear() drops the axes callbacks, so connect again after each redraw)
+            self.waveform_ax.callbacks.connect('xlim_changed', self.on_waveform_xlim_changed)
+            self.refresh_waveform_envelope()
+            
             # Update canvas
-            self.waveform_canvas.draw()
+            self.waveform_canvas.draw_idle()
     
     def create_period_histogram_tab(self):
         # Create tab widget
@@ -871,19 +1054,15 @@ class KatydidAnalyzer2(QMainWindow):
         
         # Find periods close to the clicked value
         if hasattr(self, 'periods') and self.periods:
-            durations = [p['duration'] for p in self.periods if 'duration' in p]
-            if durations:
+            rows = np.flatnonzero(self.periods.has_duration)
+            if len(rows) > 0:
                 # Find the closest duration to the clicked value
-                closest_idx = np.argmin(np.abs(np.array(durations) - clicked_x))
-                closest_duration = durations[closest_idx]
-                
-                # Get the corresponding period data
-                period_data = self.periods[closest_idx]
+                row = rows[np.argmin(np.abs(self.periods.duration[rows] - clicked_x))]
                 
                 # Update the info label with details
-                info_text = f"Period: {period_data.get('period', 'N/A')}, Duration: {period_data.get('duration', 'N/A'):.2f} ms, "
-                info_text += f"Ratio: {period_data.get('ratio', 'N/A'):.4f}, "
-                info_text += f"Time: {period_data.get('time', 'N/A'):.2f} ms"
+                info_text = f"Period: {self.periods.period[row]:g}, Duration: {self.periods.duration[row]:.2f} ms, "
+                info_text += f"Ratio: {self.periods.ratio[row]:.4f}, "
+                info_text += f"Time: {self.periods.time[row]:.2f} ms"
                 
                 self.period_info_label.setText(info_text)
     
@@ -986,97 +1165,27 @@ class KatydidAnalyzer2(QMainWindow):
                 preview_canvas = FigureCanvas(preview_figure)
                 preview_ax = preview_figure.add_subplot(111)
                 
-                # Function to update the preview histogram and the main histogram
+                # The bars are drawn once from the precomputed counts; range changes
+                # only move the lines and band
+                hist_data = self.period_hist_data
+                bin_edges = hist_data['bin_edges']
+                bin_width = bin_edges[1] - bin_edges[0]
+                preview = RangeHistogramPreview(
+                    self.period_ax, self.period_canvas, preview_ax, preview_canvas,
+                    self.periods.durations(), hist_data['hist'], bin_edges - bin_width / 2,
+                    mode_value, 2, ' ms', 'Period Duration (ms)', 'Distribution of Period Durations',
+                    'green', (0, 50))
+                
+                # Function to update the preview when a range value changes
                 def update_preview_histogram():
-                    # Clear the axis
-                    preview_ax.clear()
-                    
                     # Get current values
                     range_min = left_value_input.value()
                     range_max = right_value_input.value()
                     
                     # Update text preview
-                    preview_label.setText(f"Resulting range: {range_min:.2f} - {range_max:.2f} ms")
-                    
-                    # Also update the main histogram in real-time
-                    # Store current axis limits before clearing
-                    current_xlim = self.period_ax.get_xlim() if hasattr(self.period_ax, 'get_xlim') else (0, 50)
-                    current_ylim = self.period_ax.get_ylim() if hasattr(self.period_ax, 'get_ylim') else None
-                    
-                    # Clear the main period histogram
-                    self.period_ax.clear()
-                    
-                    # Redraw the main histogram
-                    if hasattr(self, 'periods') and self.periods:
-                        durations = [p['duration'] for p in self.periods if 'duration' in p]
-                        if durations and hasattr(self, 'period_bins'):
-                            # Plot histogram with bars that touch each other (no gaps)
-                            self.period_ax.hist(durations, bins=self.period_bins, alpha=0.7, 
-                                              color='green', edgecolor='black', linewidth=0.5,
-                                              align='left', rwidth=1.0)
-                            
-                            # Mark the mode with a vertical line
-                            self.period_ax.axvline(x=mode_value, color='red', linestyle='-', linewidth=2, 
-                                                 label=f'Mode: {mode_value:.2f} ms')
-                            
-                            # Show the current range being adjusted
-                            self.period_ax.axvline(x=range_min, color='blue', linestyle='--', linewidth=1.5, 
-                                                 label=f'Min: {range_min:.2f} ms')
-                            self.period_ax.axvline(x=range_max, color='blue', linestyle='--', linewidth=1.5, 
-                                                 label=f'Max: {range_max:.2f} ms')
-                            
-                            # Highlight the selected range
-                            self.period_ax.axvspan(range_min, range_max, alpha=0.3, color='green',
-                                                label=f'Range: {range_min:.2f}-{range_max:.2f} ms')
-                            
-                            # Set labels and title
-                            self.period_ax.set_xlabel('Period Duration (ms)', fontsize=10, fontweight='bold')
-                            self.period_ax.set_ylabel('Frequency', fontsize=10, fontweight='bold')
-                            self.period_ax.set_title('Distribution of Period Durations', fontsize=12, fontweight='bold')
-                            
-                            # Set grid
-                            self.period_ax.grid(True, linestyle='--', alpha=0.7)
-                            
-                            # Make tick labels more visible
-                            self.period_ax.tick_params(axis='both', which='major', labelsize=9)
-                            
-                            # Add a legend
-                            self.period_ax.legend(loc='upper right', fontsize=8)
-                            
-                            # Restore previous axis limits to maintain zoom level
-                            self.period_ax.set_xlim(current_xlim)
-                            if current_ylim is not None:
-                                self.period_ax.set_ylim(current_ylim)
-                            
-                            # Update the main canvas
-                            self.period_canvas.draw()
-                    
-                    # Plot the histogram using stored data
-                    if hasattr(self, 'period_hist_data'):
-                        hist_data = self.period_hist_data
-                        bins = hist_data['bin_edges']
-                        hist = hist_data['hist']
-                        
-                        # Plot the histogram
-                        bin_centers = [(bins[i] + bins[i+1])/2 for i in range(len(bins)-1)]
-                        bin_width = bins[1] - bins[0]
-                        preview_ax.bar(bin_centers, hist, width=bin_width, alpha=0.7, 
-                                      color='green', edgecolor='black', linewidth=0.5)
-                        
-                        # Mark the mode
-                        preview_ax.axvline(x=mode_value, color='red', linestyle='-', linewidth=2)
-                        
-                        # Highlight the selected range
-                        preview_ax.axvspan(range_min, range_max, alpha=0.3, color='blue')
-                        
-                        # Set labels and limits
-                        preview_ax.set_xlabel('Period Duration (ms)')
-                        preview_ax.set_ylabel('Frequency')
-                        preview_ax.set_xlim(0, 50)  # Standard x-axis limits for period histogram
-                        preview_ax.grid(True, linestyle='--', alpha=0.7)
-                    
-                    # Redraw the canvas
-                    preview_canvas.draw()
+                    preview_label.setText(f"Resulting range: {range_min:.2f} - {range_max:.2f} ms "
+                                          f"({preview.count(range_min, range_max)} periods)")
+                    preview.set_range(range_min, range_max)
                 
                 # Connect value changes to update preview
                 left_value_input.valueChanged.connect(update_preview_histogram)
@@ -1098,7 +1207,10 @@ class KatydidAnalyzer2(QMainWindow):
                 buttons.addWidget(cancel_button)
                 layout.addLayout(buttons)
                 
-                if dialog.exec_() == QDialog.Accepted:
+                accepted = dialog.exec_() == QDialog.Accepted
+                # The histogram is redrawn below; a pending preview redraw must not touch it
+                preview.timer.stop()
+                if accepted:
                     # Get the custom values directly
                     range_min = left_value_input.value()
                     range_max = right_value_input.value()
@@ -1250,152 +1362,31 @@ class KatydidAnalyzer2(QMainWindow):
         
         # Make sure we have a table to update
         if not hasattr(self, 'table'):
-            print("Table not found, trying to use csv_table instead")
-            if hasattr(self, 'csv_table'):
-                self.table = self.csv_table
-            else:
-                QMessageBox.warning(self, "Warning", "Table not found")
-                return
-        
-        # Check if we need to add the Pattern column
-        if self.table.columnCount() < 8:  # We need at least 8 columns with TimeB added
-            current_count = self.table.columnCount()
-            self.table.setColumnCount(8)
-            
-            # Set headers for new columns if needed
-            headers = []
-            for i in range(current_count):
-                if self.table.horizontalHeaderItem(i):
-                    headers.append(self.table.horizontalHeaderItem(i).text())
-                else:
-                    headers.append(f"Column {i+1}")
-            
-            # Add headers for additional columns
-            while len(headers) < 8:
-                if len(headers) == 6:
-                    headers.append("ex & in")
-                elif len(headers) == 7:
-                    headers.append("Sequencing")
-            
-            self.table.setHorizontalHeaderLabels(headers)
+            QMessageBox.warning(self, "Warning", "Table not found")
+            return
+        model = self.table_model
         
         print("\n\nDEBUGGING PULSE CLASSIFICATION:")
         print(f"Period range: {period_min:.2f}-{period_max:.2f}, Ratio range: {ratio_min:.4f}-{ratio_max:.4f}")
-        print(f"Total pulses: {len(self.periods)}, Table rows: {self.table.rowCount()}")
+        print(f"Total pulses: {len(self.periods)}, Table rows: {model.rowCount()}")
         
-        # First pass: Mark all short pulses as 'ex' if they're within ranges
-        for row in range(min(self.table.rowCount(), len(self.periods))):
-            try:
-                period = self.periods[row]
-                ratio = period.get('ratio', 0)
-                duration = period.get('duration', 0)
-                
-                # Check if within both ranges
-                within_period_range = period_min <= duration <= period_max
-                within_ratio_range = ratio_min <= ratio <= ratio_max
-                
-                # Mark short pulses
-                if ratio < 0.5 and within_period_range and within_ratio_range:
-                    # Valid short pulse
-                    self.table.setItem(row, 6, QTableWidgetItem("ex"))  # ex & in column (index 6 with TimeB added)
-                    period['is_valid_short'] = True
-                    print(f"Row {row}: Ratio={ratio:.4f}, Duration={duration:.2f} - Marking as short pulse (ex)")
-                else:
-                    # Invalid or not a short pulse
-                    self.table.setItem(row, 6, QTableWidgetItem("z"))
-                    period['is_valid_short'] = False
-                    print(f"Row {row}: Ratio={ratio:.4f}, Duration={duration:.2f} - Temporarily marking as z")
-            except Exception as e:
-                print(f"Error in first pass, row {row}: {str(e)}")
-        
-        # Second pass: Mark long pulses as 'in' if they follow a valid short pulse
-        for row in range(min(self.table.rowCount(), len(self.periods))):
-            try:
-                period = self.periods[row]
-                ratio = period.get('ratio', 0)
-                duration = period.get('duration', 0)
-                
-                # Check if within both ranges
-                within_period_range = period_min <= duration <= period_max
-                within_ratio_range = ratio_min <= ratio <= ratio_max
-                
-                # Check if this is a potential long pulse
-                if ratio >= 0.5 and row > 0:
-                    # Check if previous pulse was a valid short pulse
-                    prev_period = self.periods[row-1]
-                    if prev_period.get('is_valid_short', False):
-                        # Valid long pulse
-                        self.table.setItem(row, 6, QTableWidgetItem("in"))  # ex & in column (index 6 with TimeB added)
-                        print(f"Row {row}: Ratio={ratio:.4f} - Marking as long/internal pulse (in)")
-                    else:
-                        # Invalid long pulse (previous short pulse was invalid)
-                        self.table.setItem(row, 6, QTableWidgetItem("z"))
-                        print(f"Row {row}: Ratio={ratio:.4f} - Marking as z (previous short pulse invalid)")
-            except Exception as e:
-                print(f"Error in second pass, row {row}: {str(e)}")
-        
-        # Third pass: Set background colors
-        for row in range(min(self.table.rowCount(), len(self.periods))):
-            try:
-                item = self.table.item(row, 6)  # ex & in column (index 6 with TimeB added)
-                if item:
-                    # Set background color based on classification
-                    if item.text() in ["ex", "in"]:
-                        # Valid pulse (white background)
-                        background_color = QColor(255, 255, 255)
-                    else:
-                        # Invalid pulse (red background)
-                        background_color = QColor(255, 200, 200)
-                    
-                    # Apply background color to all cells in the row
-                    for col in range(self.table.columnCount()):
-                        cell_item = self.table.item(row, col)
-                        if cell_item:
-                            cell_item.setBackground(QBrush(background_color))
-            except Exception as e:
-                print(f"Error in third pass, row {row}: {str(e)}")
+        # Missing ratios and durations count as 0
+        ratios = np.nan_to_num(self.periods.ratio, nan=0.0)
+        durations = np.nan_to_num(self.periods.duration, nan=0.0)
         
-        # Fourth pass: Add sequencing information
-        in_sequence = False
-        sequence_start = -1
-        last_valid_row = -1
-        last_valid_type = ""
+        # Label short (ex), long (in) and invalid (z) pulses, then mark the sequences
+        model.labels[:] = classify_pulses(ratios, durations, self.period_range, self.ratio_range)
+        model.sequencing[:] = sequence_markers(model.labels)
         
-        for row in range(min(self.table.rowCount(), len(self.periods))):
-            try:
-                item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                if item:
-                    if item.text() == "ex" or item.text() == "in":
-                        # Valid pulse
-                        if not in_sequence and item.text() == "ex":
-                            # Start of a new sequence
-                            in_sequence = True
-                            sequence_start = row
-                            # Mark as beginning
-                            self.table.setItem(row, 7, QTableWidgetItem("B"))
-                        elif in_sequence:
-                            # Continuing sequence
-                            self.table.setItem(row, 7, QTableWidgetItem("|"))
-                        
-                        # Update last valid pulse info
-                        last_valid_row = row
-                        last_valid_type = item.text()
-                    else:
-                        # Invalid pulse (z)
-                        if in_sequence:
-                            # End of sequence
-                            in_sequence = False
-                            # Mark the last valid pulse as end
-                            if last_valid_row >= 0:
-                                end_type = "E" + last_valid_type  # Either "Eex" or "Ein"
-                                self.table.setItem(last_valid_row, 7, QTableWidgetItem(end_type))
-            except Exception as e:
-                print(f"Error in sequencing pass, row {row}: {str(e)}")
+        # Valid pulses are white, invalid ones light red
+        valid = (model.labels == "ex") | (model.labels == "in")
+        model.row_states[:] = np.where(valid, model.ROW_VALID, model.ROW_INVALID)
+        print(f"Classified {np.count_nonzero(model.labels == 'ex')} ex, "
+              f"{np.count_nonzero(model.labels == 'in')} in, "
+              f"{np.count_nonzero(~valid)} z pulses")
         
-        # Handle case where sequence continues to the end of the table
-        if in_sequence and last_valid_row >= 0:
-            end_type = "E" + last_valid_type  # Either "Eex" or "Ein"
-            self.table.setItem(last_valid_row, 7, QTableWidgetItem(end_type))
+        # Redraw the rows from the new classification
+        model.columns_changed(0, model.columnCount() - 1)
         
         # Update status
         self.status_label.setText(f"Updated pulse pattern classification")
@@ -1404,7 +1395,7 @@ class KatydidAnalyzer2(QMainWindow):
         self.table.resizeColumnsToContents()
         
         # Make columns 1.25x bigger
-        for col in range(self.table.columnCount()):
+        for col in range(self.table_model.columnCount()):
             width = self.table.columnWidth(col)
             self.table.setColumnWidth(col, int(width * 1.25))
         
@@ -1468,22 +1459,18 @@ class KatydidAnalyzer2(QMainWindow):
         # Find periods close to the clicked value
         if hasattr(self, 'periods') and self.periods and hasattr(self, 'period_range'):
             period_min, period_max = self.period_range
-            # Filter periods that are within the selected period range
-            filtered_periods = [p for p in self.periods if 'duration' in p and period_min <= p['duration'] <= period_max]
-            ratios = [p['ratio'] for p in filtered_periods if 'ratio' in p]
+            # Rows that are within the selected period range and have a ratio
+            rows = np.flatnonzero(self.periods.in_period_range(period_min, period_max) &
+                                  ~np.isnan(self.periods.ratio))
             
-            if ratios:
+            if len(rows) > 0:
                 # Find the closest ratio to the clicked value
-                closest_idx = np.argmin(np.abs(np.array(ratios) - clicked_x))
-                closest_ratio = ratios[closest_idx]
-                
-                # Get the corresponding period data
-                period_data = filtered_periods[closest_idx]
+                row = rows[np.argmin(np.abs(self.periods.ratio[rows] - clicked_x))]
                 
                 # Update the info label with details
-                info_text = f"Period: {period_data.get('period', 'N/A')}, Duration: {period_data.get('duration', 'N/A'):.2f} ms, "
-                info_text += f"Ratio: {period_data.get('ratio', 'N/A'):.4f}, "
-                info_text += f"Time: {period_data.get('time', 'N/A'):.2f} ms"
+                info_text = f"Period: {self.periods.period[row]:g}, Duration: {self.periods.duration[row]:.2f} ms, "
+                info_text += f"Ratio: {self.periods.ratio[row]:.4f}, "
+                info_text += f"Time: {self.periods.time[row]:.2f} ms"
                 
                 self.ratio_info_label.setText(info_text)
     
@@ -1588,100 +1575,27 @@ class KatydidAnalyzer2(QMainWindow):
                 preview_canvas = FigureCanvas(preview_figure)
                 preview_ax = preview_figure.add_subplot(111)
                 
-                # Function to update the preview histogram and the main histogram
+                # The bars are drawn once from the precomputed counts; range changes
+                # only move the lines and band
+                hist_data = self.ratio_hist_data
+                period_min, period_max = self.period_range
+                preview = RangeHistogramPreview(
+                    self.ratio_ax, self.ratio_canvas, preview_ax, preview_canvas,
+                    self.periods.ratios_in_period_range(period_min, period_max),
+                    hist_data['hist'], hist_data['bin_edges'],
+                    mode_value, 3, '', 'Pulse Ratio', 'Distribution of Pulse Ratios',
+                    'blue', (0, 1))
+                
+                # Function to update the preview when a range value changes
                 def update_preview_histogram():
-                    # Clear the axis
-                    preview_ax.clear()
-                    
                     # Get current values
                     range_min = left_value_input.value()
                     range_max = right_value_input.value()
                     
                     # Update text preview
-                    preview_label.setText(f"Resulting range: {range_min:.3f} - {range_max:.3f}")
-                    
-                    # Also update the main histogram in real-time
-                    # Store current axis limits before clearing
-                    current_xlim = self.ratio_ax.get_xlim() if hasattr(self.ratio_ax, 'get_xlim') else (0, 1)
-                    current_ylim = self.ratio_ax.get_ylim() if hasattr(self.ratio_ax, 'get_ylim') else None
-                    
-                    # Clear the main ratio histogram
-                    self.ratio_ax.clear()
-                    
-                    # Redraw the main histogram
-                    if hasattr(self, 'periods') and self.periods and hasattr(self, 'period_range'):
-                        period_min, period_max = self.period_range
-                        filtered_periods = [p for p in self.periods if 'duration' in p and period_min <= p['duration'] <= period_max]
-                        ratios = [p['ratio'] for p in filtered_periods if 'ratio' in p]
-                        
-                        if ratios and hasattr(self, 'ratio_bins'):
-                            # Plot histogram with bars that touch each other (no gaps)
-                            self.ratio_ax.hist(ratios, bins=self.ratio_bins, alpha=0.7, 
-                                              color='blue', edgecolor='black', linewidth=0.5,
-                                              align='left', rwidth=1.0)
-                            
-                            # Mark the mode with a vertical line
-                            self.ratio_ax.axvline(x=mode_value, color='red', linestyle='-', linewidth=2, 
-                                                 label=f'Mode: {mode_value:.3f}')
-                            
-                            # Show the current range being adjusted
-                            self.ratio_ax.axvline(x=range_min, color='blue', linestyle='--', linewidth=1.5, 
-                                                 label=f'Min: {range_min:.3f}')
-                            self.ratio_ax.axvline(x=range_max, color='blue', linestyle='--', linewidth=1.5, 
-                                                 label=f'Max: {range_max:.3f}')
-                            
-                            # Highlight the selected range
-                            self.ratio_ax.axvspan(range_min, range_max, alpha=0.3, color='green',
-                                                label=f'Range: {range_min:.3f}-{range_max:.3f}')
-                            
-                            # Set labels and title
-                            self.ratio_ax.set_xlabel('Pulse Ratio', fontsize=10, fontweight='bold')
-                            self.ratio_ax.set_ylabel('Frequency', fontsize=10, fontweight='bold')
-                            self.ratio_ax.set_title('Distribution of Pulse Ratios', fontsize=12, fontweight='bold')
-                            
-                            # Set grid
-                            self.ratio_ax.grid(True, linestyle='--', alpha=0.7)
-                            
-                            # Make tick labels more visible
-                            self.ratio_ax.tick_params(axis='both', which='major', labelsize=9)
-                            
-                            # Add a legend
-                            self.ratio_ax.legend(loc='upper right', fontsize=8)
-                            
-                            # Restore previous axis limits to maintain zoom level
-                            self.ratio_ax.set_xlim(current_xlim)
-                            if current_ylim is not None:
-                                self.ratio_ax.set_ylim(current_ylim)
-                            
-                            # Update the main canvas
-                            self.ratio_canvas.draw()
-                    
-                    # Plot the histogram using stored data
-                    if hasattr(self, 'ratio_hist_data'):
-                        hist_data = self.ratio_hist_data
-                        bins = hist_data['bin_edges']
-                        hist = hist_data['hist']
-                        
-                        # Plot the histogram
-                        bin_centers = [(bins[i] + bins[i+1])/2 for i in range(len(bins)-1)]
-                        bin_width = bins[1] - bins[0]
-                        preview_ax.bar(bin_centers, hist, width=bin_width, alpha=0.7, 
-                                      color='blue', edgecolor='black', linewidth=0.5)
-                        
-                        # Mark the mode
-                        preview_ax.axvline(x=mode_value, color='red', linestyle='-', linewidth=2)
-                        
-                        # Highlight the selected range
-                        preview_ax.axvspan(range_min, range_max, alpha=0.3, color='blue')
-                        
-                        # Set labels and limits
-                        preview_ax.set_xlabel('Pulse Ratio')
-                        preview_ax.set_ylabel('Frequency')
-                        preview_ax.set_xlim(0, 1)  # Standard x-axis limits for ratio histogram
-                        preview_ax.grid(True, linestyle='--', alpha=0.7)
-                    
-                    # Redraw the canvas
-                    preview_canvas.draw()
+                    preview_label.setText(f"Resulting range: {range_min:.3f} - {range_max:.3f} "
+                                          f"({preview.count(range_min, range_max)} ratios)")
+                    preview.set_range(range_min, range_max)
                 
                 # Connect value changes to update preview
                 left_value_input.valueChanged.connect(update_preview_histogram)
@@ -1703,7 +1617,10 @@ class KatydidAnalyzer2(QMainWindow):
                 buttons.addWidget(cancel_button)
                 layout.addLayout(buttons)
                 
-                if dialog.exec_() == QDialog.Accepted:
+                accepted = dialog.exec_() == QDialog.Accepted
+                # The histogram is redrawn below; a pending preview redraw must not touch it
+                preview.timer.stop()
+                if accepted:
                     # Get the custom values directly
                     range_min = left_value_input.value()
                     range_max = right_value_input.value()
@@ -1836,6 +1753,11 @@ class KatydidAnalyzer2(QMainWindow):
         forward_input.setValue(self.copy_forward_ms)
         form_layout.addRow("Time after begin marker (ms):", forward_input)
         
+        # Per-copy WAV files (in addition to the combined WAV)
+        copy_wavs_input = QCheckBox("Also save each copy as its own WAV file")
+        copy_wavs_input.setChecked(self.save_copy_wavs)
+        form_layout.addRow(copy_wavs_input)
+        
         layout.addLayout(form_layout)
         
         # Add buttons
@@ -1852,178 +1774,23 @@ class KatydidAnalyzer2(QMainWindow):
         self.max_error_duration_ms = max_error_input.value()
         self.copy_backward_ms = backward_input.value()
         self.copy_forward_ms = forward_input.value()
+        self.save_copy_wavs = copy_wavs_input.isChecked()
         
         
-        for row in range(self.table.rowCount()):
-            # Clear the copy column
-            self.table.setItem(row, 8, QTableWidgetItem(""))
-        
         # Reset any class variables that might be storing copy information
         if hasattr(self, 'copy_sections'):
             del self.copy_sections
-            
-        # Reset the global copy counter to ensure we start from 1
-        if hasattr(self, '_copy_counter'):
-            del self._copy_counter
-        self._copy_counter = 0  # Will be incremented to 1 for the first copy
         
-        # Find error sequences (z values in the ex & in column)
-        error_sequences = []
-        current_error_seq = None
+        # Find the error (z) runs between a sequence end and the next begin, using
+        # the times as shown in the table, and mark the rows inside each copy window
+        model = self.table_model
+        window_starts, window_ends = copy_windows(
+            model.shown_time, model.labels, model.sequencing,
+            self.max_error_duration_ms, self.copy_backward_ms, self.copy_forward_ms)
+        model.copy_numbers[:] = mark_copies(model.shown_time, window_starts, window_ends)
+        self._copy_counter = len(window_starts)
         
-        # First pass: Find all rows with 'z' in the ex & in column
-        for row in range(self.table.rowCount()):
-            ex_in_item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-            time_item = self.table.item(row, 2)   # Time column
-            
-            if not ex_in_item or not time_item or not time_item.text():
-                continue
-                
-            try:
-                time_value = float(time_item.text())
-                ex_in_text = ex_in_item.text()
-                
-                # Check if this is an error row (z)
-                if ex_in_text == "z":
-                    # If we don't have an active error sequence, start one
-                    if current_error_seq is None:
-                        current_error_seq = {
-                            "start_row": row,
-                            "start_time": time_value,
-                            "end_row": row,
-                            "end_time": time_value,
-                            "rows": [row]
-                        }
-                    else:
-                        # Continue the current error sequence
-                        current_error_seq["end_row"] = row
-                        current_error_seq["end_time"] = time_value
-                        current_error_seq["rows"].append(row)
-                else:
-                    # If we have an active error sequence and this is not an error row, end it
-                    if current_error_seq is not None:
-                        error_sequences.append(current_error_seq)
-                        current_error_seq = None
-            except ValueError:
-                pass
-        
-        # Don't forget to add the last error sequence if it's still active
-        if current_error_seq is not None:
-            error_sequences.append(current_error_seq)
-        
-        # Filter error sequences by duration if needed
-        if self.max_error_duration_ms > 0:
-            filtered_sequences = []
-            for seq in error_sequences:
-                # Process each error sequence for copying
-                # Find the end marker (E) before the error sequence
-                end_marker_row = -1
-                end_marker_time = None
-                
-                for row in range(seq["start_row"]-1, -1, -1):
-                    seq_item = self.table.item(row, 7)  # Sequencing column (now index 7 with TimeB added)
-                    time_item = self.table.item(row, 2)  # Time column
-                    ex_in_item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                    
-                    if (seq_item and time_item and time_item.text() and 
-                        seq_item.text().startswith("E") and  # Ein or Eex
-                        ex_in_item and ex_in_item.text() in ["ex", "in"]):
-                        try:
-                            end_marker_time = float(time_item.text())
-                            break
-                        except ValueError:
-                            pass
-                
-                # Find the begin marker (B) after the error sequence
-                begin_marker_row = -1
-                begin_marker_time = None
-                
-                for row in range(seq["end_row"]+1, self.table.rowCount()):
-                    seq_item = self.table.item(row, 7)  # Sequencing column (now index 7 with TimeB added)
-                    time_item = self.table.item(row, 2)  # Time column
-                    ex_in_item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                    
-                    if (seq_item and time_item and time_item.text() and 
-                        seq_item.text() == "B" and 
-                        ex_in_item and ex_in_item.text() in ["ex", "in"]):
-                        try:
-                            begin_marker_time = float(time_item.text())
-                            break
-                        except ValueError:
-                            pass
-                
-                # If we found both markers, check the duration between them
-                if end_marker_time is not None and begin_marker_time is not None:
-                    # Calculate duration between E and B markers
-                    duration = begin_marker_time - end_marker_time
-                    # Add to filtered sequences if duration is within max error duration
-                    if duration <= self.max_error_duration_ms:
-                        filtered_sequences.append(seq)
-            error_sequences = filtered_sequences
-        
-        # Process each error sequence for copying
-        for error_seq in error_sequences:
-            # Find the end marker (E) before the error sequence
-            end_marker_row = -1
-            end_marker_time = None
-            
-            for row in range(error_seq["start_row"]-1, -1, -1):
-                seq_item = self.table.item(row, 7)  # Sequencing column (now index 7 with TimeB added)
-                time_item = self.table.item(row, 2)  # Time column
-                ex_in_item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                
-                if (seq_item and time_item and time_item.text() and 
-                    seq_item.text().startswith("E") and  # Ein or Eex
-                    ex_in_item and ex_in_item.text() in ["ex", "in"]):
-                    try:
-                        end_marker_row = row
-                        end_marker_time = float(time_item.text())
-                        break
-                    except ValueError:
-                        pass
-            
-            # Find the begin marker (B) after the error sequence
-            begin_marker_row = -1
-            begin_marker_time = None
-            
-            for row in range(error_seq["end_row"]+1, self.table.rowCount()):
-                seq_item = self.table.item(row, 7)  # Sequencing column (now index 7 with TimeB added)
-                time_item = self.table.item(row, 2)  # Time column
-                ex_in_item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                
-                if (seq_item and time_item and time_item.text() and 
-                    seq_item.text() == "B" and 
-                    ex_in_item and ex_in_item.text() in ["ex", "in"]):
-                    try:
-                        begin_marker_row = row
-                        begin_marker_time = float(time_item.text())
-                        break
-                    except ValueError:
-                        pass
-            
-            # If we found both markers, create a copy section
-            if end_marker_time is not None and begin_marker_time is not None:
-                # Increment the copy counter
-                self._copy_counter += 1
-                current_copy_number = self._copy_counter
-                
-                # Calculate copy range using user-defined offsets
-                copy_start_time = end_marker_time - self.copy_backward_ms
-                copy_end_time = begin_marker_time + self.copy_forward_ms
-                
-                # Find rows that fall within this time range
-                for row in range(self.table.rowCount()):
-                    time_item = self.table.item(row, 2)  # Time column
-                    if time_item and time_item.text():
-                        try:
-                            time_value = float(time_item.text())
-                            if copy_start_time <= time_value <= copy_end_time:
-                                # Mark this row for copying and highlight in yellow
-                                copy_item = QTableWidgetItem(f"Copy {current_copy_number}")
-                                copy_item.setBackground(QBrush(QColor(255, 255, 0)))  # Yellow background
-                                self.table.setItem(row, 8, copy_item)
-                        except ValueError:
-                            pass
+        model.columns_changed(8, 8)
         
         # Update status
         if self._copy_counter > 0:
@@ -2061,41 +1828,19 @@ class KatydidAnalyzer2(QMainWindow):
         print(f"Created directory: {save_dir}")
         
         # Create DataFrame from table data for the total CSV
-        headers = []
-        for col in range(self.table.columnCount()):
-            header_item = self.table.horizontalHeaderItem(col)
-            if header_item:
-                headers.append(header_item.text())
-            else:
-                headers.append(f"Column {col+1}")
-        
-        data = []
-        for row in range(self.table.rowCount()):
-            row_data = []
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item:
-                    row_data.append(item.text())
-                else:
-                    row_data.append("")
-            data.append(row_data)
-        
-        # Create DataFrame
-        df = pd.DataFrame(data, columns=headers)
+        model = self.table_model
+        df = model.display_frame()
         
         # Save total CSV file
         total_file_path = os.path.join(save_dir, f"{folder_name}_TOTAL.csv")
         df.to_csv(total_file_path, index=False)
         
-        # Find all copy sections
-        copy_sections = {}
-        for row in range(self.table.rowCount()):
-            copy_item = self.table.item(row, 8)  # Copy column (index 8 with TimeB added)
-            if copy_item and copy_item.text() and copy_item.text().startswith("Copy "):
-                copy_num = copy_item.text().split(" ")[1]
-                if copy_num not in copy_sections:
-                    copy_sections[copy_num] = []
-                copy_sections[copy_num].append(row)
+        # Find all copy sections (rows grouped by copy number, in row order)
+        copied_rows = np.flatnonzero(model.copy_numbers)
+        order = np.argsort(model.copy_numbers[copied_rows], kind='stable')
+        copied_rows = copied_rows[order]
+        copy_nums, firsts = np.unique(model.copy_numbers[copied_rows], return_index=True)
+        copy_sections = {str(copy_num): rows for copy_num, rows in zip(copy_nums, np.split(copied_rows, firsts[1:]))}
         
         # Print detailed information about found copy sections
         print(f"Found {len(copy_sections)} copy sections in the table")
@@ -2106,185 +1851,91 @@ class KatydidAnalyzer2(QMainWindow):
             QMessageBox.warning(self, "No Copy Sections", "No copy sections found in the table. Press 'C' to mark sections for copying first.")
             # Continue anyway to at least save the CSV and Excel files
         
-        # Create a combined waveform with all segments
-        combined_waveform = np.array([], dtype=np.int16)
-        one_second_samples = 1 * self.sample_rate  # Exactly one second of samples
+        # Plan the segment of every copy first, so the combined WAV's layout is
+        # known before any samples are read
+        one_second_samples = int(self.sample_rate)  # Exactly one second of samples
+        placeholder_samples = int(0.5 * self.sample_rate)  # 0.5 second of silence
+        segments = []
         
-        # Process each copy section and add to the combined waveform
-        wav_files_saved = 0
-        waveform_segments = []
+        # Rows of valid pulses, to find the pulses around each copy section
+        valid_rows = np.flatnonzero(((model.labels == "ex") | (model.labels == "in")) &
+                                    ~np.isnan(model.shown_time))
         
         for copy_num, rows in copy_sections.items():
-            if rows:
-                # Get time values for this section
-                time_values = []
-                for row in rows:
-                    time_item = self.table.item(row, 2)  # Time column
-                    if time_item and time_item.text():
-                        try:
-                            time_values.append(float(time_item.text()))
-                        except ValueError:
-                            pass
-                
-                if time_values:
-                    # Calculate start and end times in milliseconds
-                    min_time = min(time_values)
-                    max_time = max(time_values)
-                    
-                    # Calculate the range to extract (E - 200ms to B + 300ms)
-                    # Find the last valid pulse before this error sequence
-                    start_row = min(rows)
-                    last_valid_time = None
-                    for row in range(start_row-1, -1, -1):
-                        item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                        time_item = self.table.item(row, 2)  # Time column
-                        if item and time_item and item.text() in ["ex", "in"] and time_item.text():
-                            try:
-                                last_valid_time = float(time_item.text())
-                                break
-                            except ValueError:
-                                pass
-                    
-                    # Find the first valid pulse after this error sequence
-                    end_row = max(rows)
-                    next_valid_time = None
-                    for row in range(end_row+1, self.table.rowCount()):
-                        item = self.table.item(row, 6)  # ex & in column (now index 6 with TimeB added)
-                        time_item = self.table.item(row, 2)  # Time column
-                        if item and time_item and item.text() in ["ex", "in"] and time_item.text():
-                            try:
-                                next_valid_time = float(time_item.text())
-                                break
-                            except ValueError:
-                                pass
-                    
-                    # If we found valid pulses before and after
-                    if last_valid_time is not None and next_valid_time is not None:
-                        # Calculate the waveform segment to extract using user-defined offsets
-                        extract_start_ms = last_valid_time - self.copy_backward_ms  # User-defined ms before last valid pulse
-                        extract_end_ms = next_valid_time + self.copy_forward_ms      # User-defined ms after next valid pulse
-                        
-                        # Print detailed information about this segment
-                        print(f"Copy {copy_num}: Last valid time: {last_valid_time:.2f}ms, Next valid time: {next_valid_time:.2f}ms")
-                        print(f"Copy {copy_num}: Extract range: {extract_start_ms:.2f}ms to {extract_end_ms:.2f}ms (duration: {extract_end_ms-extract_start_ms:.2f}ms)")
-                        
-                        # Convert milliseconds to sample indices
-                        start_sample = max(0, int((extract_start_ms / 1000) * self.sample_rate))
-                        end_sample = min(len(self.wav_data), int((extract_end_ms / 1000) * self.sample_rate))
-                        
-                        # Extract the waveform segment
-                        waveform_segment = self.wav_data[start_sample:end_sample]
-                        
-                        # Store the segment for later combining
-                        waveform_segments.append((copy_num, waveform_segment))
-                        wav_files_saved += 1
-                    else:
-                        # Print debug info about why we couldn't find valid pulses
-                        print(f"WARNING: Copy {copy_num} - Could not find valid pulses before and/or after error sequence")
-                        print(f"  Last valid time: {last_valid_time}, Next valid time: {next_valid_time}")
-                        
-                        # Even if we don't have both markers, try to create a segment with what we have
-                        if last_valid_time is not None or next_valid_time is not None:
-                            # If we only have one marker, use a fixed duration for the other side
-                            if last_valid_time is not None and next_valid_time is None:
-                                # We have the start but not the end, use a fixed duration (e.g., 500ms after start)
-                                extract_start_ms = last_valid_time - self.copy_backward_ms
-                                extract_end_ms = last_valid_time + 500  # 500ms after last valid time as a fallback
-                                print(f"  Using fallback end time: {extract_end_ms:.2f}ms")
-                            elif next_valid_time is not None and last_valid_time is None:
-                                # We have the end but not the start, use a fixed duration (e.g., 500ms before end)
-                                extract_start_ms = next_valid_time - 500  # 500ms before next valid time as a fallback
-                                extract_end_ms = next_valid_time + self.copy_forward_ms
-                                print(f"  Using fallback start time: {extract_start_ms:.2f}ms")
-                            
-                            # Ensure start time is not negative
-                            extract_start_ms = max(0, extract_start_ms)
-                            
-                            # Convert milliseconds to sample indices
-                            start_sample = max(0, int((extract_start_ms / 1000) * self.sample_rate))
-                            end_sample = min(len(self.wav_data), int((extract_end_ms / 1000) * self.sample_rate))
-                            
-                            # Extract the waveform segment
-                            waveform_segment = self.wav_data[start_sample:end_sample]
-                            
-                            # Store the segment for later combining
-                            waveform_segments.append((copy_num, waveform_segment))
-                            wav_files_saved += 1
-                            print(f"  Created fallback segment for Copy {copy_num} from {extract_start_ms:.2f}ms to {extract_end_ms:.2f}ms")
-                        else:
-                            print(f"  Cannot create segment for Copy {copy_num} - no valid markers found")
-                            # Create a short empty segment as a placeholder so we don't lose the copy number
-                            empty_segment = np.zeros(int(0.5 * self.sample_rate), dtype=np.float64)  # 0.5 second of silence
-                            waveform_segments.append((copy_num, empty_segment))
-                            wav_files_saved += 1
-                            print(f"  Created empty placeholder segment for Copy {copy_num}")
-                else:
-                    print(f"WARNING: Copy {copy_num} - No time values found in the rows")
-                    # Create a short empty segment as a placeholder
-                    empty_segment = np.zeros(int(0.5 * self.sample_rate), dtype=np.float64)  # 0.5 second of silence
-                    waveform_segments.append((copy_num, empty_segment))
-                    wav_files_saved += 1
-                    print(f"  Created empty placeholder segment for Copy {copy_num}")
-            else:
-                print(f"WARNING: Copy {copy_num} - No rows found")
+            # Get time values for this section
+            time_values = model.shown_time[rows]
+            time_values = time_values[~np.isnan(time_values)]
+            
+            if len(time_values) == 0:
+                print(f"WARNING: Copy {copy_num} - No time values found in the rows")
                 # Create a short empty segment as a placeholder
-                empty_segment = np.zeros(int(0.5 * self.sample_rate), dtype=np.float64)  # 0.5 second of silence
-                waveform_segments.append((copy_num, empty_segment))
-                wav_files_saved += 1
+                segments.append(CopySegment.silence(copy_num, placeholder_samples))
                 print(f"  Created empty placeholder segment for Copy {copy_num}")
-        
-        # If we have waveform segments, combine them into a single file
-        if waveform_segments:
-            # Sort segments by copy number
-            waveform_segments.sort(key=lambda x: int(x[0]))
-            
-            # Calculate the total length needed for all segments with exactly one second per segment
-            total_length = one_second_samples * len(waveform_segments)
-            combined_waveform = np.zeros(total_length, dtype=np.int16)
+                continue
             
-            # Add each segment to the combined waveform at one-second intervals
-            for i, (copy_num, segment) in enumerate(waveform_segments):
-                # Scale to int16 range
-                if np.max(np.abs(segment)) > 0:
-                    segment = segment / np.max(np.abs(segment)) * 32767
-                
-                # Convert to int16
-                segment_int16 = segment.astype(np.int16)
-                
-                # Calculate the start position for this segment
-                start_pos = i * one_second_samples
-                
-                # Make sure we preserve the entire segment without truncation
-                segment_length = len(segment_int16)
-                
-                # If the segment is longer than one second, we need to extend the combined waveform
-                if segment_length > one_second_samples:
-                    # Create a new combined waveform with enough space
-                    new_total_length = total_length + (segment_length - one_second_samples)
-                    new_combined_waveform = np.zeros(new_total_length, dtype=np.int16)
-                    
-                    # Copy existing data
-                    new_combined_waveform[:start_pos] = combined_waveform[:start_pos]
-                    
-                    # Adjust positions for subsequent segments
-                    if i < len(waveform_segments) - 1:
-                        # Calculate how much we need to shift subsequent segments
-                        shift_amount = segment_length - one_second_samples
-                        # Copy the rest of the data with the shift
-                        new_combined_waveform[start_pos + segment_length:] = combined_waveform[start_pos + one_second_samples:]
-                    
-                    # Update the combined waveform
-                    combined_waveform = new_combined_waveform
-                    total_length = new_total_length
-                
-                # Add the segment to the combined waveform (full length, no truncation)
-                combined_waveform[start_pos:start_pos + segment_length] = segment_int16
+            # Calculate the range to extract (E - 200ms to B + 300ms)
+            # Find the last valid pulse before and the first valid pulse after this error sequence
+            before = np.searchsorted(valid_rows, rows[0], side='left') - 1
+            after = np.searchsorted(valid_rows, rows[-1], side='right')
+            last_valid_time = float(model.shown_time[valid_rows[before]]) if before >= 0 else None
+            next_valid_time = float(model.shown_time[valid_rows[after]]) if after < len(valid_rows) else None
+            
+            # If we found valid pulses before and after
+            if last_valid_time is not None and next_valid_time is not None:
+                # Calculate the waveform segment to extract using user-defined offsets
+                extract_start_ms = last_valid_time - self.copy_backward_ms  # User-defined ms before last valid pulse
+                extract_end_ms = next_valid_time + self.copy_forward_ms      # User-defined ms after next valid pulse
+                
+                # Print detailed information about this segment
+                print(f"Copy {copy_num}: Last valid time: {last_valid_time:.2f}ms, Next valid time: {next_valid_time:.2f}ms")
+                print(f"Copy {copy_num}: Extract range: {extract_start_ms:.2f}ms to {extract_end_ms:.2f}ms (duration: {extract_end_ms-extract_start_ms:.2f}ms)")
+            elif last_valid_time is not None or next_valid_time is not None:
+                # Print debug info about why we couldn't find valid pulses
+                print(f"WARNING: Copy {copy_num} - Could not find valid pulses before and/or after error sequence")
+                print(f"  Last valid time: {last_valid_time}, Next valid time: {next_valid_time}")
+                
+                # If we only have one marker, use a fixed duration for the other side
+                if next_valid_time is None:
+                    # We have the start but not the end, use a fixed duration (e.g., 500ms after start)
+                    extract_start_ms = last_valid_time - self.copy_backward_ms
+                    extract_end_ms = last_valid_time + 500  # 500ms after last valid time as a fallback
+                    print(f"  Using fallback end time: {extract_end_ms:.2f}ms")
+                else:
+                    # We have the end but not the start, use a fixed duration (e.g., 500ms before end)
+                    extract_start_ms = next_valid_time - 500  # 500ms before next valid time as a fallback
+                    extract_end_ms = next_valid_time + self.copy_forward_ms
+                    print(f"  Using fallback start time: {extract_start_ms:.2f}ms")
+                
+                # Ensure start time is not negative
+                extract_start_ms = max(0, extract_start_ms)
+                print(f"  Created fallback segment for Copy {copy_num} from {extract_start_ms:.2f}ms to {extract_end_ms:.2f}ms")
+            else:
+                print(f"WARNING: Copy {copy_num} - Could not find valid pulses before and/or after error sequence")
+                print(f"  Cannot create segment for Copy {copy_num} - no valid markers found")
+                # Create a short empty segment as a placeholder so we don't lose the copy number
+                segments.append(CopySegment.silence(copy_num, placeholder_samples))
+                print(f"  Created empty placeholder segment for Copy {copy_num}")
+                continue
             
-            # Save the combined waveform as a WAV file
+            # Convert milliseconds to sample indices
+            start_sample = max(0, int((extract_start_ms / 1000) * self.sample_rate))
+            end_sample = min(len(self.wav_data), int((extract_end_ms / 1000) * self.sample_rate))
+            segments.append(CopySegment(copy_num, start_sample, end_sample))
+        
+        wav_files_saved = len(segments)
+        
+        # Stream the segments into a combined WAV file, one slot of at least one
+        # second per segment (longer segments are kept whole and push the rest back)
+        if segments:
             combined_wav_path = os.path.join(save_dir, f"{folder_name}_combined.wav")
+            copy_paths = None
+            if self.save_copy_wavs:
+                copy_paths = [os.path.join(save_dir, f"{folder_name}_copy{segment.copy_num}.wav")
+                              for segment in segments]
             print(f"Saving combined WAV file: {combined_wav_path}")
             try:
-                scipy.io.wavfile.write(combined_wav_path, self.sample_rate, combined_waveform)
+                write_combined_wav(combined_wav_path, self.sample_rate, self.wav_data,
+                                   segments, one_second_samples, copy_paths)
                 print(f"Successfully saved combined WAV file: {combined_wav_path}")
             except Exception as e:
                 print(f"Error saving combined WAV file: {str(e)}")
@@ -2299,39 +1950,10 @@ class KatydidAnalyzer2(QMainWindow):
                 # Create Excel workbook
                 excel_file_path = os.path.join(save_dir, f"{folder_name}_exceltotal.xlsx")
                 print(f"Creating Excel file at: {excel_file_path}")
-                workbook = openpyxl.Workbook()
-                sheet = workbook.active
-                sheet.title = "Total Data"
-                
-                # Add data from DataFrame to Excel
-                for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-                    for c_idx, value in enumerate(row, 1):
-                        cell = sheet.cell(row=r_idx, column=c_idx, value=value)
-                        
-                        # Format header row
-                        if r_idx == 1:
-                            cell.font = Font(bold=True)
-                            cell.alignment = Alignment(horizontal='center')
-                        
-                        # Highlight cells with "Copy" in column 8
-                        if c_idx == 8 and r_idx > 1 and value and value.startswith("Copy"):
-                            cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-                
-                # Auto-adjust column widths
-                for column in sheet.columns:
-                    max_length = 0
-                    column_letter = openpyxl.utils.get_column_letter(column[0].column)
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2) * 1.25
-                    sheet.column_dimensions[column_letter].width = adjusted_width
-                
-                # Save Excel file
-                workbook.save(excel_file_path)
+                # Stream the table into a write-only workbook, highlighting copied rows
+                write_table_xlsx(excel_file_path, list(df.columns),
+                                 [df[header].tolist() for header in df.columns],
+                                 highlight_column=df.columns.get_loc("Copy"))
                 excel_saved = True
             except Exception as e:
                 print(f"Error creating Excel file: {str(e)}")
@@ -2360,11 +1982,10 @@ class KatydidAnalyzer2(QMainWindow):
         if hasattr(self, 'periods') and self.periods:
             period_min, period_max = self.period_range
             
-            # Filter periods that are within the selected period range
-            filtered_periods = [p for p in self.periods if 'duration' in p and period_min <= p['duration'] <= period_max]
-            ratios = [p['ratio'] for p in filtered_periods if 'ratio' in p]
+            # Ratios of the periods within the selected period range
+            ratios = self.periods.ratios_in_period_range(period_min, period_max)
             
-            if ratios:
+            if len(ratios) > 0:
                 # Set fixed view limits to 0-1 as requested
                 self.ratio_ax.set_xlim(0, 1)
                 
@@ -2469,35 +2090,31 @@ class KatydidAnalyzer2(QMainWindow):
         
         # Plot period histogram
         if hasattr(self, 'periods') and self.periods:
-            durations = [p['duration'] for p in self.periods if 'duration' in p]
-            if durations:
+            durations = self.periods.durations()
+            if len(durations) > 0:
                 # Set fixed view limits to 0-50ms as requested
                 self.period_ax.set_xlim(0, 50)
                 
-                # Calculate bin width based on sampling rate to ensure no gaps
-                # Find the minimum difference between consecutive sorted durations
-                sorted_durations = sorted(durations)
-                diffs = [sorted_durations[i+1] - sorted_durations[i] for i in range(len(sorted_durations)-1)]
-                if diffs:
-                    min_diff = min([d for d in diffs if d > 0], default=0.1)  # Minimum non-zero difference
-                    # Use exactly the minimum difference as bin width to ensure no gaps
-                    bin_width = min_diff
-                else:
-                    bin_width = 0.1  # Default if we can't determine from data
+                # Bin width: the minimum gap between durations so no two values share
+                # a bar, capped in bin count (falls back to the sample period, then
+                # Freedman-Diaconis, for noisy float durations)
+                sample_period = 1000 / self.sample_rate if self.sample_rate else None
+                bin_width = binning.bin_width(durations, 0, 50, sample_period)
                 
                 # Create bins with appropriate granularity from 0 to 50ms
-                bins = np.arange(0, 50 + bin_width, bin_width)
+                bins = binning.bin_edges(0, 50, bin_width)
                 
                 # Store the bin information for later use
                 self.period_bins = bins
                 
                 # First get the histogram data for visualization
-                hist, bin_edges = np.histogram(durations, bins=bins)
+                hist = binning.histogram(durations, bins)
+                bin_edges = bins
                 
-                # Plot histogram with bars that touch each other (no gaps)
-                n, bins_out, patches = self.period_ax.hist(durations, bins=bins, alpha=0.7, 
-                                                 color='green', edgecolor='black', linewidth=0.5,
-                                                 align='left', rwidth=1.0)  # rwidth=1.0 ensures bars touch
+                # Draw the bars as one filled step outline, centred on their left
+                # edges like hist(align='left') did
+                self.period_ax.stairs(hist, bin_edges - bin_width / 2, fill=True, alpha=0.7,
+                                      facecolor='green', edgecolor='black', linewidth=0.5)
                 
                 # Find the actual most common value in the dataset
                 unique_values, counts = np.unique(durations, return_counts=True)
@@ -2515,7 +2132,7 @@ class KatydidAnalyzer2(QMainWindow):
                 print(f"Bin edges of tallest bar: {bin_edges[tallest_bin_idx]:.2f} - {bin_edges[tallest_bin_idx + 1]:.2f} ms")
                 
                 # Find the bin centers for all bins
-                bin_centers = [(bin_edges[i] + bin_edges[i+1])/2 for i in range(len(bin_edges)-1)]
+                bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
                 
                 # Find the bar 2 positions to the left of the tallest bar (if it exists)
                 if tallest_bin_idx > 1:
@@ -2593,11 +2210,11 @@ class KatydidAnalyzer2(QMainWindow):
             recommended_variation = 0.05  # Default
             
             if hasattr(self, 'periods') and self.periods:
-                ratios = [p.get('ratio', 0.5) for p in self.periods if 'ratio' in p]
-                if ratios:
+                ratios = self.periods.ratio
+                if len(ratios) > 0:
                     # Calculate standard deviation around 0.5
-                    ratios_near_half = [r for r in ratios if 0.4 <= r <= 0.6]
-                    if ratios_near_half:
+                    ratios_near_half = ratios[(ratios >= 0.4) & (ratios <= 0.6)]
+                    if len(ratios_near_half) > 0:
                         std_dev = np.std(ratios_near_half)
                         recommended_variation = max(0.02, min(0.1, std_dev * 2))  # Reasonable bounds
             
@@ -2637,37 +2254,15 @@ class KatydidAnalyzer2(QMainWindow):
             return "DP"  # Double Pulse
     
     def update_pulse_patterns(self):
-        # Add a Pulse Pattern column to the table if it doesn't exist
-        if self.table.columnCount() < 6:
-            self.table.setColumnCount(6)
-            headers = [self.table.horizontalHeaderItem(i).text() for i in range(5)]
-            headers.insert(1, "Pulse Pattern")  # Add after Period column
-            self.table.setHorizontalHeaderLabels(headers)
-        
-        # Update the pulse pattern for each row
-        for row in range(self.table.rowCount()):
-            # Get the ratio from the table
-            ratio_item = self.table.item(row, 3)  # Pulse Ratio column
-            if ratio_item and ratio_item.text():
-                try:
-                    ratio = float(ratio_item.text())
-                    pattern = self.determine_pulse_pattern(ratio)
-                    
-                    # Create or update the pattern item
-                    pattern_item = self.table.item(row, 1)
-                    if not pattern_item:
-                        pattern_item = QTableWidgetItem(pattern)
-                        self.table.setItem(row, 1, pattern_item)
-                    else:
-                        pattern_item.setText(pattern)
-                    
-                    # Set background color based on pattern
-                    if pattern == "SP":
-                        pattern_item.setBackground(QBrush(QColor(200, 255, 200)))  # Light green
-                    else:  # DP
-                        pattern_item.setBackground(QBrush(QColor(255, 200, 200)))  # Light red
-                except ValueError:
-                    pass
+        # Color the Ratio column by pulse pattern: SP light green, DP light red
+        model = self.table_model
+        ratios = self.periods.ratio
+        single = np.abs(ratios - 0.5) <= self.pulse_pattern_variation
+        states = np.where(single, 1, 2).astype(np.int8)
+        # Rows without a ratio keep the row color
+        states[np.isnan(ratios)] = 0
+        model.ratio_states = states
+        model.columns_changed(5, 5)
         
         # Resize columns to content
         self.table.resizeColumnsToContents()
@@ -2682,8 +2277,8 @@ class KatydidAnalyzer2(QMainWindow):
                 self.status_label.setText("No period data available for analysis")
                 return
             
-            durations = [p.get('duration', 0) for p in self.periods if 'duration' in p]
-            if not durations:
+            durations = self.periods.durations()
+            if len(durations) == 0:
                 print("No duration data available")
                 self.status_label.setText("No duration data available for analysis")
                 return
@@ -2724,40 +2319,17 @@ class KatydidAnalyzer2(QMainWindow):
             self.status_label.setText(f"Error: {str(e)}")
     
     def highlight_deviations(self, mode_value, threshold):
-        # Reset all cell backgrounds
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item:
-                    item.setBackground(QBrush(QColor(255, 255, 255)))  # White background
-        
-        # Highlight rows with durations that deviate from the mode
-        for row in range(self.table.rowCount()):
-            duration_item = self.table.item(row, 1)  # Duration column
-            if duration_item and duration_item.text():
-                try:
-                    duration = float(duration_item.text())
-                    if abs(duration - mode_value) > threshold:
-                        # This duration deviates from the mode
-                        for col in range(self.table.columnCount()):
-                            item = self.table.item(row, col)
-                            if item:
-                                # Light orange background for deviations
-                                item.setBackground(QBrush(QColor(255, 220, 180)))
-                except ValueError:
-                    pass
+        # Highlight rows with durations that deviate from the mode (light orange),
+        # every other row goes back to the plain background
+        model = self.table_model
+        deviates = np.abs(self.periods.duration - mode_value) > threshold
+        model.row_states[:] = np.where(deviates, model.ROW_DEVIATION, model.ROW_PLAIN)
+        model.columns_changed(0, model.columnCount() - 1)
         
         # Scroll to the first highlighted row
-        for row in range(self.table.rowCount()):
-            duration_item = self.table.item(row, 1)  # Duration column
-            if duration_item and duration_item.text():
-                try:
-                    duration = float(duration_item.text())
-                    if abs(duration - mode_value) > threshold:
-                        self.table.scrollToItem(duration_item)
-                        break
-                except ValueError:
-                    pass
+        rows = np.flatnonzero(deviates)
+        if len(rows) > 0:
+            self.table.scrollTo(model.index(int(rows[0]), 4))  # Duration column
 
     def show_controls_help(self):
         """Show a help dialog with all available controls."""
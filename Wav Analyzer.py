@@ -8,13 +8,24 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, 
                             QWidget, QLabel, QFileDialog, QMessageBox, QFrame, QTableWidget, 
-                            QTableWidgetItem, QSplitter, QRadioButton, QButtonGroup, QSizePolicy, 
+                            QTableWidgetItem, QTableView, QHeaderView, QSplitter, QRadioButton, QButtonGroup, QSizePolicy, 
                             QGridLayout, QDialog, QTabWidget, QScrollArea, QTextBrowser, QInputDialog, QLineEdit)
 from PyQt5.QtMultimedia import QSound
-from PyQt5.QtCore import Qt, QRectF, QPropertyAnimation, QSize, pyqtSlot, QPoint, QSequentialAnimationGroup, QEasingCurve
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRectF, QPropertyAnimation, QSize, pyqtSlot, QPoint, QSequentialAnimationGroup, QEasingCurve
 from PyQt5.QtGui import QColor, QPalette, QFont, QDrag, QIcon, QLinearGradient, QRadialGradient, QPainter, QPen, QBrush, QPainterPath
 from datetime import datetime
-from scipy.io import wavfile
+
+from katydid.audio import read_wav, write_processed_wav
+from katydid.cache import default_cache
+from katydid.detection import detect_peaks, enforce_min_distance, local_maxima, resolve_threshold
+from katydid.envelope import EnvelopePyramid
+from katydid.export import write_statistics, write_table_csv
+from katydid.histograms import draw_histogram, histogram_mode, save_period_histogram, save_ratio_histogram
+from katydid.history import EditHistory, InversionEdit, PulseEdit, ThresholdEdit, delete_pulses, insert_pulses
+from katydid.periods import compute_periods
+from katydid.pulses import DETECTED, MANUAL, PEAK_NEGATIVE, PEAK_POSITIVE, PulseTable
+from katydid.session import Session, load_session, remove_session, save_session
+from katydid.smoothing import moving_average
 
 
 class AnimatedGradientWidget(QWidget):
@@ -122,6 +133,60 @@ class AnimatedGradientWidget(QWidget):
             painter.drawEllipse(int(p['x'] - p['size']/2), int(p['y'] - p['size']/2), 
                               int(p['size']), int(p['size']))
 
+class PeriodAnalysisModel(QAbstractTableModel):
+    """
+    Read-only table over a PeriodAnalysis, one row per pulse.
+
+    Cells are formatted only when the view asks for them, so showing
+    100k pulses doesn't create half a million table items.
+    """
+
+    HEADERS = ["Period", "Duration (ms)", "Pulse Ratio", "Amplitude", "Time (ms)"]
+
+    def __init__(self, analysis, outliers, parent=None):
+        super().__init__(parent)
+        self.analysis = analysis
+        # One flag per period: duration far from the mode
+        self.outliers = outliers
+        self.outlier_brush = QBrush(QColor(255, 200, 200))  # Light red background
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.analysis.num_pulses
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def text(self, row, col):
+        """Cell text, exactly as displayed."""
+        if col == 3:
+            return f"{self.analysis.amplitudes[row]:.4f}"
+        if col == 4:
+            return f"{self.analysis.times[row]:.2f}"
+        # Pulse row is the first pulse of period row, if there is one
+        if row >= self.analysis.num_periods:
+            return ""
+        if col == 0:
+            return str(row + 1)
+        if col == 1:
+            return f"{self.analysis.durations[row]:.2f}"
+        return f"{self.analysis.ratios[row]:.4f}"
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.text(row, index.column())
+        if role == Qt.BackgroundRole and row < len(self.outliers) and self.outliers[row]:
+            return self.outlier_brush
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
 class KatydidAnalysisApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -189,8 +254,15 @@ class KatydidAnalysisApp(QMainWindow):
         self.chunk_size = 1000000  # Maximum chunk size to load at once
         self.current_chunk = None
         self.chunk_start = 0
-        self.pulses = []
+        self.pulses = PulseTable()
         self.skips = []
+        self.inversion_count = 0
+        self.smoothing_passes = 0
+        # On-disk cache of decoded samples and derived signals (None if disabled)
+        self.cache = default_cache()
+        self.wav_digest = None
+        # Undo/redo stack of pulse, threshold and inversion edits
+        self.history = EditHistory()
         self.threshold = 0.5
         self.abs_threshold = 0.5  # Absolute threshold for entire file
         self.rel_threshold = 0.5  # Relative threshold for current window
@@ -530,6 +602,70 @@ class KatydidAnalysisApp(QMainWindow):
         dialog.accept()
         self.transition_to_pulse_selection()
     
+    def save_session(self):
+        """
+        Save pulses, thresholds and processing history next to the current WAV file.
+
+        Nothing is saved for a recording that was only looked at, and an
+        older session file of it is removed, so there is nothing to resume.
+        """
+        if not self.file_loaded or not self.file_path or self.file_type == "csv":
+            return
+        try:
+            session = Session(
+                pulses=self.pulses,
+                abs_threshold=self.abs_threshold,
+                rel_threshold=self.rel_threshold,
+                using_absolute_threshold=self.using_absolute_threshold,
+                inversion_count=self.inversion_count,
+                smoothing_passes=self.smoothing_passes,
+                region_active=self.region_selection_active,
+                region_mode=self.region_selection_mode,
+                region_left=self.region_left_pos,
+                region_right=self.region_right_pos,
+                view_start=self.view_start,
+                view_range=self.view_range)
+            if not session.has_work():
+                if remove_session(self.file_path):
+                    print(f"Removed session with no work: {self.file_path}")
+                return
+            path = save_session(self.file_path, session)
+            print(f"Saved session: {path}")
+        except Exception as e:
+            print(f"Error saving session: {str(e)}")
+            self.statusBar().showMessage(f"Error saving session: {str(e)}")
+    
+    def restore_session(self, session):
+        """Restore a saved session on the freshly loaded recording."""
+        # Replay the processing history on the original samples
+        if session.inversion_count % 2 == 1:
+            self._flip_sign()
+        self.inversion_count = session.inversion_count
+        for _ in range(session.smoothing_passes):
+            self._smoothing_pass()
+        
+        self.pulses = session.pulses
+        self.abs_threshold = session.abs_threshold
+        self.rel_threshold = session.rel_threshold
+        self.using_absolute_threshold = session.using_absolute_threshold
+        self.threshold = self.abs_threshold if self.using_absolute_threshold else self.rel_threshold
+        
+        self.region_selection_active = session.region_active
+        self.region_selection_mode = session.region_mode
+        self.region_left_pos = session.region_left
+        self.region_right_pos = session.region_right
+        
+        if session.view_range is not None:
+            self.view_range = min(session.view_range, self.total_frames)
+            self.view_start = max(0, min(session.view_start, self.total_frames - self.view_range))
+        print(f"Restored session: {len(self.pulses)} pulses, {self.inversion_count} inversions, "
+              f"{self.smoothing_passes} smoothing passes")
+    
+    def closeEvent(self, event):
+        # Keep the work on the current recording
+        self.save_session()
+        super().closeEvent(event)
+    
     def handle_close(self):
         reply = QMessageBox.question(
             self, 'Exit Application',
@@ -1217,25 +1353,14 @@ class KatydidAnalysisApp(QMainWindow):
             self.load_wav_file(self.file_queue[self.current_file_index])
     
     def load_wav_file(self, file_path):
+        # Keep the work on the previous recording before switching
+        self.save_session()
+        
         try:
-            # Ensure file exists and is readable
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
-            # Load the entire WAV file at once using scipy.io.wavfile
-            self.sample_rate, wav_data = wavfile.read(file_path)
-            
-            # Convert to float in range [-1, 1] for consistent processing
-            if wav_data.dtype == np.int16:
-                wav_data = wav_data.astype(np.float32) / 32768.0
-            elif wav_data.dtype == np.int32:
-                wav_data = wav_data.astype(np.float32) / 2147483648.0
-            elif wav_data.dtype == np.uint8:
-                wav_data = (wav_data.astype(np.float32) - 128) / 128.0
-                
-            # If stereo, convert to mono by averaging channels
-            if len(wav_data.shape) > 1 and wav_data.shape[1] > 1:
-                wav_data = np.mean(wav_data, axis=1)
+            # Memory-map the WAV file; samples are converted to mono float in [-1, 1] on demand
+            # (or mapped from the cache if this recording was decoded before)
+            self.sample_rate, wav_data = read_wav(file_path, self.cache)
+            self.wav_digest = self.cache.file_digest(file_path) if self.cache is not None else None
                 
             # Store total frames
             self.total_frames = len(wav_data)
@@ -1249,17 +1374,25 @@ class KatydidAnalysisApp(QMainWindow):
             # Store the entire audio data
             self.wav_data = wav_data
             
-            # Keep a copy of the original data for reset functionality
-            self.original_wav_data = wav_data.copy()
+            # Keep the original mapping for reset functionality (no sample copy needed)
+            self.original_wav_data = wav_data
+            
+            # Build the waveform envelope once; every zoom level is drawn from it
+            self.wav_envelope = EnvelopePyramid.cached(self.cache, ('mono', self.wav_digest), wav_data)
+            self.original_envelope = self.wav_envelope
             
             # Reset processing variables
             self.abs_data = None
             self.smoothed_data = None
-            self.pulses = []
+            self.abs_envelope = None
+            self.smoothed_envelope = None
+            self.pulses = PulseTable()
             self.skips = []
+            self.history.clear()
             
-            # Track number of inversions
+            # Track number of inversions and smoothing passes
             self.inversion_count = 0
+            self.smoothing_passes = 0
             
             # Initialize processing variables
             self.abs_threshold = 0.5
@@ -1271,6 +1404,16 @@ class KatydidAnalysisApp(QMainWindow):
             self.view_start = 0
             self.view_range = min(self.sample_rate * 2, self.total_frames)  # View first 2 seconds
             
+            # Offer to resume the saved session of this recording
+            session = load_session(file_path)
+            if session is not None:
+                reply = QMessageBox.question(self, "Resume Session",
+                                             f"A saved session with {len(session.pulses)} pulses was found "
+                                             f"for {os.path.basename(file_path)}.\nResume it?",
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                if reply == QMessageBox.Yes:
+                    self.restore_session(session)
+            
             # Show the waveform and controls
             self.canvas.setVisible(True)
             self.controls_widget.setVisible(True)
@@ -1399,27 +1542,15 @@ class KatydidAnalysisApp(QMainWindow):
         if not hasattr(self, 'file_path') or not self.file_path or not hasattr(self, 'wav_data'):
             return
         
-        # Enable mouse interaction
-        self.canvas.mpl_connect('button_press_event', self.on_mouse_press)
-        self.canvas.mpl_connect('button_release_event', self.on_mouse_release)
-        self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
-        
-        # Clear the plot
-        self.ax.clear()
-        
-        # Reset region lines references
-        self.region_left_line = None
-        self.region_right_line = None
-        self.region_rect = None
+        # Artists are created once and then only have their data updated
+        if getattr(self, 'plot_artists_ax', None) is not self.ax:
+            self._create_plot_artists()
         
         # Ensure view_start is within bounds
         self.view_start = max(0, min(self.view_start, self.total_frames - 1))
         
         # Calculate view range
         view_end = min(self.view_start + self.view_range, self.total_frames)
-        
-        # Get visible portion of data directly from the full dataset
-        visible_data = self.wav_data[self.view_start:view_end]
     
         # Set y-axis limits based on data type
         if self.abs_data is not None:
@@ -1427,47 +1558,33 @@ class KatydidAnalysisApp(QMainWindow):
         else:
             self.ax.set_ylim(-1, 1)
     
-        # Plot the waveform
-        if self.smoothed_data is not None:
-            plot_data = self.smoothed_data[self.view_start:view_end]
-            color, label = 'g-', 'Smoothed'
-        elif self.abs_data is not None:
-            plot_data = self.abs_data[self.view_start:view_end]
-            color, label = 'b-', 'Absolute'
-        else:
-            plot_data = visible_data
-            color, label = 'k-', 'Raw'
+        # Get the min/max envelope of the visible window (raw samples when zoomed in)
+        envelope, color, label = self._display_envelope()
+        positions, plot_data = envelope.query(self.view_start, view_end)
     
         # Calculate time values in milliseconds
         start_time_ms = self.view_start * 1000 / self.sample_rate
         end_time_ms = view_end * 1000 / self.sample_rate
-    
-        # Create time array for the plot data
-        time_ms = np.linspace(start_time_ms, end_time_ms, len(plot_data))
-    
-        # Downsample if too many points
-        max_points = 10000
-        if len(plot_data) > max_points:
-            downsample = len(plot_data) // max_points
-            plot_data = plot_data[::downsample]
-            time_ms = time_ms[::downsample]
+        time_ms = positions * 1000 / self.sample_rate
         
         # Set x-axis limits to keep the view fixed
         self.ax.set_xlim(start_time_ms, end_time_ms)
     
-        # Plot the data
-        self.ax.plot(time_ms, plot_data, color, label=label, linewidth=0.5)
+        # Update the waveform line, restyling it only when the displayed signal changes
+        self.waveform_line.set_data(time_ms, plot_data)
+        if self.waveform_line.get_label() != label:
+            self.waveform_line.set_color(color[0])
+            self.waveform_line.set_label(label)
+            self.ax.legend(loc='upper right')  # Specify a fixed location for the legend
     
         # Always draw both threshold lines
-        # Draw absolute threshold in red
-        self.ax.axhline(y=self.abs_threshold, color='red', linestyle='-', label='Absolute Threshold')
+        self.abs_threshold_line.set_ydata([self.abs_threshold, self.abs_threshold])
     
-        # Calculate and draw relative threshold in violet
+        # Calculate the relative threshold line from the visible data
         rel_threshold = self.rel_threshold
         if len(plot_data) > 0:
             rel_threshold = self.rel_threshold * np.max(np.abs(plot_data))
-    
-        self.ax.axhline(y=rel_threshold, color='violet', linestyle='-', label='Relative Threshold')
+        self.rel_threshold_line.set_ydata([rel_threshold, rel_threshold])
     
         # Set the active threshold based on current mode
         if self.using_absolute_threshold:
@@ -1479,97 +1596,171 @@ class KatydidAnalysisApp(QMainWindow):
         self.threshold_label.setText(f"Threshold: {self.threshold:.3f}")
         self.threshold_mode_label.setText(f"Mode: {'Absolute' if self.using_absolute_threshold else 'Relative'}")
     
-        # Plot detected pulses
-        for pulse in self.pulses:
-            pulse_pos = pulse['position']  # Get position from pulse dictionary
-            if self.view_start <= pulse_pos < view_end:
-                pulse_time = pulse_pos / self.sample_rate * 1000  # Convert to ms
-                
-                # Get pulse height directly from the data
-                if self.smoothed_data is not None:
-                    pulse_height = self.smoothed_data[pulse_pos]
-                elif self.abs_data is not None:
-                    pulse_height = self.abs_data[pulse_pos]
-                else:
-                    pulse_height = self.wav_data[pulse_pos]
-                
-                # Use different colors for positive and negative peaks
-                peak_color = 'go' if pulse.get('peak_type') == 'negative' else 'ro'
-                self.ax.plot(pulse_time, pulse_height, peak_color, markersize=5)
+        # Plot detected pulses - only the visible slice of the sorted table is touched
+        first, last = self.pulses.range_indices(self.view_start, view_end - 1)
+        visible_positions = self.pulses.positions[first:last]
+        visible_negative = self.pulses.peak_types[first:last] == PEAK_NEGATIVE
+        
+        # Get pulse heights directly from the displayed data
+        if self.smoothed_data is not None:
+            pulse_heights = self.smoothed_data[visible_positions]
+        elif self.abs_data is not None:
+            pulse_heights = self.abs_data[visible_positions]
+        else:
+            pulse_heights = self.wav_data[visible_positions]
+        pulse_times = visible_positions / self.sample_rate * 1000  # Convert to ms
+        
+        # Use different colors for positive and negative peaks
+        self.positive_pulse_markers.set_data(pulse_times[~visible_negative], pulse_heights[~visible_negative])
+        self.negative_pulse_markers.set_data(pulse_times[visible_negative], pulse_heights[visible_negative])
     
-        # Plot detected skips
-        for skip in self.skips:
-            if self.view_start <= skip['position'] < view_end:  # Access position from skip dictionary
-                skip_time = skip['position'] / self.sample_rate * 1000  # Convert to ms
-                # Add magenta X marker
-                self.ax.plot(skip_time, self.threshold, 'mx', markersize=10, markeredgewidth=2)
-                # Add blue vertical line for skip
-                self.ax.axvline(x=skip_time, color='blue', linestyle='--', alpha=0.7)
+        # Plot detected skips as magenta X markers with blue vertical lines
+        skip_times = [skip['position'] / self.sample_rate * 1000 for skip in self.skips
+                      if self.view_start <= skip['position'] < view_end]
+        self.skip_markers.set_data(skip_times, [self.threshold] * len(skip_times))
+        self.skip_lines.set_segments([[(t, 0), (t, 1)] for t in skip_times])
+        
+        # Redraw selection if active
+        self._update_selection_overlay()
+        
+        # Draw region selection lines if active
+        region_left = None
+        region_right = None
+        if hasattr(self, 'region_selection_active') and self.region_selection_active:
+            region_left = getattr(self, 'region_left_pos', None)
+            if region_left is not None:
+                region_right = getattr(self, 'region_right_pos', None)
+        self.region_left_line.set_visible(region_left is not None)
+        self.region_right_line.set_visible(region_right is not None)
+        self.region_rect.set_visible(region_right is not None)
+        if region_left is not None:
+            self.region_left_line.set_xdata([region_left, region_left])
+        if region_right is not None:
+            # Shaded region between lines
+            self.region_right_line.set_xdata([region_right, region_right])
+            self.region_rect.set_x(region_left)
+            self.region_rect.set_width(region_right - region_left)
+        
+        self.canvas.draw_idle()
     
+    def _create_plot_artists(self):
+        """Create the waveform plot artists once; update_plot only changes their data."""
+        from matplotlib.patches import Rectangle
+        
+        self.ax.clear()
         self.ax.set_xlabel('Time (ms)')
         self.ax.set_ylabel('Amplitude')
         self.ax.set_title('Katydid Call Waveform Analysis')
         self.ax.grid(True)
+        
+        # Waveform and both threshold lines
+        self.waveform_line, = self.ax.plot([], [], 'k-', label='Raw', linewidth=0.5)
+        self.abs_threshold_line = self.ax.axhline(y=self.abs_threshold, color='red', linestyle='-', label='Absolute Threshold')
+        self.rel_threshold_line = self.ax.axhline(y=self.rel_threshold, color='violet', linestyle='-', label='Relative Threshold')
+        
+        # One marker line per peak type
+        self.positive_pulse_markers, = self.ax.plot([], [], 'ro', markersize=5)
+        self.negative_pulse_markers, = self.ax.plot([], [], 'go', markersize=5)
+        
+        # Skips: magenta X markers plus dashed vertical lines spanning the axes
+        self.skip_markers, = self.ax.plot([], [], 'mx', markersize=10, markeredgewidth=2)
+        self.skip_lines = self.ax.vlines([], 0, 1, transform=self.ax.get_xaxis_transform(),
+                                         colors='blue', linestyles='--', alpha=0.7)
+        
+        # Region selection lines and shading (hidden until used)
+        self.region_left_line = self.ax.axvline(x=0, color='red', linestyle='-', linewidth=2, visible=False)
+        self.region_right_line = self.ax.axvline(x=0, color='red', linestyle='-', linewidth=2, visible=False)
+        self.region_rect = Rectangle((0, 0), 0, 1, transform=self.ax.get_xaxis_transform(),
+                                     alpha=0.2, color='green', visible=False)
+        self.ax.add_patch(self.region_rect)
+        
+        # Mouse selection overlays are animated: they are blitted over a cached background
+        self.selection_rect = Rectangle((0, 0), 0, 0, alpha=0.3, color='yellow',
+                                        visible=False, animated=True)
+        self.ax.add_patch(self.selection_rect)
+        self.time_text = self.ax.text(
+            0.5, 0.03, "",
+            transform=self.ax.transAxes,
+            ha='center', va='bottom',
+            bbox=dict(
+                facecolor='black', 
+                alpha=0.7,
+                edgecolor='white',
+                boxstyle='round,pad=0.5'
+            ),
+            color='#00ff00',
+            fontsize=9,
+            visible=False,
+            animated=True
+        )
+        
         self.ax.legend(loc='upper right')  # Specify a fixed location for the legend
-        # Redraw selection if active
-        if self.selection_start is not None and self.selection_end is not None and self.selection_ystart is not None and self.selection_yend is not None:
-            x_min = min(self.selection_start, self.selection_end)
-            x_max = max(self.selection_start, self.selection_end)
+        
+        # Re-cache the blit background after every full draw
+        self.plot_background = None
+        if getattr(self, 'draw_event_id', None) is None:
+            self.draw_event_id = self.canvas.mpl_connect('draw_event', self._on_canvas_draw)
+        self.plot_artists_ax = self.ax
+    
+    def _on_canvas_draw(self, event):
+        """Cache the plot without the overlays, then draw the overlays on top."""
+        if getattr(self, 'plot_artists_ax', None) is not self.ax:
+            return
+        self.plot_background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.selection_rect)
+        self.ax.draw_artist(self.time_text)
+    
+    def _update_selection_overlay(self):
+        """Sync the selection rectangle and duration box with the current selection."""
+        if getattr(self, 'plot_artists_ax', None) is not self.ax:
+            return
+        
+        if self.selection_start is None or self.selection_end is None:
+            self.selection_rect.set_visible(False)
+            self.time_text.set_visible(False)
+            return
+        
+        x_min = min(self.selection_start, self.selection_end)
+        x_max = max(self.selection_start, self.selection_end)
+        
+        # Use full height if y-coordinates aren't available
+        if self.selection_ystart is None or self.selection_yend is None:
+            y_min, y_max = self.ax.get_ylim()
+        else:
             y_min = min(self.selection_ystart, self.selection_yend)
             y_max = max(self.selection_ystart, self.selection_yend)
         
-            # Create rectangle for selection
-            from matplotlib.patches import Rectangle
-            if self.selection_rect:
-                try:
-                    self.selection_rect.remove()
-                except:
-                    pass  # In case the rectangle was already removed
-        
-            # Calculate normalized coordinates for the rectangle
-            ymin, ymax = self.ax.get_ylim()
-            y_range = ymax - ymin
-        
-            norm_y_min = (y_min - ymin) / y_range
-            norm_y_max = (y_max - ymin) / y_range
-        
-            self.selection_rect = self.ax.axvspan(x_min, x_max, 
-                                                ymin=norm_y_min, 
-                                                ymax=norm_y_max,
-                                                alpha=0.3, color='yellow')
-        
-        # Add on-graph time display in a small black box
-        if self.selection_start is not None and self.selection_end is not None:
-            duration = abs(self.selection_end - self.selection_start)
-            self.time_text = self.ax.text(
-                0.5, 0.03, 
-                f"Selection: {duration:.3f} ms", 
-                transform=self.ax.transAxes,
-                ha='center', va='bottom',
-                bbox=dict(
-                    facecolor='black', 
-                    alpha=0.7,
-                    edgecolor='white',
-                    boxstyle='round,pad=0.5'
-                ),
-                color='#00ff00',
-                fontsize=9
-            )
-        
-        # Draw region selection lines if active
-        if hasattr(self, 'region_selection_active') and self.region_selection_active:
-            if hasattr(self, 'region_left_pos') and self.region_left_pos is not None:
-                # Draw left line
-                self.region_left_line = self.ax.axvline(x=self.region_left_pos, color='red', linestyle='-', linewidth=2)
-                
-                # Draw right line if it's set
-                if hasattr(self, 'region_right_pos') and self.region_right_pos is not None:
-                    self.region_right_line = self.ax.axvline(x=self.region_right_pos, color='red', linestyle='-', linewidth=2)
-                    
-                    # Draw shaded region between lines
-                    self.region_rect = self.ax.axvspan(self.region_left_pos, self.region_right_pos, alpha=0.2, color='green')
+        self.selection_rect.set_bounds(x_min, y_min, x_max - x_min, y_max - y_min)
+        self.selection_rect.set_visible(True)
         
-        self.canvas.draw()
+        # On-graph time display in a small black box
+        self.time_text.set_text(f"Selection: {abs(x_max - x_min):.3f} ms")
+        self.time_text.set_visible(True)
+    
+    def _blit_selection(self):
+        """Redraw only the selection overlays on top of the cached plot."""
+        self._update_selection_overlay()
+        if getattr(self, 'plot_background', None) is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.plot_background)
+        self.ax.draw_artist(self.selection_rect)
+        self.ax.draw_artist(self.time_text)
+        self.canvas.blit(self.ax.bbox)
+    
+    def _display_envelope(self):
+        """Return (envelope, line style, label) for the signal currently shown."""
+        if self.smoothed_data is not None:
+            if getattr(self, 'smoothed_envelope', None) is None:
+                self.smoothed_envelope = EnvelopePyramid(self.smoothed_data)
+            return self.smoothed_envelope, 'g-', 'Smoothed'
+        if self.abs_data is not None:
+            if getattr(self, 'abs_envelope', None) is None:
+                self.abs_envelope = EnvelopePyramid(self.abs_data)
+            return self.abs_envelope, 'b-', 'Absolute'
+        if getattr(self, 'wav_envelope', None) is None:
+            self.wav_envelope = EnvelopePyramid(self.wav_data)
+        return self.wav_envelope, 'k-', 'Raw'
     
     def on_mouse_press(self, event):
         if not hasattr(self, 'ax') or event.inaxes != self.ax:
@@ -1584,34 +1775,9 @@ class KatydidAnalysisApp(QMainWindow):
         self.selection_ystart = event.ydata
         self.selection_yend = event.ydata
         
-        # Remove existing selection rectangle if present
-        if hasattr(self, 'selection_rect') and self.selection_rect:
-            try:
-                self.selection_rect.remove()
-            except:
-                pass
-        
-        # Draw a small starting rectangle
+        # Draw the starting selection over the cached plot
         if event.xdata is not None and event.ydata is not None:
-            # Calculate normalized coordinates for the rectangle
-            ymin, ymax = self.ax.get_ylim()
-            y_range = ymax - ymin
-            
-            norm_y_min = (self.selection_ystart - ymin) / y_range
-            norm_y_max = (self.selection_ystart - ymin) / y_range + 0.01  # Small height to start
-            
-            # Ensure values are within [0, 1] range
-            norm_y_min = max(0, min(1, norm_y_min))
-            norm_y_max = max(0, min(1, norm_y_max))
-            
-            self.selection_rect = self.ax.axvspan(event.xdata, event.xdata, 
-                                                ymin=norm_y_min, 
-                                                ymax=norm_y_max,
-                                                alpha=0.3, color='yellow')
-            
-            
-            # Use draw_idle() for more responsive updates
-            self.canvas.draw_idle()
+            self._blit_selection()
     
     def on_mouse_move(self, event):
         # Early exit if no selection is active or mouse outside the axes
@@ -1627,72 +1793,12 @@ class KatydidAnalysisApp(QMainWindow):
         if event.ydata is not None:
             self.selection_yend = event.ydata
         
-        # Remove existing rectangle if present
-        if hasattr(self, 'selection_rect') and self.selection_rect:
-            try:
-                self.selection_rect.remove()
-            except:
-                pass
-        
         # Check if selection_start or selection_end is None before comparing
         if self.selection_start is None or self.selection_end is None:
             return
         
-        # Calculate normalized coordinates for the rectangle
-        x_min = min(self.selection_start, self.selection_end)
-        x_max = max(self.selection_start, self.selection_end)
-        
-        # Ensure y coordinates are valid
-        if self.selection_ystart is None or self.selection_yend is None:
-            y_min, y_max = 0, 1  # Use full height if y-coordinates aren't available
-        else:
-            y_min = min(self.selection_ystart, self.selection_yend)
-            y_max = max(self.selection_ystart, self.selection_yend)
-        
-            ymin, ymax = self.ax.get_ylim()
-            y_range = ymax - ymin
-            
-            norm_y_min = (y_min - ymin) / y_range
-            norm_y_max = (y_max - ymin) / y_range
-            
-            # Ensure values are within [0, 1] range
-            norm_y_min = max(0, min(1, norm_y_min))
-            norm_y_max = max(0, min(1, norm_y_max))
-        
-        # Create the selection rectangle
-        self.selection_rect = self.ax.axvspan(x_min, x_max,
-                                            ymin=norm_y_min, 
-                                            ymax=norm_y_max,
-                                            alpha=0.3, color='yellow')
-                                            
-        # Update time text on graph
-        if hasattr(self, 'time_text') and self.time_text is not None:
-            try:
-                self.time_text.remove()
-            except:
-                pass
-        
-        duration = abs(x_max - x_min)
-        self.time_text = self.ax.text(
-            0.5, 0.03, 
-            f"Selection: {duration:.3f} ms", 
-            transform=self.ax.transAxes,
-            ha='center', va='bottom',
-            bbox=dict(
-                facecolor='black', 
-                alpha=0.7,
-                edgecolor='white',
-                boxstyle='round,pad=0.5'
-            ),
-            color='#00ff00',
-            fontsize=9
-        )
-        
-        
-        # We'll let update_plot handle drawing the region selection lines
-        
-        # Use draw_idle() for more efficient updates
-        self.canvas.draw_idle()
+        # Only the selection rectangle and time box are redrawn while dragging
+        self._blit_selection()
     
     def on_mouse_release(self, event):
         # Only process if we were in a selecting state
@@ -1707,45 +1813,14 @@ class KatydidAnalysisApp(QMainWindow):
             if self.selection_start is None or self.selection_end is None:
                 return
             
-
-            
             # Update final coordinates if mouse is within axes
             if event.inaxes == self.ax and event.xdata is not None:
                 self.selection_end = event.xdata
                 if event.ydata is not None:
                     self.selection_yend = event.ydata
             
-
-            
-            
-            # Draw on-graph time box if we have a valid selection
-            x_min = min(self.selection_start, self.selection_end)
-            x_max = max(self.selection_start, self.selection_end)
-            duration = abs(x_max - x_min)
-            
-            if hasattr(self, 'time_text') and self.time_text is not None:
-                try:
-                    self.time_text.remove()
-                except:
-                    pass
-            
-            self.time_text = self.ax.text(
-                0.5, 0.03, 
-                f"Selection: {duration:.3f} ms", 
-                transform=self.ax.transAxes,
-                ha='center', va='bottom',
-                bbox=dict(
-                    facecolor='black', 
-                    alpha=0.7,
-                    edgecolor='white',
-                    boxstyle='round,pad=0.5'
-                ),
-                color='#00ff00',
-                fontsize=9
-            )
-            
-            # Force complete redraw to ensure everything is visible
-            self.canvas.draw()
+            # Draw the final selection and on-graph time box
+            self._blit_selection()
         except Exception as e:
             print(f"Error in mouse release event: {e}")
     
@@ -1776,69 +1851,36 @@ class KatydidAnalysisApp(QMainWindow):
         # Find multiple peaks in the selection that are within amplitude bounds
         if len(data) > 0:
             # Filter data by amplitude bounds
-            valid_indices = []
-            for i, amplitude in enumerate(data):
-                if min_amp <= amplitude <= max_amp:
-                    valid_indices.append(i)
+            data = np.asarray(data)
+            valid = (data >= min_amp) & (data <= max_amp)
             
-            if valid_indices:
+            if valid.any():
                 # Find local peaks among valid indices
                 # Define what constitutes a local peak - approximately 1ms of samples
                 peak_width = int(0.5 * self.sample_rate / 1000)  # 0.5ms in samples
                 if peak_width < 1:
                     peak_width = 1
                 
-                # Find all local peaks
-                peaks = []
-                for idx in valid_indices:
-                    is_peak = True
-                    # Check if this is a local maximum within peak_width
-                    for offset in range(1, peak_width + 1):
-                        # Check if any sample within peak_width is higher
-                        if idx - offset >= 0 and idx - offset < len(data) and data[idx] < data[idx - offset]:
-                            is_peak = False
-                            break
-                        if idx + offset < len(data) and data[idx] < data[idx + offset]:
-                            is_peak = False
-                            break
-                
-                    if is_peak:
-                        peaks.append(idx)
-            
-                # Add all found peaks to pulses
-                added_count = 0
-                for peak_idx in peaks:
-                    global_peak_idx = start_sample + peak_idx
-                    # Check if a pulse already exists close to this location
-                    duplicate = False
-                    for pulse in self.pulses:
-                        if abs(pulse['position'] - global_peak_idx) < peak_width:
-                            duplicate = True
-                            break
-                
-                    if not duplicate:
-                        self.pulses.append({
-                            'position': global_peak_idx,
-                            'type': 'manual'
-                        })
-                        added_count += 1
-            
-                # Sort pulses
-                self.pulses.sort(key=lambda x: x['position'])
-                
-
+                # Find all local peaks (no sample within peak_width is higher)
+                peaks = local_maxima(data, peak_width, min_amp, max_amp)
+            
+                # Drop peaks that already have a pulse close by
+                global_peaks = start_sample + peaks
+                global_peaks = global_peaks[self.pulses.nearest_distance(global_peaks) >= peak_width]
+                # and peaks too close to one added just before them
+                new_positions = enforce_min_distance(global_peaks, peak_width)
+            
+                # Insert into the sorted pulse table in one go
+                edit = insert_pulses(self.pulses, new_positions, MANUAL)
+                added_count = len(edit)
+                if added_count > 0:
+                    self.history.record(edit)
                 
                 # Clear selection
                 self.selection_start = None
                 self.selection_end = None
                 self.selection_ystart = None
                 self.selection_yend = None
-                if self.selection_rect:
-                    try:
-                        self.selection_rect.remove()
-                        self.selection_rect = None
-                    except:
-                        pass
                 self.update_plot()
                 
                 if added_count > 0:
@@ -1868,26 +1910,24 @@ class KatydidAnalysisApp(QMainWindow):
 
             
         # Find pulses within the selection time range
-        pulses_in_range = []
-        for p in self.pulses:
-            if start_sample <= p['position'] <= end_sample:
-                # Check if pulse amplitude is within bounds
-                if self.smoothed_data is not None:
-                    amp = self.smoothed_data[p['position']]
-                elif self.abs_data is not None:
-                    amp = self.abs_data[p['position']]
-                else:
-                    amp = self.wav_data[p['position']]
-                
-                if min_amp <= amp <= max_amp:
-                    pulses_in_range.append(p)
+        first, last = self.pulses.range_indices(start_sample, end_sample)
+        positions_in_range = self.pulses.positions[first:last]
+        
+        # Check if pulse amplitudes are within bounds
+        if self.smoothed_data is not None:
+            amps = self.smoothed_data[positions_in_range]
+        elif self.abs_data is not None:
+            amps = self.abs_data[positions_in_range]
+        else:
+            amps = self.wav_data[positions_in_range]
         
         # Remove pulses in range
-        pulses_to_keep = [p for p in self.pulses if p not in pulses_in_range]
-        pulses_removed = len(self.pulses) - len(pulses_to_keep)
+        edit = delete_pulses(self.pulses, start_sample, end_sample,
+                             (min_amp <= amps) & (amps <= max_amp))
+        pulses_removed = len(edit)
         
         if pulses_removed > 0:
-            self.pulses = pulses_to_keep
+            self.history.record(edit)
             QMessageBox.information(self, "Pulses Deleted", f"Removed {pulses_removed} pulse(s) from selection.")
         else:
             QMessageBox.information(self, "No Pulses Found", "No pulses were found in the selected area.")
@@ -1897,12 +1937,6 @@ class KatydidAnalysisApp(QMainWindow):
         self.selection_end = None
         self.selection_ystart = None
         self.selection_yend = None
-        if self.selection_rect:
-            try:
-                self.selection_rect.remove()
-            except:
-                pass
-            self.selection_rect = None
         
         self.update_plot()
     
@@ -1971,24 +2005,95 @@ class KatydidAnalysisApp(QMainWindow):
         if not hasattr(self, 'file_path') or not self.file_path:
             return
         
+        # Keep the pulses being cleared so the inversion can be undone
+        self.history.record(InversionEdit(self.pulses, self.smoothing_passes))
+        self._invert()
+        
+        # Update the plot
+        self.update_plot()
+    
+    def _invert(self):
+        """Invert the waveform and clear everything derived from it."""
         # Invert the waveform (multiply by -1)
         self.inversion_count += 1
-        
-        # Directly invert the original waveform data
-        self.wav_data = -1 * self.wav_data
+        self._flip_sign()
         
         # Reset all processing data
-        self.abs_data = None
-        self.smoothed_data = None
+        self._clear_smoothing()
         
         # Clear all detected pulses and skips
-        self.pulses = []
+        self.pulses = PulseTable()
         self.skips = []
-        
-
-        
-        # Update the plot
+    
+    def _flip_sign(self):
+        """Flip the sign of the mapped samples (no data is copied)."""
+        self.wav_data = -self.wav_data
+        self.wav_envelope = self.wav_envelope.negated(self.wav_data)
+    
+    def _clear_smoothing(self):
+        self.abs_data = None
+        self.smoothed_data = None
+        self.abs_envelope = None
+        self.smoothed_envelope = None
+        self.smoothing_passes = 0
+    
+    def threshold_state(self):
+        """Current threshold settings as (abs, rel, using_absolute)."""
+        return (self.abs_threshold, self.rel_threshold, self.using_absolute_threshold)
+    
+    def set_threshold_state(self, state):
+        """Apply threshold settings from threshold_state()."""
+        self.abs_threshold, self.rel_threshold, self.using_absolute_threshold = state
+        self.threshold = self.abs_threshold if self.using_absolute_threshold else self.rel_threshold
+        self.threshold_mode_label.setText(f"Mode: {'Absolute' if self.using_absolute_threshold else 'Relative'}")
+    
+    def record_threshold_change(self, before):
+        """Record a threshold edit if the settings differ from before."""
+        after = self.threshold_state()
+        if after != before:
+            self.history.record(ThresholdEdit(before, after))
+    
+    def undo(self):
+        """Revert the last pulse, threshold or inversion edit."""
+        edit = self.history.undo()
+        if edit is None:
+            self.show_status_message("Nothing to undo")
+            return
+        if isinstance(edit, PulseEdit):
+            edit.undo(self.pulses)
+            message = f"Undid {'adding' if edit.inserted else 'deleting'} {len(edit)} pulse(s)"
+        elif isinstance(edit, ThresholdEdit):
+            self.set_threshold_state(edit.before)
+            message = "Undid threshold change"
+        else:
+            # Flip back and bring back what the inversion cleared
+            self.inversion_count -= 1
+            self._flip_sign()
+            self._clear_smoothing()
+            self.pulses = edit.pulses
+            for _ in range(edit.smoothing_passes):
+                self._smoothing_pass()
+            message = "Undid inversion"
         self.update_plot()
+        self.show_status_message(message)
+    
+    def redo(self):
+        """Apply the last undone edit again."""
+        edit = self.history.redo()
+        if edit is None:
+            self.show_status_message("Nothing to redo")
+            return
+        if isinstance(edit, PulseEdit):
+            edit.redo(self.pulses)
+            message = f"Redid {'adding' if edit.inserted else 'deleting'} {len(edit)} pulse(s)"
+        elif isinstance(edit, ThresholdEdit):
+            self.set_threshold_state(edit.after)
+            message = "Redid threshold change"
+        else:
+            self._invert()
+            message = "Redid inversion"
+        self.update_plot()
+        self.show_status_message(message)
         
     def keyPressEvent(self, event):
         """Handle keyboard events."""
@@ -2000,9 +2105,18 @@ class KatydidAnalysisApp(QMainWindow):
             return
             
         key = event.key()
+        control = bool(event.modifiers() & Qt.ControlModifier)
+        
+        # Undo / redo (checked first: Y alone detects pulses)
+        if control and key == Qt.Key_Z and event.modifiers() & Qt.ShiftModifier:
+            self.redo()
+        elif control and key == Qt.Key_Z:
+            self.undo()
+        elif control and key == Qt.Key_Y:
+            self.redo()
         
         # WASD navigation
-        if key == Qt.Key_W:
+        elif key == Qt.Key_W:
             # Zoom in
             self.zoom_view(0.5)
         elif key == Qt.Key_S:
@@ -2115,18 +2229,22 @@ class KatydidAnalysisApp(QMainWindow):
             self.delete_selected_pulses()
         elif key == Qt.Key_Up:
             # Increase threshold
+            before = self.threshold_state()
             if self.using_absolute_threshold:
                 self.abs_threshold = min(1.0, self.abs_threshold + 0.025)
             else:
                 self.rel_threshold = min(1.0, self.rel_threshold + 0.025)
+            self.record_threshold_change(before)
             self.update_plot()
             self.show_status_message(f"Threshold increased to {self.abs_threshold if self.using_absolute_threshold else self.rel_threshold:.3f}")
         elif key == Qt.Key_Down:
             # Decrease threshold
+            before = self.threshold_state()
             if self.using_absolute_threshold:
                 self.abs_threshold = max(0.0, self.abs_threshold - 0.025)
             else:
                 self.rel_threshold = max(0.0, self.rel_threshold - 0.025)
+            self.record_threshold_change(before)
             self.update_plot()
             self.show_status_message(f"Threshold decreased to {self.abs_threshold if self.using_absolute_threshold else self.rel_threshold:.3f}")
         elif key == Qt.Key_Equal:
@@ -2134,16 +2252,20 @@ class KatydidAnalysisApp(QMainWindow):
             self.save_results_with_wav()
         elif key == Qt.Key_BracketLeft:
             # Switch to relative threshold mode
+            before = self.threshold_state()
             self.using_absolute_threshold = False
             self.threshold_mode_label.setText("Mode: Relative")
             self.threshold = self.rel_threshold
+            self.record_threshold_change(before)
             self.update_plot()
             self.show_status_message("Switched to relative threshold mode")
         elif key == Qt.Key_BracketRight:
             # Switch to absolute threshold mode
+            before = self.threshold_state()
             self.using_absolute_threshold = True
             self.threshold_mode_label.setText("Mode: Absolute")
             self.threshold = self.abs_threshold
+            self.record_threshold_change(before)
             self.update_plot()
             self.show_status_message("Switched to absolute threshold mode")
         elif key == Qt.Key_F11:
@@ -2160,57 +2282,60 @@ class KatydidAnalysisApp(QMainWindow):
         """Apply smoothing to the waveform data."""
         if not hasattr(self, 'file_path') or not self.file_path:
             return
-            
-        # Create a copy of the current waveform data for smoothing
+        
+        self._smoothing_pass()
+        
+        # Don't reset pulses when smoothing multiple times
+        self.update_plot()
+
+    def _smoothing_pass(self):
+        """Smooth the waveform (or the smoothed signal) once more."""
+        # The first pass smooths the current waveform directly (no copy is made)
         if self.abs_data is None:
-            # If no processed data exists, create it from the current waveform
-            self.abs_data = self.wav_data.copy()
+            self.abs_data = self.wav_data
+            # Same samples as the waveform, so the envelope can be shared
+            self.abs_envelope = self.wav_envelope
         
         # Calculate window size (much smaller - 0.25ms window, 1/20 of original)
-        # Adjust this value based on your system's memory capacity
         window_size = int(self.sample_rate * 0.00025)  # 0.25ms instead of 5ms
         if window_size % 2 == 0:
             window_size += 1  # Make sure window size is odd
         window_size = max(3, window_size)  # Ensure minimum size of 3
         
-        # If smoothed_data already exists, smooth it further
-        # Otherwise, start with abs_data
-        source_data = self.smoothed_data if self.smoothed_data is not None else self.abs_data
-        
-        # Create window and apply convolution
-        window = np.ones(window_size) / window_size
-        self.smoothed_data = np.zeros_like(source_data)
-        
-        # Process in segments to avoid memory issues
-        segment_size = min(len(source_data), 1000000)  # Process 1M samples at a time
-        for i in range(0, len(source_data), segment_size):
-            end = min(i + segment_size, len(source_data))
-            self.smoothed_data[i:end] = np.convolve(
-                source_data[i:end],
-                window,
-                mode='same'
-            )
+        self.smoothing_passes += 1
+        # Smoothed signals are cached per inversion sign, window and number of passes
+        key = ('smoothed', self.wav_digest, self.wav_data.gain, window_size, self.smoothing_passes)
+        source = self.smoothed_data if self.smoothed_data is not None else self.abs_data
+        
+        smoothed = None
+        if self.cache is not None:
+            smoothed = self.cache.load(self.cache.key(*key))
+            if smoothed is None:
+                # Smooth straight into a new cache entry
+                dtype = np.result_type(source.dtype, np.float32)
+                smoothed = self.cache.build(self.cache.key(*key), (len(source),), dtype,
+                                            lambda out: moving_average(source, window_size, out=out))
+        
+        if smoothed is not None:
+            self.smoothed_data = smoothed
+        elif self.smoothed_data is not None and self.smoothed_data.flags.writeable:
+            # If smoothed_data already exists, smooth it further in place
+            moving_average(self.smoothed_data, window_size, out=self.smoothed_data)
+        else:
+            # Otherwise, start with abs_data (or a read-only cached signal)
+            self.smoothed_data = moving_average(source, window_size)
         
-        # Don't reset pulses when smoothing multiple times
-        self.update_plot()
+        # Rebuild the envelope for the newly smoothed signal
+        self.smoothed_envelope = EnvelopePyramid.cached(self.cache, key, self.smoothed_data)
 
     def detect_pulses(self):
         """Detect pulses in the entire waveform."""
-        # Initialize pulse detection
-        new_pulses = []
-        
         # Determine which data to use for pulse detection - ALWAYS use raw data
-        detection_data = self.wav_data.copy()  # Use a copy to avoid modifying original data
+        detection_data = self.wav_data
             
-        # Get current threshold - ensure we're using the correct threshold mode
-        if self.using_absolute_threshold:
-            threshold = self.abs_threshold
-        else:
-            # For relative threshold, calculate based on max value in entire waveform
-            if len(detection_data) > 0:
-                threshold = self.rel_threshold * np.max(detection_data)
-            else:
-                threshold = self.rel_threshold
+        # Get current threshold - relative threshold is based on max value in entire waveform
+        threshold = resolve_threshold(detection_data, self.abs_threshold, self.rel_threshold,
+                                      self.using_absolute_threshold)
                 
         # Determine if we're looking for negative or positive peaks based on threshold sign
         looking_for_negative_peaks = threshold < 0
@@ -2238,84 +2363,16 @@ class KatydidAnalysisApp(QMainWindow):
             start_idx = region_start_sample
             end_idx = region_end_sample
         
-        # Find peaks based on threshold sign
-        peaks = []
-        current_peak = None
-        in_peak = False
-        
-        # First pass: find peaks based on threshold sign
-        for i in range(start_idx, end_idx):
-            if looking_for_negative_peaks:
-                # Looking for NEGATIVE peaks below threshold (threshold is negative)
-                if detection_data[i] < 0 and detection_data[i] < threshold:
-                    # We're in a potential peak region
-                    in_peak = True
-                    
-                    # If this is the first point below threshold or lower than current peak
-                    if current_peak is None or detection_data[i] < detection_data[current_peak]:
-                        current_peak = i
-                else:
-                    # We're above threshold or positive
-                    if in_peak and current_peak is not None:
-                        # We just left a peak region, add the peak we found
-                        # Triple check that the peak is negative and below threshold
-                        if detection_data[current_peak] < 0 and detection_data[current_peak] < threshold:
-                            peaks.append(current_peak)
-                            print(f"Found NEGATIVE peak at {current_peak} with value {detection_data[current_peak]} < threshold {threshold}")
-                        current_peak = None
-                    in_peak = False
-            else:
-                # Looking for POSITIVE peaks above threshold (threshold is positive)
-                if detection_data[i] > 0 and detection_data[i] > threshold:
-                    # We're in a potential peak region
-                    in_peak = True
-                    
-                    # If this is the first point above threshold or higher than current peak
-                    if current_peak is None or detection_data[i] > detection_data[current_peak]:
-                        current_peak = i
-                else:
-                    # We're below threshold or negative
-                    if in_peak and current_peak is not None:
-                        # We just left a peak region, add the peak we found
-                        # Triple check that the peak is positive and above threshold
-                        if detection_data[current_peak] > 0 and detection_data[current_peak] > threshold:
-                            peaks.append(current_peak)
-                            print(f"Found POSITIVE peak at {current_peak} with value {detection_data[current_peak]} > threshold {threshold}")
-                        current_peak = None
-                    in_peak = False
-        
-        # Add last peak if we ended while still in a peak
-        if in_peak and current_peak is not None:
-            if looking_for_negative_peaks:
-                # Triple check that the peak is negative and below threshold
-                if detection_data[current_peak] < 0 and detection_data[current_peak] < threshold:
-                    peaks.append(current_peak)
-            else:
-                # Triple check that the peak is positive and above threshold
-                if detection_data[current_peak] > 0 and detection_data[current_peak] > threshold:
-                    peaks.append(current_peak)
-        
-        # Second pass: filter out close peaks
-        min_distance = int(self.sample_rate * 0.001)  # Minimum 1ms apart
-        filtered_peaks = []
-        
-        for peak in peaks:
-            # Check if this peak is too close to the previous one
-            if not filtered_peaks or (peak - filtered_peaks[-1]) >= min_distance:
-                filtered_peaks.append(peak)
+        # Find one peak per threshold-crossing run, at least 1ms apart
+        min_distance = int(self.sample_rate * 0.001)
+        filtered_peaks = detect_peaks(detection_data, threshold, min_distance, start_idx, end_idx)
+        print(f"Found {len(filtered_peaks)} {'NEGATIVE' if looking_for_negative_peaks else 'POSITIVE'} peaks")
         
         # Add the new pulses
-        for peak in filtered_peaks:
-            new_pulses.append({
-                'position': peak,
-                'type': 'detected',
-                'peak_type': 'negative' if looking_for_negative_peaks else 'positive'
-            })
-        
-
-        
-        # Update pulses
-        self.pulses.extend(new_pulses)
+        edit = insert_pulses(self.pulses, filtered_peaks, DETECTED,
+                             PEAK_NEGATIVE if looking_for_negative_peaks else PEAK_POSITIVE)
+        if len(edit) > 0:
+            self.history.record(edit)
         self.update_plot()
     
     def analyze_pulse_periods(self):
@@ -2330,53 +2387,16 @@ class KatydidAnalysisApp(QMainWindow):
             QMessageBox.warning(self, "Period Analysis", "Not enough pulses detected. Please detect pulses first.")
             return
             
-        # Sort pulses by position to ensure proper ordering
-        sorted_pulses = sorted(self.pulses, key=lambda p: p['position'])
-        
         # Calculate periods - each period contains 3 pulses (1-3, 2-4, etc.)
-        periods = []
-        individual_pulses = []
-        
-        # First, process all individual pulses
-        for i, pulse in enumerate(sorted_pulses):
-            # Get amplitude values for the pulse
-            pulse_amp = self.wav_data[pulse['position']] if pulse['position'] < len(self.wav_data) else 0
-            
-            # Calculate time in milliseconds for the pulse
-            pulse_time = pulse['position'] / self.sample_rate * 1000  # ms
-            
-            individual_pulses.append({
-                'index': i+1,
-                'time': pulse_time,
-                'amplitude': pulse_amp,
-                'position': pulse['position']
-            })
-        
-        # Then, calculate periods using groups of 3 pulses
-        for i in range(len(sorted_pulses) - 2):  # Need at least 3 pulses for a period
-            pulse1 = sorted_pulses[i]
-            pulse2 = sorted_pulses[i+1]
-            pulse3 = sorted_pulses[i+2]
-            
-            # Calculate period duration and pulse ratio
-            period_duration = (pulse3['position'] - pulse1['position']) / self.sample_rate * 1000  # ms
-            pulse_interval = (pulse2['position'] - pulse1['position']) / self.sample_rate * 1000  # ms
-            pulse_ratio = pulse_interval / period_duration if period_duration > 0 else 0
-            
-            periods.append({
-                'index': i+1,
-                'duration': period_duration,
-                'ratio': pulse_ratio
-            })
+        analysis = compute_periods(self.pulses.positions, self.wav_data, self.sample_rate)
             
         # Store the periods and pulses for later saving
-        self.current_periods = periods
-        self.current_pulses = individual_pulses
+        self.period_analysis = analysis
             
         # Create and show the analysis window
-        self._show_period_analysis(periods, individual_pulses)
+        self._show_period_analysis(analysis)
     
-    def _show_period_analysis(self, periods, individual_pulses):
+    def _show_period_analysis(self, analysis):
         """Display the period analysis in a new window with table and histograms"""
         # Create the dialog window
         analysis_window = QDialog(self)
@@ -2393,58 +2413,28 @@ class KatydidAnalysisApp(QMainWindow):
         table_tab = QWidget()
         table_layout = QVBoxLayout(table_tab)
         
-        # Create and populate the table
-        table = QTableWidget()
-        table.setColumnCount(5)
-        table.setHorizontalHeaderLabels(["Period", "Duration (ms)", "Pulse Ratio", "Amplitude", "Time (ms)"])
-        
-        # Calculate statistics for highlighting outliers
-        durations = [p['duration'] for p in periods]
+        durations = analysis.durations
+        ratios = analysis.ratios
         
-        # Calculate mode of durations for highlighting outliers
-        if durations:
-            hist, bin_edges = np.histogram(durations, bins=30)
-            mode_bin_index = np.argmax(hist)
-            mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-            mode_duration = (mode_range[0] + mode_range[1]) / 2
+        # Bin the durations once; the mode is used for outliers, the histogram and the statistics
+        if len(durations) > 0:
+            duration_histogram = histogram_mode(durations)
+            mode_duration = duration_histogram[3]
         else:
+            duration_histogram = None
             mode_duration = 0
         
-        std_duration = np.std(durations) if durations else 0
-        
-        # Add data to the table - we'll have more rows than periods since each pulse gets its own row
-        total_rows = len(individual_pulses)
-        table.setRowCount(total_rows)
-        
-        # Populate the table with individual pulse data
-        for row, pulse in enumerate(individual_pulses):
-            # Find if this pulse is part of a period
-            period_index = ""
-            duration = ""
-            ratio = ""
-            
-            # Check if this pulse is the first pulse in any period
-            for p in periods:
-                if p['index'] == pulse['index']:
-                    period_index = str(p['index'])
-                    duration = f"{p['duration']:.2f}"
-                    ratio = f"{p['ratio']:.4f}"
-                    break
-            
-            # Set the data
-            table.setItem(row, 0, QTableWidgetItem(period_index))
-            table.setItem(row, 1, QTableWidgetItem(duration))
-            table.setItem(row, 2, QTableWidgetItem(ratio))
-            table.setItem(row, 3, QTableWidgetItem(f"{pulse['amplitude']:.4f}"))
-            table.setItem(row, 4, QTableWidgetItem(f"{pulse['time']:.2f}"))
-            
-            # Highlight outliers (more than 2 standard deviations from MODE) if this is a period
-            if period_index and duration:
-                deviation = float(duration) - mode_duration
-                if abs(deviation) > 2 * std_duration and std_duration > 0:
-                    for col in range(5):
-                        item = table.item(row, col)
-                        item.setBackground(QColor(255, 200, 200))  # Light red background
+        std_duration = np.std(durations) if len(durations) > 0 else 0
+        
+        # Outliers: periods more than 2 standard deviations from the MODE
+        outliers = (np.abs(durations - mode_duration) > 2 * std_duration) & (std_duration > 0)
+        
+        # Table view over the analysis arrays - one row per pulse, only visible rows are rendered
+        table = QTableView()
+        table.setModel(PeriodAnalysisModel(analysis, outliers, table))
+        
+        # Fixed row heights so the view never measures every row
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         
         # Auto-adjust column widths
         table.resizeColumnsToContents()
@@ -2460,31 +2450,9 @@ class KatydidAnalysisApp(QMainWindow):
         duration_canvas = FigureCanvas(duration_figure)
         duration_ax = duration_figure.add_subplot(111)
         
-        # Extract duration data
-        durations = [p['duration'] for p in periods]
-        
-        # Calculate mode of durations
-        if durations:
-            # Create bins for histogram
-            hist, bin_edges = np.histogram(durations, bins=30)
-            # Find the bin with the highest count
-            mode_bin_index = np.argmax(hist)
-            # Get the mode range
-            mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-            mode_value = (mode_range[0] + mode_range[1]) / 2
-            
-            # Plot histogram of durations
-            n, bins, patches = duration_ax.hist(durations, bins=30, alpha=0.7, color='green')
-            
-            # Highlight the mode bin
-            for i, patch in enumerate(patches):
-                if i == mode_bin_index:
-                    patch.set_facecolor('red')  # Highlight the mode bin
-            
-            # Add a vertical line at the mode
-            duration_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-            duration_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.2f} ms', 
-                         color='red', fontweight='bold', ha='right')
+        # Plot the durations from the counts computed above
+        if duration_histogram is not None:
+            draw_histogram(duration_ax, *duration_histogram, 'green', 'Mode: {:.2f} ms')
         else:
             duration_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=duration_ax.transAxes)
         
@@ -2507,31 +2475,12 @@ class KatydidAnalysisApp(QMainWindow):
         ratio_canvas = FigureCanvas(ratio_figure)
         ratio_ax = ratio_figure.add_subplot(111)
         
-        # Extract ratio data
-        ratios = [p['ratio'] for p in periods]
-        
-        # Calculate mode of ratios
-        if ratios:
-            # Create bins for histogram
-            hist, bin_edges = np.histogram(ratios, bins=30)
-            # Find the bin with the highest count
-            mode_bin_index = np.argmax(hist)
-            # Get the mode range
-            mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-            mode_value = (mode_range[0] + mode_range[1]) / 2
-            
-            # Plot histogram of ratios
-            n, bins, patches = ratio_ax.hist(ratios, bins=30, alpha=0.7, color='blue')
-            
-            # Highlight the mode bin
-            for i, patch in enumerate(patches):
-                if i == mode_bin_index:
-                    patch.set_facecolor('red')  # Highlight the mode bin
-            
-            # Add a vertical line at the mode
-            ratio_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-            ratio_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.4f}', 
-                       color='red', fontweight='bold', ha='right')
+        # Bin the ratios once and draw the counts
+        ratio_mode = 0
+        if len(ratios) > 0:
+            ratio_histogram = histogram_mode(ratios)
+            ratio_mode = ratio_histogram[3]
+            draw_histogram(ratio_ax, *ratio_histogram, 'blue', 'Mode: {:.4f}')
         else:
             ratio_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ratio_ax.transAxes)
         
@@ -2553,17 +2502,13 @@ class KatydidAnalysisApp(QMainWindow):
         # Create a text browser for statistics
         stats_text = QTextBrowser()
         
-        # Calculate statistics
-        durations = [p['duration'] for p in periods]
-        ratios = [p['ratio'] for p in periods]
-        
         # Format statistics text
         stats_html = "<h2>Period Statistics</h2>"
         stats_html += "<h3>Duration Statistics (ms)</h3>"
         stats_html += f"<p>Count: {len(durations)}</p>"
         stats_html += f"<p>Mean: {np.mean(durations):.2f}</p>"
         stats_html += f"<p>Median: {np.median(durations):.2f}</p>"
-        stats_html += f"<p>Mode: {mode_value if 'mode_value' in locals() else 0:.2f}</p>"
+        stats_html += f"<p>Mode: {mode_duration:.2f}</p>"
         stats_html += f"<p>Std Dev: {np.std(durations):.2f}</p>"
         stats_html += f"<p>Min: {np.min(durations):.2f}</p>"
         stats_html += f"<p>Max: {np.max(durations):.2f}</p>"
@@ -2571,7 +2516,7 @@ class KatydidAnalysisApp(QMainWindow):
         stats_html += "<h3>Pulse Ratio Statistics</h3>"
         stats_html += f"<p>Mean: {np.mean(ratios):.4f}</p>"
         stats_html += f"<p>Median: {np.median(ratios):.4f}</p>"
-        stats_html += f"<p>Mode: {mode_value if 'mode_value' in locals() else 0:.4f}</p>"
+        stats_html += f"<p>Mode: {ratio_mode:.4f}</p>"
         stats_html += f"<p>Std Dev: {np.std(ratios):.4f}</p>"
         stats_html += f"<p>Min: {np.min(ratios):.4f}</p>"
         stats_html += f"<p>Max: {np.max(ratios):.4f}</p>"
@@ -2600,7 +2545,7 @@ class KatydidAnalysisApp(QMainWindow):
     def save_results_with_wav(self):
         """Save analysis results to a folder with user-specified name, including WAV file."""
         # Check if we have pulses to save
-        if not hasattr(self, 'current_pulses') or not self.current_pulses:
+        if getattr(self, 'period_analysis', None) is None:
             QMessageBox.warning(self, "No Data to Save", "Please analyze pulse periods first (press T) before saving.")
             return
             
@@ -2629,157 +2574,26 @@ class KatydidAnalysisApp(QMainWindow):
             
             # 1. Save the table as CSV with the requested format (5 columns)
             csv_file = os.path.join(folder_path, f"{folder_name}_table.csv")
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Period', 'Duration (ms)', 'Pulse Ratio', 'Amplitude', 'Time (ms)'])
-                
-                # Write all individual pulse data
-                for pulse in self.current_pulses:
-                    # Find if this pulse is part of a period
-                    period_index = ""
-                    duration = ""
-                    ratio = ""
-                    
-                    # Check if this pulse is the first pulse in any period
-                    for p in self.current_periods:
-                        if p['index'] == pulse['index']:
-                            period_index = str(p['index'])
-                            duration = f"{p['duration']:.2f}"
-                            ratio = f"{p['ratio']:.4f}"
-                            break
-                    
-                    # Write the row
-                    writer.writerow([
-                        period_index,
-                        duration,
-                        ratio,
-                        f"{pulse['amplitude']:.4f}",
-                        f"{pulse['time']:.2f}"
-                    ])
+            write_table_csv(csv_file, self.period_analysis)
             
-            # 2. Save the period duration histogram
+            # 2. Save the period duration and ratio histograms
+            durations = self.period_analysis.durations
+            ratios = self.period_analysis.ratios
             period_hist_file = os.path.join(folder_path, f"{folder_name}_period_histogram.png")
-            
-            # Create figure for period histogram
-            period_fig = Figure(figsize=(8, 6))
-            period_canvas = FigureCanvas(period_fig)
-            period_ax = period_fig.add_subplot(111)
-            
-            # Extract duration data
-            durations = [p['duration'] for p in self.current_periods]
-            
-            # Calculate mode of durations
-            if durations:
-                # Create bins for histogram
-                hist, bin_edges = np.histogram(durations, bins=30)
-                # Find the bin with the highest count
-                mode_bin_index = np.argmax(hist)
-                # Get the mode range
-                mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-                mode_value = (mode_range[0] + mode_range[1]) / 2
-                
-                # Plot histogram of durations
-                n, bins, patches = period_ax.hist(durations, bins=30, alpha=0.7, color='green')
-                
-                # Highlight the mode bin
-                for i, patch in enumerate(patches):
-                    if i == mode_bin_index:
-                        patch.set_facecolor('red')  # Highlight the mode bin
-            
-                # Add a vertical line at the mode
-                period_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-                period_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.2f} ms', 
-                            color='red', fontweight='bold', ha='right')
-            else:
-                period_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=period_ax.transAxes)
-            
-            period_ax.set_xlabel('Period Duration (ms)')
-            period_ax.set_ylabel('Frequency')
-            period_ax.set_title('Distribution of Period Durations (Mode Highlighted)')
-            period_ax.grid(True)
-            period_ax.legend(loc='upper right')
-            period_fig.tight_layout()
-            period_fig.savefig(period_hist_file)
-            
-            # 3. Save the ratio histogram
+            duration_mode = save_period_histogram(period_hist_file, durations)
             ratio_hist_file = os.path.join(folder_path, f"{folder_name}_ratio_histogram.png")
-            ratio_fig = Figure(figsize=(8, 6))
-            ratio_canvas = FigureCanvas(ratio_fig)
-            ratio_ax = ratio_fig.add_subplot(111)
-            
-            # Extract ratio data
-            ratios = [p['ratio'] for p in self.current_periods]
-            
-            # Calculate mode of ratios
-            if ratios:
-                # Create bins for histogram
-                hist, bin_edges = np.histogram(ratios, bins=30)
-                # Find the bin with the highest count
-                mode_bin_index = np.argmax(hist)
-                # Get the mode range
-                mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-                mode_value = (mode_range[0] + mode_range[1]) / 2
-                
-                # Plot histogram of ratios
-                n, bins, patches = ratio_ax.hist(ratios, bins=30, alpha=0.7, color='blue')
-                
-                # Highlight the mode bin
-                for i, patch in enumerate(patches):
-                    if i == mode_bin_index:
-                        patch.set_facecolor('red')  # Highlight the mode bin
-            
-                # Add a vertical line at the mode
-                ratio_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-                ratio_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.4f}', 
-                           color='red', fontweight='bold', ha='right')
-            else:
-                ratio_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ratio_ax.transAxes)
-            
-            ratio_ax.set_xlabel('Pulse Ratio (time between pulses 1-2 / period duration)')
-            ratio_ax.set_ylabel('Frequency')
-            ratio_ax.set_title('Distribution of Pulse Ratios (Mode Highlighted)')
-            ratio_ax.grid(True)
-            ratio_ax.legend(loc='upper right')
-            ratio_fig.tight_layout()
-            ratio_fig.savefig(ratio_hist_file)
+            ratio_mode = save_ratio_histogram(ratio_hist_file, ratios)
             
-            # 4. Save statistics as text file
+            # 3. Save statistics as text file
             stats_file = os.path.join(folder_path, f"{folder_name}_statistics.txt")
-            with open(stats_file, 'w') as f:
-                f.write(f"File: {self.file_path if hasattr(self, 'file_path') else 'Unknown'}\n")
-                f.write(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"Number of Pulses: {len(self.pulses) if hasattr(self, 'pulses') else 0}\n")
-                f.write(f"Number of Periods: {len(self.current_periods)}\n\n")
-                
-                # Period statistics
-                f.write(f"Period Statistics (ms):\n")
-                f.write(f"  Mean: {np.mean(durations):.2f}\n")
-                f.write(f"  Median: {np.median(durations):.2f}\n")
-                f.write(f"  Mode: {mode_value if 'mode_value' in locals() else 0:.2f}\n")
-                f.write(f"  Std Dev: {np.std(durations):.2f}\n")
-                f.write(f"  Min: {np.min(durations):.2f}\n")
-                f.write(f"  Max: {np.max(durations):.2f}\n\n")
-                
-                # Ratio statistics
-                f.write(f"Pulse Ratio Statistics:\n")
-                f.write(f"  Mean: {np.mean(ratios):.4f}\n")
-                f.write(f"  Median: {np.median(ratios):.4f}\n")
-                f.write(f"  Mode: {mode_value if 'mode_value' in locals() else 0:.4f}\n")
-                f.write(f"  Std Dev: {np.std(ratios):.4f}\n")
-                f.write(f"  Min: {np.min(ratios):.4f}\n")
-                f.write(f"  Max: {np.max(ratios):.4f}\n\n")
-                
-                # Processing information
-                threshold_type = "Absolute" if hasattr(self, 'using_absolute_threshold') and self.using_absolute_threshold else "Relative"
-                threshold_value = self.abs_threshold if hasattr(self, 'abs_threshold') and hasattr(self, 'using_absolute_threshold') and self.using_absolute_threshold else self.rel_threshold if hasattr(self, 'rel_threshold') else 0
-                f.write(f"Processing Information:\n")
-                f.write(f"  Inversion Count: {self.inversion_count if hasattr(self, 'inversion_count') else 0}\n")
-                f.write(f"  Threshold Type: {threshold_type}\n")
-                f.write(f"  Threshold Value: {threshold_value:.3f}\n")
-                f.write(f"  Sample Rate: {self.sample_rate} Hz\n")
-                f.write(f"  Total Duration: {self.total_frames / self.sample_rate:.2f} seconds\n")
-            
-            # 5. Save the processed WAV file (post-analysis)
+            threshold_value = self.abs_threshold if self.using_absolute_threshold else self.rel_threshold
+            write_statistics(stats_file, self.file_path if hasattr(self, 'file_path') else 'Unknown',
+                             len(self.pulses), durations, ratios, duration_mode, ratio_mode,
+                             self.inversion_count if hasattr(self, 'inversion_count') else 0,
+                             self.using_absolute_threshold, threshold_value,
+                             self.sample_rate, self.total_frames)
+            
+            # 4. Save the processed WAV file (post-analysis)
             # Use a new filename so original WAV isn't overwritten
             wav_file = os.path.join(folder_path, f"{folder_name}_processed.wav")
 
@@ -2787,20 +2601,8 @@ class KatydidAnalysisApp(QMainWindow):
             if not hasattr(self, 'wav_data') or self.wav_data is None or self.wav_data.size == 0:
                 raise ValueError("Processed WAV data is missing or empty!")
 
-            # Convert to int16 format if needed (match original WAV scaling)
-            if self.wav_data.dtype != np.int16:
-                # Clip data to [-1.0, 1.0] just in case it went out of range during processing
-                wav_data_clipped = np.clip(self.wav_data, -1.0, 1.0)
-                wav_data_int16 = (wav_data_clipped * 32768.0).astype(np.int16)
-            else:
-                wav_data_int16 = self.wav_data
-
-            # Optional: print debug info
             print(f"Saving processed WAV to: {wav_file}")
-            print(f"Data shape: {wav_data_int16.shape}, dtype: {wav_data_int16.dtype}, min/max: {wav_data_int16.min()}/{wav_data_int16.max()}")
-
-            # Write WAV file
-            wavfile.write(wav_file, self.sample_rate, wav_data_int16)
+            write_processed_wav(wav_file, self.sample_rate, self.wav_data)
             
             QMessageBox.information(self, "Save Successful", 
                                   f"Results saved to folder:\n{folder_path}\n\nFiles created:\n"
@@ -2841,21 +2643,25 @@ class KatydidAnalysisApp(QMainWindow):
         
         if reply == QMessageBox.Yes:
             # Restore original data
-            self.wav_data = self.original_wav_data.copy()
+            self.wav_data = self.original_wav_data
+            self.wav_envelope = self.original_envelope
             
             # Reset all processing variables
             self.abs_data = None
             self.smoothed_data = None
-            self.pulses = []
+            self.abs_envelope = None
+            self.smoothed_envelope = None
+            self.pulses = PulseTable()
             self.skips = []
+            self.inversion_count = 0
+            self.smoothing_passes = 0
             
             # Reset view to initial state
             self.view_start = 0
             self.view_range = min(self.sample_rate * 2, self.total_frames)  # View first 2 seconds
             
-            # Clear command history
-            self.command_history = []
-            self.command_index = 0
+            # Clear the undo/redo history
+            self.history.clear()
             
             # Update the plot
             self.update_plot()
@@ -2890,6 +2696,7 @@ class KatydidAnalysisApp(QMainWindow):
             <li><b>T:</b> Analyze pulse periods</li>
             <li><b>O:</b> Add manual pulse at selection</li>
             <li><b>P:</b> Delete pulses in selection</li>
+            <li><b>Ctrl+Z / Ctrl+Y:</b> Undo / redo pulse, threshold and inversion edits</li>
         </ul>
         
         <h3>Selection Controls:</h3>
@@ -3132,7 +2939,7 @@ class KatydidAnalysisApp(QMainWindow):
     def save_results(self):
         """Save analysis results to a folder with user-specified name."""
         # Check if we have periods to save
-        if not hasattr(self, 'current_periods') or not self.current_periods:
+        if getattr(self, 'period_analysis', None) is None:
             QMessageBox.warning(self, "No Data to Save", "Please analyze pulse periods first (press T) before saving.")
             return
             
@@ -3159,8 +2966,7 @@ class KatydidAnalysisApp(QMainWindow):
             # Create timestamp for unique filenames if needed
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            # Sort pulses by position to ensure proper ordering
-            sorted_pulses = sorted(self.pulses, key=lambda p: p['position'])
+            analysis = self.period_analysis
             
             # 1. Save the table as CSV with amplitude information
             csv_file = os.path.join(folder_path, f"{folder_name}_table.csv")
@@ -3168,117 +2974,23 @@ class KatydidAnalysisApp(QMainWindow):
                 writer = csv.writer(f)
                 writer.writerow(['Period', 'Duration (ms)', 'Pulse Ratio', 'Pulse1 Time (ms)', 'Pulse1 Amplitude', 'Pulse2 Time (ms)', 'Pulse2 Amplitude'])
                 
-                for period in self.current_periods:
-                    # Get the pulses for this period
-                    period_idx = period['index'] - 1  # Convert to 0-based index
-                    
-                    # Get pulse times and amplitudes from sorted pulses (pulses have 'position', compute time/amplitude)
-                    def get_pulse_time_amp(p):
-                        pos = p['position']
-                        t = pos / self.sample_rate * 1000 if hasattr(self, 'sample_rate') else 0
-                        a = self.wav_data[pos] if hasattr(self, 'wav_data') and self.wav_data is not None and pos < len(self.wav_data) else 0
-                        return t, a
-                    
-                    if period_idx + 2 < len(sorted_pulses):
-                        pulse1 = sorted_pulses[period_idx]
-                        pulse2 = sorted_pulses[period_idx + 1]
-                        t1, a1 = get_pulse_time_amp(pulse1)
-                        t2, a2 = get_pulse_time_amp(pulse2)
-                    else:
-                        t1 = a1 = t2 = a2 = 0
-                    
-                    writer.writerow([period['index'], 
-                                    period['duration'] if 'duration' in period else 0,
-                                    period['ratio'] if 'ratio' in period else 0,
-                                    t1, a1, t2, a2])
+                # Each period's first two pulses are pulse rows i and i+1
+                pulse_times = analysis.times
+                pulse_amps = analysis.amplitudes
+                for i, (duration, ratio) in enumerate(zip(analysis.durations.tolist(), analysis.ratios.tolist())):
+                    writer.writerow([i + 1, duration, ratio,
+                                    pulse_times[i].item(), pulse_amps[i],
+                                    pulse_times[i + 1].item(), pulse_amps[i + 1]])
             
             # 2. Save the period duration histogram
+            durations = self.period_analysis.durations
             period_hist_file = os.path.join(folder_path, f"{folder_name}_period_histogram.png")
-            
-            # Create figure for period histogram
-            period_fig = Figure(figsize=(8, 6))
-            period_canvas = FigureCanvas(period_fig)
-            period_ax = period_fig.add_subplot(111)
-            
-            # Extract duration data
-            durations = [p['duration'] for p in self.current_periods]
-            
-            # Calculate mode of durations
-            if durations:
-                # Create bins for histogram
-                hist, bin_edges = np.histogram(durations, bins=30)
-                # Find the bin with the highest count
-                mode_bin_index = np.argmax(hist)
-                # Get the mode range
-                mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-                mode_value = (mode_range[0] + mode_range[1]) / 2
-                
-                # Plot histogram of durations
-                n, bins, patches = period_ax.hist(durations, bins=30, alpha=0.7, color='green')
-                
-                # Highlight the mode bin
-                for i, patch in enumerate(patches):
-                    if i == mode_bin_index:
-                        patch.set_facecolor('red')  # Highlight the mode bin
-            
-                # Add a vertical line at the mode
-                period_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-                period_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.2f} ms', 
-                            color='red', fontweight='bold', ha='right')
-            else:
-                period_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=period_ax.transAxes)
-            
-            period_ax.set_xlabel('Period Duration (ms)')
-            period_ax.set_ylabel('Frequency')
-            period_ax.set_title('Distribution of Period Durations (Mode Highlighted)')
-            period_ax.grid(True)
-            period_ax.legend()
-            period_ax.legend(loc='upper right')  # Specify a fixed location for the legend
-            period_fig.tight_layout()
-            period_fig.savefig(period_hist_file)
+            duration_mode = save_period_histogram(period_hist_file, durations)
             
             # 3. Save the ratio histogram
+            ratios = self.period_analysis.ratios
             ratio_hist_file = os.path.join(folder_path, f"{folder_name}_ratio_histogram.png")
-            ratio_fig = Figure(figsize=(8, 6))
-            ratio_canvas = FigureCanvas(ratio_fig)
-            ratio_ax = ratio_fig.add_subplot(111)
-            
-            # Extract ratio data
-            ratios = [p['ratio'] for p in self.current_periods]
-            
-            # Calculate mode of ratios
-            if ratios:
-                # Create bins for histogram
-                hist, bin_edges = np.histogram(ratios, bins=30)
-                # Find the bin with the highest count
-                mode_bin_index = np.argmax(hist)
-                # Get the mode range
-                mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-                mode_value = (mode_range[0] + mode_range[1]) / 2
-                
-                # Plot histogram of ratios
-                n, bins, patches = ratio_ax.hist(ratios, bins=30, alpha=0.7, color='blue')
-                
-                # Highlight the mode bin
-                for i, patch in enumerate(patches):
-                    if i == mode_bin_index:
-                        patch.set_facecolor('red')  # Highlight the mode bin
-            
-                # Add a vertical line at the mode
-                ratio_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-                ratio_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.4f}', 
-                           color='red', fontweight='bold', ha='right')
-            else:
-                ratio_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ratio_ax.transAxes)
-            
-            ratio_ax.set_xlabel('Pulse Ratio (time between pulses 1-2 / period duration)')
-            ratio_ax.set_ylabel('Frequency')
-            ratio_ax.set_title('Distribution of Pulse Ratios (Mode Highlighted)')
-            ratio_ax.grid(True)
-            ratio_ax.legend()
-            ratio_ax.legend(loc='upper right')  # Specify a fixed location for the legend
-            ratio_fig.tight_layout()
-            ratio_fig.savefig(ratio_hist_file)
+            ratio_mode = save_ratio_histogram(ratio_hist_file, ratios)
             
             # 4. Save statistics as text file
             stats_file = os.path.join(folder_path, f"{folder_name}_statistics.txt")
@@ -3286,13 +2998,13 @@ class KatydidAnalysisApp(QMainWindow):
                 f.write(f"File: {self.file_path if hasattr(self, 'file_path') else 'Unknown'}\n")
                 f.write(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                 f.write(f"Number of Pulses: {len(self.pulses) if hasattr(self, 'pulses') else 0}\n")
-                f.write(f"Number of Periods: {len(self.current_periods)}\n\n")
+                f.write(f"Number of Periods: {self.period_analysis.num_periods}\n\n")
                 
                 # Period statistics
                 f.write(f"Period Statistics (ms):\n")
                 f.write(f"  Mean: {np.mean(durations):.2f}\n")
                 f.write(f"  Median: {np.median(durations):.2f}\n")
-                f.write(f"  Mode: {mode_value if 'mode_value' in locals() else 0:.2f}\n")
+                f.write(f"  Mode: {duration_mode:.2f}\n")
                 f.write(f"  Std Dev: {np.std(durations):.2f}\n")
                 f.write(f"  Min: {np.min(durations):.2f}\n")
                 f.write(f"  Max: {np.max(durations):.2f}\n\n")
@@ -3301,7 +3013,7 @@ class KatydidAnalysisApp(QMainWindow):
                 f.write(f"Pulse Ratio Statistics:\n")
                 f.write(f"  Mean: {np.mean(ratios):.4f}\n")
                 f.write(f"  Median: {np.median(ratios):.4f}\n")
-                f.write(f"  Mode: {mode_value if 'mode_value' in locals() else 0:.4f}\n")
+                f.write(f"  Mode: {ratio_mode:.4f}\n")
                 f.write(f"  Std Dev: {np.std(ratios):.4f}\n")
                 f.write(f"  Min: {np.min(ratios):.4f}\n")
                 f.write(f"  Max: {np.max(ratios):.4f}\n\n")
@@ -3339,153 +3051,6 @@ class KatydidAnalysisApp(QMainWindow):
             # Load the next file
             self.load_wav_file(next_file)
 
-        # 2. Save the period duration histogram
-        period_hist_file = os.path.join(folder_path, f"{folder_name}_period_histogram.png")
-        
-        # Create figure for period histogram
-        period_fig = Figure(figsize=(8, 6))
-        period_canvas = FigureCanvas(period_fig)
-        period_ax = period_fig.add_subplot(111)
-        
-        # Extract duration data
-        durations = [p['duration'] for p in self.current_periods]
-        
-        # Calculate mode of durations
-        if durations:
-            # Create bins for histogram
-            hist, bin_edges = np.histogram(durations, bins=30)
-            # Find the bin with the highest count
-            mode_bin_index = np.argmax(hist)
-            # Get the mode range
-            mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-            mode_value = (mode_range[0] + mode_range[1]) / 2
-            
-            # Plot histogram of durations
-            n, bins, patches = period_ax.hist(durations, bins=30, alpha=0.7, color='green')
-            
-            # Highlight the mode bin
-            for i, patch in enumerate(patches):
-                if i == mode_bin_index:
-                    patch.set_facecolor('red')  # Highlight the mode bin
-            
-            # Add a vertical line at the mode
-            period_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-            period_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.2f} ms', 
-                        color='red', fontweight='bold', ha='right')
-        else:
-            period_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=period_ax.transAxes)
-        
-        period_ax.set_xlabel('Period Duration (ms)')
-        period_ax.set_ylabel('Frequency')
-        period_ax.set_title('Distribution of Period Durations (Mode Highlighted)')
-        period_ax.grid(True)
-        period_ax.legend()
-        period_ax.legend(loc='upper right')  # Specify a fixed location for the legend
-        period_fig.tight_layout()
-        period_fig.savefig(period_hist_file)
-        
-        # 3. Save the ratio histogram
-        ratio_hist_file = os.path.join(folder_path, f"{folder_name}_ratio_histogram.png")
-        ratio_fig = Figure(figsize=(8, 6))
-        ratio_canvas = FigureCanvas(ratio_fig)
-        ratio_ax = ratio_fig.add_subplot(111)
-        
-        # Extract ratio data
-        ratios = [p['ratio'] for p in self.current_periods]
-        
-        # Calculate mode of ratios
-        if ratios:
-            # Create bins for histogram
-            hist, bin_edges = np.histogram(ratios, bins=30)
-            # Find the bin with the highest count
-            mode_bin_index = np.argmax(hist)
-            # Get the mode range
-            mode_range = (bin_edges[mode_bin_index], bin_edges[mode_bin_index + 1])
-            mode_value = (mode_range[0] + mode_range[1]) / 2
-            
-            # Plot histogram of ratios
-            n, bins, patches = ratio_ax.hist(ratios, bins=30, alpha=0.7, color='blue')
-            
-            # Highlight the mode bin
-            for i, patch in enumerate(patches):
-                if i == mode_bin_index:
-                    patch.set_facecolor('red')  # Highlight the mode bin
-            
-            # Add a vertical line at the mode
-            ratio_ax.axvline(x=mode_value, color='red', linestyle='--', linewidth=2)
-            ratio_ax.text(mode_value, max(n)*0.9, f'Mode: {mode_value:.4f}', 
-                       color='red', fontweight='bold', ha='right')
-        else:
-            ratio_ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ratio_ax.transAxes)
-        
-        ratio_ax.set_xlabel('Pulse Ratio (time between pulses 1-2 / period duration)')
-        ratio_ax.set_ylabel('Frequency')
-        ratio_ax.set_title('Distribution of Pulse Ratios (Mode Highlighted)')
-        ratio_ax.grid(True)
-        ratio_ax.legend()
-        ratio_ax.legend(loc='upper right')  # Specify a fixed location for the legend
-        ratio_fig.tight_layout()
-        ratio_fig.savefig(ratio_hist_file)
-        
-        # 4. Save statistics as text file
-        stats_file = os.path.join(folder_path, f"{folder_name}_statistics.txt")
-        with open(stats_file, 'w') as f:
-            f.write(f"File: {self.file_path if hasattr(self, 'file_path') else 'Unknown'}\n")
-            f.write(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Number of Pulses: {len(self.pulses) if hasattr(self, 'pulses') else 0}\n")
-            f.write(f"Number of Periods: {len(self.current_periods)}\n\n")
-            
-            # Period statistics
-            f.write(f"Period Statistics (ms):\n")
-            f.write(f"  Mean: {np.mean(durations):.2f}\n")
-            f.write(f"  Median: {np.median(durations):.2f}\n")
-            f.write(f"  Mode: {mode_value if 'mode_value' in locals() else 0:.2f}\n")
-            f.write(f"  Std Dev: {np.std(durations):.2f}\n")
-            f.write(f"  Min: {np.min(durations):.2f}\n")
-            f.write(f"  Max: {np.max(durations):.2f}\n\n")
-            
-            # Ratio statistics
-            f.write(f"Pulse Ratio Statistics:\n")
-            f.write(f"  Mean: {np.mean(ratios):.4f}\n")
-            f.write(f"  Median: {np.median(ratios):.4f}\n")
-            f.write(f"  Mode: {mode_value if 'mode_value' in locals() else 0:.4f}\n")
-            f.write(f"  Std Dev: {np.std(ratios):.4f}\n")
-            f.write(f"  Min: {np.min(ratios):.4f}\n")
-            f.write(f"  Max: {np.max(ratios):.4f}\n\n")
-            
-            # Processing information
-            threshold_type = "Absolute" if hasattr(self, 'using_absolute_threshold') and self.using_absolute_threshold else "Relative"
-            threshold_value = self.abs_threshold if hasattr(self, 'abs_threshold') and hasattr(self, 'using_absolute_threshold') and self.using_absolute_threshold else self.rel_threshold if hasattr(self, 'rel_threshold') else 0
-            f.write(f"Processing Information:\n")
-            f.write(f"  Inversion Count: {self.inversion_count if hasattr(self, 'inversion_count') else 0}\n")
-            f.write(f"  Threshold Type: {threshold_type}\n")
-            f.write(f"  Threshold Value: {threshold_value:.3f}\n")
-
-        # Show success message and handle next file
-        try:
-            QMessageBox.information(self, "Save Successful", 
-                f"Results saved to folder:\n{folder_path}\n\nFiles created:\n"
-                f"- {os.path.basename(csv_file)}\n"
-                f"- {os.path.basename(period_hist_file)}\n"
-                f"- {os.path.basename(ratio_hist_file)}\n"
-                f"- {os.path.basename(stats_file)}")
-            
-            # Check if there are more files in the queue
-            if hasattr(self, 'file_queue') and len(self.file_queue) > 1 and self.current_file_index < len(self.file_queue) - 1:
-                # Move to the next file
-                self.current_file_index += 1
-                next_file = self.file_queue[self.current_file_index]
-                
-                # Add information about next file
-                QMessageBox.information(self, "Next File", 
-                    f"Moving to next file ({self.current_file_index + 1}/{len(self.file_queue)}):\n{os.path.basename(next_file)}")
-                
-                # Load the next file
-                self.load_wav_file(next_file)
-        except Exception as e:
-            QMessageBox.critical(self, "Error Saving Results", 
-                f"Failed to save results: {str(e)}")
-
     
     def show_status_message(self, message, duration=1500):
         """Show a status message overlay on the plot"""
@@ -3536,8 +3101,6 @@ class KatydidAnalysisApp(QMainWindow):
             except:
                 pass
 
-from scipy.io import wavfile  # Import here to avoid potential circular imports
-
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = KatydidAnalysisApp()
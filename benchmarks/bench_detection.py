@@ -0,0 +1,130 @@
+"""
+Benchmark: vectorized pulse detection vs. the original per-sample loop.
+
+Generates synthetic katydid-like calls (decaying tone bursts over noise),
+runs both detectors on the same data and checks that they return exactly
+the same peak positions.
+
+Usage:
+    python benchmarks/bench_detection.py [--seconds 5] [--sample-rate 192000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from katydid.detection import detect_peaks, resolve_threshold
+
+
+def legacy_detect_peaks(detection_data, threshold, min_distance, start_idx, end_idx):
+    """The detection loop as it was in KatydidAnalysisApp.detect_pulses."""
+    looking_for_negative_peaks = threshold < 0
+    peaks = []
+    current_peak = None
+    in_peak = False
+
+    for i in range(start_idx, end_idx):
+        if looking_for_negative_peaks:
+            if detection_data[i] < 0 and detection_data[i] < threshold:
+                in_peak = True
+                if current_peak is None or detection_data[i] < detection_data[current_peak]:
+                    current_peak = i
+            else:
+                if in_peak and current_peak is not None:
+                    if detection_data[current_peak] < 0 and detection_data[current_peak] < threshold:
+                        peaks.append(current_peak)
+                    current_peak = None
+                in_peak = False
+        else:
+            if detection_data[i] > 0 and detection_data[i] > threshold:
+                in_peak = True
+                if current_peak is None or detection_data[i] > detection_data[current_peak]:
+                    current_peak = i
+            else:
+                if in_peak and current_peak is not None:
+                    if detection_data[current_peak] > 0 and detection_data[current_peak] > threshold:
+                        peaks.append(current_peak)
+                    current_peak = None
+                in_peak = False
+
+    if in_peak and current_peak is not None:
+        if looking_for_negative_peaks:
+            if detection_data[current_peak] < 0 and detection_data[current_peak] < threshold:
+                peaks.append(current_peak)
+        else:
+            if detection_data[current_peak] > 0 and detection_data[current_peak] > threshold:
+                peaks.append(current_peak)
+
+    filtered_peaks = []
+    for peak in peaks:
+        if not filtered_peaks or (peak - filtered_peaks[-1]) >= min_distance:
+            filtered_peaks.append(peak)
+    return filtered_peaks
+
+
+def synthetic_calls(seconds, sample_rate, seed=0):
+    """Decaying tone bursts (two pulses per period) over noise, as int16-quantized float32."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    data = rng.normal(0, 0.02, n)
+
+    burst_len = int(0.002 * sample_rate)
+    t = np.arange(burst_len) / sample_rate
+    burst = np.sin(2 * np.pi * 12000 * t) * np.exp(-t / 0.0005)
+
+    period = int(0.02 * sample_rate)
+    for start in range(0, n - period, period):
+        for offset, gain in ((0, 0.8), (int(0.006 * sample_rate), 0.5)):
+            pos = start + offset + rng.integers(0, sample_rate // 2000)
+            end = min(n, pos + burst_len)
+            data[pos:end] += gain * rng.uniform(0.7, 1.0) * burst[:end - pos]
+
+    # Quantize like a 16-bit recording so plateaus and ties occur
+    data = np.clip(data, -1, 1)
+    return (np.round(data * 32767) / 32768).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--sample-rate', type=int, default=192000)
+    args = parser.parse_args()
+
+    data = synthetic_calls(args.seconds, args.sample_rate)
+    min_distance = int(args.sample_rate * 0.001)
+    print(f"{len(data):,} samples ({args.seconds:g} s at {args.sample_rate} Hz)")
+
+    cases = [
+        ("absolute +0.30", resolve_threshold(data, 0.3, 0.5, True), 0, len(data)),
+        ("absolute -0.25", resolve_threshold(data, -0.25, 0.5, True), 0, len(data)),
+        ("relative 0.50", resolve_threshold(data, 0.3, 0.5, False), 0, len(data)),
+        ("region +0.10", resolve_threshold(data, 0.1, 0.5, True), len(data) // 3, 2 * len(data) // 3),
+    ]
+
+    ok = True
+    for name, threshold, start, end in cases:
+        t0 = time.perf_counter()
+        expected = legacy_detect_peaks(data, threshold, min_distance, start, end)
+        legacy_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        # Small blocks exercise the run carry-over between blocks
+        found = detect_peaks(data, threshold, min_distance, start, end, block_size=65536)
+        vector_time = time.perf_counter() - t0
+
+        match = np.array_equal(np.asarray(expected, dtype=np.int64), found)
+        ok = ok and match
+        print(f"{name:>16}: {len(found):6d} peaks  loop {legacy_time:8.3f} s  "
+              f"vectorized {vector_time:7.4f} s  x{legacy_time / max(vector_time, 1e-9):7.1f}  "
+              f"{'OK' if match else 'MISMATCH'}")
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
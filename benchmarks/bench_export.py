@@ -0,0 +1,90 @@
+"""
+Benchmark: columnar table CSV writer vs. the original per-row writer.
+
+Builds a PeriodAnalysis for a synthetic pulse train, writes the results
+table with the original O(pulses x periods) csv.writer loop and with
+write_table_csv, and checks that the two files are byte-identical.
+
+Usage:
+    python benchmarks/bench_export.py [--pulses 20000]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from katydid.export import write_table_csv
+from katydid.periods import compute_periods
+
+
+def legacy_write_table_csv(csv_file, analysis):
+    """The table writer as it was in save_results_with_wav, fed from lists of dicts."""
+    periods = [{'index': i + 1, 'duration': d, 'ratio': r}
+               for i, (d, r) in enumerate(zip(analysis.durations.tolist(), analysis.ratios.tolist()))]
+    individual_pulses = [{'index': i + 1, 'time': t, 'amplitude': a}
+                         for i, (t, a) in enumerate(zip(analysis.times.tolist(), analysis.amplitudes))]
+
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Period', 'Duration (ms)', 'Pulse Ratio', 'Amplitude', 'Time (ms)'])
+        for pulse in individual_pulses:
+            period_index = ""
+            duration = ""
+            ratio = ""
+            for p in periods:
+                if p['index'] == pulse['index']:
+                    period_index = str(p['index'])
+                    duration = f"{p['duration']:.2f}"
+                    ratio = f"{p['ratio']:.4f}"
+                    break
+            writer.writerow([period_index, duration, ratio,
+                             f"{pulse['amplitude']:.4f}", f"{pulse['time']:.2f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pulses', type=int, default=20000)
+    parser.add_argument('--sample-rate', type=int, default=192000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Alternating short and long pulse intervals with jitter, like a two-pulse call
+    gaps = np.where(np.arange(args.pulses) % 2 == 0, 0.006, 0.014) * args.sample_rate
+    positions = np.cumsum(gaps + rng.integers(0, args.sample_rate // 2000, args.pulses)).astype(np.int64)
+    wav_data = rng.uniform(-1, 1, int(positions[-1]) + 1).astype(np.float32)
+    analysis = compute_periods(positions, wav_data, args.sample_rate)
+    print(f"{analysis.num_pulses} pulses, {analysis.num_periods} periods")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, 'legacy.csv')
+        new_file = os.path.join(tmp, 'new.csv')
+
+        t0 = time.perf_counter()
+        legacy_write_table_csv(legacy_file, analysis)
+        legacy_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        # Small chunks exercise the chunk boundaries
+        write_table_csv(new_file, analysis, chunk_rows=4096)
+        new_time = time.perf_counter() - t0
+
+        with open(legacy_file, 'rb') as f:
+            expected = f.read()
+        with open(new_file, 'rb') as f:
+            found = f.read()
+
+    match = expected == found
+    print(f"loop {legacy_time:8.3f} s  columnar {new_time:7.4f} s  "
+          f"x{legacy_time / max(new_time, 1e-9):7.1f}  {'IDENTICAL' if match else 'DIFFERENT'}")
+    return 0 if match else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark: vectorized manual pulse search vs. the original per-sample loop.
+
+Runs the add_manual_pulse peak search (local maxima within +-0.5 ms,
+amplitude bounds, duplicate rejection against existing pulses) both ways
+on synthetic calls and checks that they add exactly the same pulses.
+
+Usage:
+    python benchmarks/bench_manual_pulses.py [--seconds 2] [--sample-rate 192000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_detection import synthetic_calls
+from katydid.detection import enforce_min_distance, local_maxima
+from katydid.pulses import DETECTED, PulseTable
+
+
+def legacy_manual_pulses(data, start_sample, existing, peak_width, min_amp, max_amp):
+    """The peak search as it was in KatydidAnalysisApp.add_manual_pulse."""
+    valid_indices = []
+    for i, amplitude in enumerate(data):
+        if min_amp <= amplitude <= max_amp:
+            valid_indices.append(i)
+
+    peaks = []
+    for idx in valid_indices:
+        is_peak = True
+        for offset in range(1, peak_width + 1):
+            if idx - offset >= 0 and idx - offset < len(data) and data[idx] < data[idx - offset]:
+                is_peak = False
+                break
+            if idx + offset < len(data) and data[idx] < data[idx + offset]:
+                is_peak = False
+                break
+        if is_peak:
+            peaks.append(idx)
+
+    pulses = list(existing)
+    added = []
+    for peak_idx in peaks:
+        global_peak_idx = start_sample + peak_idx
+        duplicate = False
+        for pulse in pulses:
+            if abs(pulse - global_peak_idx) < peak_width:
+                duplicate = True
+                break
+        if not duplicate:
+            pulses.append(global_peak_idx)
+            added.append(global_peak_idx)
+    return added
+
+
+def vectorized_manual_pulses(data, start_sample, table, peak_width, min_amp, max_amp):
+    """The same search as add_manual_pulse now does it."""
+    peaks = start_sample + local_maxima(data, peak_width, min_amp, max_amp)
+    peaks = peaks[table.nearest_distance(peaks) >= peak_width]
+    return enforce_min_distance(peaks, peak_width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--sample-rate', type=int, default=192000)
+    args = parser.parse_args()
+
+    signal = synthetic_calls(args.seconds, args.sample_rate, seed=1)
+    peak_width = max(1, int(0.5 * args.sample_rate / 1000))
+    rng = np.random.default_rng(2)
+    # Existing pulses scattered over the recording, as after a detection pass
+    existing = np.sort(rng.choice(len(signal), size=len(signal) // 4000, replace=False))
+    table = PulseTable()
+    table.insert(existing, DETECTED)
+    print(f"{len(signal):,} samples, {len(existing)} existing pulses, peak width {peak_width}")
+
+    start = len(signal) // 4
+    cases = [
+        ("whole selection", start, len(signal) // 2, -np.inf, np.inf),
+        ("amplitude box", start, len(signal) // 2, 0.2, 0.9),
+        ("narrow", start, 5000, -0.1, 0.1),
+    ]
+
+    ok = True
+    for name, first, length, min_amp, max_amp in cases:
+        data = signal[first:first + length]
+
+        t0 = time.perf_counter()
+        expected = legacy_manual_pulses(data, first, existing.tolist(), peak_width, min_amp, max_amp)
+        legacy_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        found = vectorized_manual_pulses(data, first, table, peak_width, min_amp, max_amp)
+        vector_time = time.perf_counter() - t0
+
+        match = np.array_equal(np.asarray(expected, dtype=np.int64), found)
+        ok = ok and match
+        print(f"{name:>16}: {len(found):6d} pulses  loop {legacy_time:8.3f} s  "
+              f"vectorized {vector_time:7.4f} s  x{legacy_time / max(vector_time, 1e-9):7.1f}  "
+              f"{'OK' if match else 'MISMATCH'}")
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
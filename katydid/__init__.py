@@ -0,0 +1,6 @@
+"""
+Katydid analysis core.
+
+GUI-free building blocks shared by Wav Analyzer and Data Analyzer.
+Nothing in this package imports Qt.
+"""
@@ -0,0 +1,166 @@
+"""
+WAV file input/output.
+
+MappedWav memory-maps the sample data instead of reading the whole file
+into RAM. Opening a file only parses its header, and samples are
+converted to mono float one slice at a time when they are needed.
+"""
+
+import os
+import wave
+
+import numpy as np
+from scipy.io import wavfile
+
+# Samples converted per block when walking a whole file
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+class MappedWav:
+    """
+    Memory-mapped WAV samples served as mono float in [-1, 1].
+
+    Indexing works like a 1-D float array: wav[i], wav[a:b] and
+    wav[index_array] return converted samples. Nothing is cached, so
+    resident memory only grows with what the caller keeps.
+    """
+
+    def __init__(self, raw, sample_rate, gain=1.0):
+        self.raw = raw
+        self.sample_rate = sample_rate
+        # Scale applied after normalization (-1.0 inverts the waveform)
+        self.gain = gain
+
+    @classmethod
+    def open(cls, file_path):
+        """Map a WAV file; only the header is read."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        try:
+            sample_rate, raw = wavfile.read(file_path, mmap=True)
+        except ValueError:
+            # Bit depths scipy cannot map (e.g. 24-bit) are read normally
+            sample_rate, raw = wavfile.read(file_path)
+        return cls(raw, sample_rate)
+
+    def __len__(self):
+        return self.raw.shape[0]
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    @property
+    def size(self):
+        return len(self)
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def dtype(self):
+        return self.raw.dtype if self.raw.dtype.kind == 'f' else np.dtype(np.float32)
+
+    @property
+    def channels(self):
+        return 1 if self.raw.ndim == 1 else self.raw.shape[1]
+
+    def _convert(self, raw):
+        """Normalize raw samples (frames or frames x channels) to mono float."""
+        # Convert to float in range [-1, 1] for consistent processing
+        if raw.dtype == np.int16:
+            data = raw.astype(np.float32) / 32768.0
+        elif raw.dtype == np.int32:
+            data = raw.astype(np.float32) / 2147483648.0
+        elif raw.dtype == np.uint8:
+            data = (raw.astype(np.float32) - 128) / 128.0
+        else:
+            data = np.array(raw)
+
+        # If stereo, convert to mono by averaging channels
+        if data.ndim > 1:
+            data = np.mean(data, axis=1) if data.shape[1] > 1 else data[:, 0]
+
+        if self.gain != 1.0:
+            data *= data.dtype.type(self.gain)
+        return data
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(f"index {key} is out of bounds for {len(self)} samples")
+            return self._convert(self.raw[index:index + 1])[0]
+        return self._convert(self.raw[key])
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:]
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    def __neg__(self):
+        # Inverting only flips the sign flag; no samples are touched
+        return MappedWav(self.raw, self.sample_rate, -self.gain)
+
+    def scaled(self, factor):
+        """Return a view of the same samples multiplied by factor."""
+        return MappedWav(self.raw, self.sample_rate, self.gain * factor)
+
+    def iter_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Yield (start, samples) blocks covering the whole file."""
+        for start in range(0, len(self), block_size):
+            yield start, self[start:start + block_size]
+
+    def decode_into(self, out, block_size=DEFAULT_BLOCK_SIZE):
+        """Write all converted samples to out, block by block."""
+        for start, block in self.iter_blocks(block_size):
+            out[start:start + len(block)] = block
+        return out
+
+    def abs_max(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Largest absolute sample value, computed block by block."""
+        result = 0.0
+        for _, block in self.iter_blocks(block_size):
+            if len(block) > 0:
+                result = max(result, float(np.max(np.abs(block))))
+        return result
+
+
+def read_wav(file_path, cache=None):
+    """
+    Open a WAV file as mono float samples in [-1, 1].
+
+    Returns (sample_rate, MappedWav), normalized the same way Wav Analyzer
+    always has: int16 / 32768, int32 / 2^31, uint8 centred on 128, and
+    multi-channel files averaged down to mono.
+
+    With a cache (katydid.cache.ArrayCache), the decoded mono samples are
+    stored as float32 the first time and memory-mapped from the cache
+    afterwards. Mono float32 files need no decoding and float64 files
+    would lose precision, so both are always mapped directly.
+    """
+    wav = MappedWav.open(file_path)
+    needs_decoding = wav.raw.dtype != np.float32 or wav.channels > 1
+    if cache is not None and wav.dtype == np.float32 and needs_decoding:
+        key = cache.key('mono', cache.file_digest(file_path))
+        samples = cache.load(key)
+        if samples is None:
+            samples = cache.build(key, (len(wav),), np.float32, wav.decode_into)
+        if samples is not None:
+            wav = MappedWav(samples, wav.sample_rate)
+    return wav.sample_rate, wav
+
+
+def write_processed_wav(file_path, sample_rate, data, block_size=DEFAULT_BLOCK_SIZE):
+    """Write float samples in [-1, 1] as a 16-bit mono WAV file, block by block."""
+    with wave.open(file_path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(int(sample_rate))
+        for start in range(0, len(data), block_size):
+            block = np.asarray(data[start:start + block_size])
+            # Clip data to [-1.0, 1.0] just in case it went out of range during processing
+            block_int16 = (np.clip(block, -1.0, 1.0) * 32768.0).astype('<i2')
+            out.writeframes(block_int16.tobytes())
@@ -0,0 +1,163 @@
+"""
+Headless analysis pipeline: load -> detect -> periods -> export.
+
+Runs the same steps as Wav Analyzer's Y, T and = keys without a window,
+and writes the same result files. run_batch spreads independent
+recordings over a process pool.
+"""
+
+import csv
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from katydid.audio import read_wav, write_processed_wav
+from katydid.detection import detect_peaks, resolve_threshold
+from katydid.export import write_statistics, write_table_csv
+from katydid.histograms import save_period_histogram, save_ratio_histogram
+from katydid.periods import compute_periods
+
+
+def result_names(wav_files):
+    """
+    Results folder name for each WAV file, unique within the batch.
+
+    A name is the file name without extension. Recorders reuse file
+    names across folders, so names that occur more than once get their
+    parent folder appended (rec_night1), and an index if that still
+    isn't unique (rec_night1_2).
+    """
+    stems = [os.path.splitext(os.path.basename(f))[0] for f in wav_files]
+    stem_counts = Counter(stems)
+    names = []
+    for wav_file, stem in zip(wav_files, stems):
+        if stem_counts[stem] > 1:
+            parent = os.path.basename(os.path.dirname(os.path.abspath(wav_file)))
+            stem = f"{stem}_{parent}" if parent else stem
+        names.append(stem)
+
+    # Same name and same folder (a file listed twice, or equal folder names)
+    name_counts = Counter(names)
+    seen = Counter()
+    for i, name in enumerate(names):
+        if name_counts[name] > 1:
+            seen[name] += 1
+            names[i] = f"{name}_{seen[name]}"
+    return names
+
+
+def analyze_file(wav_file, output_dir, threshold=0.5, relative=False, invert=False,
+                 write_wav=False, name=None):
+    """
+    Analyze one WAV file and write its results folder.
+
+    Results go to output_dir/<name>/<name>_table.csv etc., where <name>
+    defaults to the WAV file name without extension (see result_names
+    for batches). Returns a dict summarizing the run; raises ValueError
+    if fewer than 3 pulses are found.
+    """
+    sample_rate, wav_data = read_wav(wav_file)
+
+    # Inverting is the headless equivalent of pressing R once
+    inversion_count = 1 if invert else 0
+    if invert:
+        wav_data = -wav_data
+
+    # Same threshold and 1ms minimum distance as detect_pulses
+    abs_threshold = threshold if not relative else 0.5
+    rel_threshold = threshold if relative else 0.5
+    detection_threshold = resolve_threshold(wav_data, abs_threshold, rel_threshold, not relative)
+    positions = detect_peaks(wav_data, detection_threshold, int(sample_rate * 0.001))
+
+    if len(positions) < 3:
+        raise ValueError(f"only {len(positions)} pulses detected, need at least 3")
+
+    analysis = compute_periods(positions, wav_data, sample_rate)
+    durations = analysis.durations
+    ratios = analysis.ratios
+
+    # Create the results folder
+    if name is None:
+        name = os.path.splitext(os.path.basename(wav_file))[0]
+    folder_path = os.path.join(output_dir, name)
+    os.makedirs(folder_path, exist_ok=True)
+
+    write_table_csv(os.path.join(folder_path, f"{name}_table.csv"), analysis)
+    duration_mode = save_period_histogram(
+        os.path.join(folder_path, f"{name}_period_histogram.png"), durations)
+    ratio_mode = save_ratio_histogram(
+        os.path.join(folder_path, f"{name}_ratio_histogram.png"), ratios)
+    write_statistics(os.path.join(folder_path, f"{name}_statistics.txt"), wav_file,
+                     len(positions), durations, ratios, duration_mode, ratio_mode,
+                     inversion_count, not relative, threshold, sample_rate, len(wav_data))
+
+    if write_wav:
+        write_processed_wav(os.path.join(folder_path, f"{name}_processed.wav"), sample_rate, wav_data)
+
+    return {
+        'file': wav_file,
+        'folder': folder_path,
+        'pulses': len(positions),
+        'periods': analysis.num_periods,
+        'duration_mode': duration_mode,
+        'ratio_mode': ratio_mode,
+        'durations': durations,
+        'ratios': ratios,
+    }
+
+
+def _analyze_worker(index, wav_file, output_dir, options):
+    """Process pool entry point; returns (index, result, error message)."""
+    try:
+        return index, analyze_file(wav_file, output_dir, **options), None
+    except Exception as e:
+        return index, None, str(e)
+
+
+def run_batch(wav_files, output_dir, workers=None, **options):
+    """
+    Analyze many WAV files, each in its own worker process.
+
+    Yields (index, wav_file, result, error) as files finish, in completion
+    order. workers=1 runs everything in this process. Every file gets its
+    own results folder, even when file names repeat (see result_names).
+    """
+    names = result_names(wav_files)
+    if workers == 1 or len(wav_files) <= 1:
+        for i, wav_file in enumerate(wav_files):
+            index, result, error = _analyze_worker(i, wav_file, output_dir,
+                                                   dict(options, name=names[i]))
+            yield index, wav_file, result, error
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Names are settled before any job starts, so no two workers share a folder
+        futures = {executor.submit(_analyze_worker, i, wav_file, output_dir,
+                                   dict(options, name=names[i])): i
+                   for i, wav_file in enumerate(wav_files)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                _, result, error = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (killed for memory, crashed); every unfinished file fails with it
+                result, error = None, f"worker process died: {e}"
+            except Exception as e:
+                result, error = None, str(e)
+            yield index, wav_files[index], result, error
+
+
+def write_summary_csv(summary_file, results):
+    """
+    Write every file's periods and ratios into one CSV, in input order.
+
+    The File column holds the input path, so recordings with the same
+    file name in different folders stay distinguishable.
+    """
+    with open(summary_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['File', 'Period', 'Duration (ms)', 'Pulse Ratio'])
+        for result in results:
+            for i, (duration, ratio) in enumerate(zip(result['durations'], result['ratios'])):
+                writer.writerow([result['file'], i + 1, f"{duration:.2f}", f"{ratio:.4f}"])
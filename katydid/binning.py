@@ -0,0 +1,97 @@
+"""
+Bounded histogram binning for the period histogram.
+
+Bins are as fine as the data allows: the smallest gap between distinct
+values, so neighbouring values never share a bar. That width is only
+used while it keeps the bin count under a cap; float noise in the CSV
+can make the smallest gap ~1e-6 ms, which would mean tens of millions
+of bins. Past the cap the width falls back to the recording's sample
+period (durations are whole numbers of samples) and then to the
+Freedman-Diaconis rule, and is finally widened to respect the cap.
+"""
+
+import numpy as np
+
+# Largest number of bins a histogram may have (0.005 ms bins over 0-50 ms)
+MAX_BINS = 10000
+
+# Width used when the data has no spread to measure
+DEFAULT_BIN_WIDTH = 0.1
+
+
+def smallest_gap(values):
+    """Smallest non-zero difference between sorted values (None if there is none)."""
+    gaps = np.diff(np.unique(values))
+    gaps = gaps[gaps > 0]
+    return float(gaps.min()) if len(gaps) > 0 else None
+
+
+def freedman_diaconis_width(values):
+    """Freedman-Diaconis bin width, 2 * IQR / n^(1/3) (None without spread)."""
+    if len(values) < 2:
+        return None
+    q1, q3 = np.percentile(values, [25, 75])
+    width = 2 * (q3 - q1) / len(values) ** (1 / 3)
+    return float(width) if width > 0 else None
+
+
+def bin_width(values, lower, upper, sample_period=None, max_bins=MAX_BINS):
+    """
+    Bin width for values shown over [lower, upper].
+
+    Candidates are tried in order (smallest gap, sample_period,
+    Freedman-Diaconis) and the first one giving at most max_bins bins is
+    used. If none does, the width is the one that gives exactly max_bins.
+    Values without distinct neighbours get DEFAULT_BIN_WIDTH.
+    """
+    span = upper - lower
+    gap = smallest_gap(values)
+    if gap is None:
+        return max(DEFAULT_BIN_WIDTH, span / max_bins)
+    for width in (gap, sample_period, freedman_diaconis_width(values)):
+        if width is not None and width > 0 and span / width <= max_bins:
+            return width
+    return span / max_bins
+
+
+def bin_edges(lower, upper, width):
+    """Edges from lower up to (at least) upper, width apart."""
+    return np.arange(lower, upper + width, width)
+
+
+def histogram(values, edges):
+    """
+    Counts of values in the bins of evenly spaced edges.
+
+    Same result as np.histogram(values, edges) (the last bin includes its
+    right edge), computed with one np.bincount instead of a binary search
+    per value.
+    """
+    num_bins = len(edges) - 1
+    values = np.asarray(values, dtype=np.float64)
+    values = values[(values >= edges[0]) & (values <= edges[-1])]
+    if num_bins < 1 or len(values) == 0:
+        return np.zeros(max(num_bins, 0), dtype=np.int64)
+
+    width = (edges[-1] - edges[0]) / num_bins
+    index = np.clip(((values - edges[0]) // width).astype(np.int64), 0, num_bins - 1)
+    # Arithmetic rounding can put a value one bin off; settle it against the edges
+    index -= (values < edges[index]) & (index > 0)
+    index += (values >= edges[index + 1]) & (index < num_bins - 1)
+    return np.bincount(index, minlength=num_bins)
+
+
+class RangeCounter:
+    """Number of values inside any [lower, upper], in O(log n) per query."""
+
+    def __init__(self, values):
+        self.sorted_values = np.sort(np.asarray(values, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.sorted_values)
+
+    def count(self, lower, upper):
+        """How many values v satisfy lower <= v <= upper."""
+        first = np.searchsorted(self.sorted_values, lower, side='left')
+        last = np.searchsorted(self.sorted_values, upper, side='right')
+        return int(max(0, last - first))
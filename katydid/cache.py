@@ -0,0 +1,198 @@
+"""
+Content-addressed on-disk cache of decoded audio and derived signals.
+
+Entries are .npy files named after a hash of the recording's contents
+and the parameters that produced them, so the same recording opened in
+Wav Analyzer and Data Analyzer (or under another name) shares decoded
+samples, smoothed signals and envelopes. Entries are memory-mapped
+read-only when loaded; nothing is read into RAM until it is used.
+
+The cache is kept under a size cap. Loading an entry marks it as
+recently used, and the least recently used entries are deleted when a
+new one would exceed the cap.
+
+Settings (environment variables):
+    KATYDID_CACHE_DIR      cache location (default ~/.cache/katydid)
+    KATYDID_CACHE_MAX_MB   size cap in MB (default 2048, 0 disables the cache)
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'katydid')
+DEFAULT_MAX_MB = 2048
+
+# Bytes hashed per read when fingerprinting a recording
+HASH_BLOCK_SIZE = 1 << 20
+
+# Unfinished entries older than this (seconds) are left over from a crash
+STALE_TEMP_AGE = 3600
+
+
+def default_cache():
+    """Cache configured by the environment, or None if it is disabled or unusable."""
+    directory = os.environ.get('KATYDID_CACHE_DIR') or DEFAULT_CACHE_DIR
+    try:
+        max_mb = float(os.environ.get('KATYDID_CACHE_MAX_MB', DEFAULT_MAX_MB))
+    except ValueError:
+        print(f"Ignoring invalid KATYDID_CACHE_MAX_MB, using {DEFAULT_MAX_MB}")
+        max_mb = DEFAULT_MAX_MB
+    if max_mb <= 0:
+        return None
+    try:
+        return ArrayCache(directory, int(max_mb * 1024 * 1024))
+    except OSError as e:
+        print(f"Cache disabled, cannot use {directory}: {e}")
+        return None
+
+
+class ArrayCache:
+    """Directory of memory-mappable arrays with a least-recently-used size cap."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.array_dir = os.path.join(directory, 'arrays')
+        self.digest_dir = os.path.join(directory, 'digests')
+        os.makedirs(self.array_dir, exist_ok=True)
+        os.makedirs(self.digest_dir, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """Entry name for a combination of parts (digests, names, parameters)."""
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.array_dir, key + '.npy')
+
+    def file_digest(self, file_path):
+        """
+        Hash of a file's contents.
+
+        The hash is remembered per path, size and modification time, so a
+        file is only read in full the first time it is seen.
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        stamp = f"{stat.st_size} {stat.st_mtime_ns}"
+        memo_path = os.path.join(self.digest_dir, self.key(file_path))
+        try:
+            with open(memo_path, 'r') as f:
+                memo_stamp, _, digest = f.read().rpartition(' ')
+            if memo_stamp == stamp:
+                return digest
+        except OSError:
+            pass
+
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        try:
+            with open(memo_path, 'w') as f:
+                f.write(f"{stamp} {digest}")
+        except OSError as e:
+            print(f"Could not remember digest of {file_path}: {e}")
+        return digest
+
+    def load(self, key):
+        """Read-only memory map of an entry, or None if it isn't cached."""
+        path = self.path(key)
+        try:
+            array = np.load(path, mmap_mode='r', allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return array
+
+    def store(self, key, array):
+        """Cache an array. Returns the cached copy (memory-mapped), or None if it is too big."""
+        array = np.asarray(array)
+
+        def fill(out):
+            out[...] = array
+
+        return self.build(key, array.shape, array.dtype, fill)
+
+    def build(self, key, shape, dtype, fill):
+        """
+        Create an entry by calling fill(out) on a writable memory map.
+
+        Results are written straight to disk, so entries larger than RAM
+        can be built. Returns the finished entry (memory-mapped read-only),
+        or None without calling fill if it would not fit under the cap.
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        if nbytes > self.max_bytes:
+            return None
+        self.evict(self.max_bytes - nbytes)
+
+        path = self.path(key)
+        # Write under a temporary name so readers never see a partial entry
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            out = np.lib.format.open_memmap(temp_path, mode='w+', dtype=dtype, shape=shape)
+            fill(out)
+            out.flush()
+            # Release the mapping before renaming (required on Windows)
+            del out
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        return self.load(key)
+
+    def entries(self):
+        """(last_used, size, path) of every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.array_dir):
+            path = os.path.join(self.array_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.endswith('.tmp'):
+                # Leftovers of an interrupted build
+                if time.time() - stat.st_mtime > STALE_TEMP_AGE:
+                    self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def size(self):
+        """Total size of the cached entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until at most max_bytes are cached."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+        return total
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            # Still mapped by a process on a system that forbids deleting it
+            return False
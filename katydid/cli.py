@@ -0,0 +1,83 @@
+"""
+Command line interface.
+
+    python -m katydid batch recordings/*.wav --threshold 0.3 --workers 16
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+from katydid.batch import run_batch, write_summary_csv
+
+
+def expand_wav_paths(patterns):
+    """Expand globs and folders into a sorted list of .wav files."""
+    paths = []
+    for pattern in patterns:
+        # Shells on Windows don't expand wildcards for us
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if os.path.isdir(match):
+                paths.extend(os.path.join(match, f) for f in sorted(os.listdir(match))
+                             if f.lower().endswith('.wav'))
+            else:
+                paths.append(match)
+    return paths
+
+
+def batch_command(args):
+    """Run the batch subcommand."""
+    wav_files = expand_wav_paths(args.files)
+    if not wav_files:
+        print("No WAV files found.", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = [None] * len(wav_files)
+    failures = 0
+    done = 0
+    for index, wav_file, result, error in run_batch(
+            wav_files, args.output_dir, workers=args.workers, threshold=args.threshold,
+            relative=args.relative, invert=args.invert, write_wav=args.write_wav):
+        done += 1
+        if error is not None:
+            failures += 1
+            print(f"[{done}/{len(wav_files)}] {wav_file}: FAILED ({error})", file=sys.stderr)
+            continue
+        results[index] = result
+        print(f"[{done}/{len(wav_files)}] {wav_file}: {result['pulses']} pulses, "
+              f"{result['periods']} periods -> {result['folder']}")
+
+    summary_file = args.summary or os.path.join(args.output_dir, 'batch_summary.csv')
+    write_summary_csv(summary_file, [r for r in results if r is not None])
+    print(f"Summary written to {summary_file}")
+
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m katydid',
+                                     description='Katydid call analysis without the GUI.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser('batch', help='Detect pulses and export period results for WAV files')
+    batch.add_argument('files', nargs='+', help='WAV files, folders or glob patterns')
+    batch.add_argument('--threshold', type=float, default=0.5,
+                       help='Detection threshold (negative values detect negative peaks, default 0.5)')
+    batch.add_argument('--relative', action='store_true',
+                       help='Treat the threshold as a fraction of the file maximum')
+    batch.add_argument('--invert', action='store_true', help='Invert the waveform before detection')
+    batch.add_argument('--write-wav', action='store_true', help='Also write <name>_processed.wav')
+    batch.add_argument('-o', '--output-dir', default='.',
+                       help='Folder to create the per-file result folders in (default: current folder)')
+    batch.add_argument('-j', '--workers', type=int, default=None,
+                       help='Number of worker processes (default: one per CPU core)')
+    batch.add_argument('--summary', default=None,
+                       help='Summary CSV path (default: <output-dir>/batch_summary.csv)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'batch':
+        return batch_command(args)
+    return 0
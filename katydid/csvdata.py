@@ -0,0 +1,87 @@
+"""
+Columnar view of a Wav Analyzer results CSV.
+
+Both CSV layouts Wav Analyzer writes (the 5-column table from the =
+key and the 7-column table from Save Results) are reduced to the same
+five float columns: period, duration, ratio, amplitude and time. Blank
+or non-numeric cells become NaN, so "is this value present" is a mask
+instead of a missing dict key.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _numeric_column(frame, column):
+    """Column as float64, NaN where blank, non-numeric or not in the file."""
+    if column is None:
+        return np.full(len(frame), np.nan)
+    return np.array(pd.to_numeric(frame[column], errors='coerce'), dtype=np.float64)
+
+
+def round_as_shown(values, decimals=2):
+    """
+    Values rounded exactly as f"{value:.{decimals}f}" displays them (NaN kept).
+
+    np.round scales by 10**decimals before rounding, which can tip values
+    that lie at a decimal halfway point (2015.135 -> 2015.14, displayed
+    as "2015.13"). Those values are re-rounded through the same string
+    formatting as the table; all others keep np.round's result.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_half] = [float(f"{value:.{decimals}f}") for value in values[near_half].tolist()]
+    return rounded
+
+
+class PeriodColumns:
+    """Typed per-row columns of a results CSV (NaN marks a missing value)."""
+
+    def __init__(self, period=None, duration=None, ratio=None, amplitude=None, time=None):
+        empty = np.empty(0)
+        self.period = empty if period is None else period
+        self.duration = empty if duration is None else duration
+        self.ratio = empty if ratio is None else ratio
+        self.amplitude = empty if amplitude is None else amplitude
+        self.time = empty if time is None else time
+
+    @classmethod
+    def from_frame(cls, frame, period_col, duration_col, ratio_col, amplitude_col, time_col):
+        """Build the columns from a DataFrame and its resolved column names."""
+        period = _numeric_column(frame, period_col)
+        # Rows without a period number are numbered by position (1-based)
+        missing = np.isnan(period)
+        period[missing] = np.flatnonzero(missing) + 1
+        return cls(period,
+                   _numeric_column(frame, duration_col),
+                   _numeric_column(frame, ratio_col),
+                   _numeric_column(frame, amplitude_col),
+                   _numeric_column(frame, time_col))
+
+    def __len__(self):
+        return len(self.period)
+
+    @property
+    def has_duration(self):
+        return ~np.isnan(self.duration)
+
+    @property
+    def has_pulse(self):
+        """Rows with both a time and an amplitude (drawn on the waveform)."""
+        return ~np.isnan(self.time) & ~np.isnan(self.amplitude)
+
+    def durations(self):
+        """All present durations, in row order."""
+        return self.duration[self.has_duration]
+
+    def in_period_range(self, period_min, period_max):
+        """Mask of rows whose duration lies in [period_min, period_max]."""
+        # NaN compares False, so rows without a duration are never in range
+        return (self.duration >= period_min) & (self.duration <= period_max)
+
+    def ratios_in_period_range(self, period_min, period_max):
+        """Present ratios of the rows whose duration lies in the range."""
+        mask = self.in_period_range(period_min, period_max) & ~np.isnan(self.ratio)
+        return self.ratio[mask]
@@ -0,0 +1,146 @@
+"""
+Multi-resolution min/max envelope for waveform rendering.
+
+Level 0 holds the min and max of every `base` samples, and each further
+level merges `factor` bins of the level below. A view of any width is
+drawn from the level that yields about `max_points` points, so zooming
+and panning cost the same on a 10 second clip and a 1 hour recording.
+Unlike plain decimation, every peak stays visible.
+"""
+
+import numpy as np
+
+# Samples reduced per block while building level 0
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def _reduce_minmax(mins, maxs, size):
+    """Merge every `size` consecutive bins (the last bin may be partial)."""
+    starts = np.arange(0, len(mins), size)
+    return np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+
+
+class EnvelopePyramid:
+    """Min/max envelope of a signal at successively coarser resolutions."""
+
+    def __init__(self, data, base=256, factor=4, block_size=DEFAULT_BLOCK_SIZE, level0=None):
+        self.data = data
+        self.length = len(data)
+        self.base = base
+        self.factor = factor
+        # levels[k] = (mins, maxs) with bins of base * factor**k samples
+        self.levels = []
+
+        if self.length == 0:
+            return
+
+        if level0 is not None:
+            # Finest level computed earlier (e.g. loaded from the cache)
+            level = (level0[0], level0[1])
+        else:
+            # Build level 0 block by block so the source never has to be in memory at once
+            block_size = max(base, block_size - block_size % base)
+            mins, maxs = [], []
+            for start in range(0, self.length, block_size):
+                block = np.asarray(data[start:start + block_size])
+                block_mins, block_maxs = _reduce_minmax(block, block, base)
+                mins.append(block_mins)
+                maxs.append(block_maxs)
+            level = (np.concatenate(mins), np.concatenate(maxs))
+        self.levels.append(level)
+
+        # Coarser levels until the whole signal fits in a handful of bins
+        while len(level[0]) > factor:
+            level = _reduce_minmax(level[0], level[1], factor)
+            self.levels.append(level)
+
+    @classmethod
+    def cached(cls, cache, key, data, base=256, factor=4):
+        """
+        Envelope of data whose finest level is kept in a cache.
+
+        key identifies the signal (see katydid.cache.ArrayCache.key); the
+        coarser levels are small and always rebuilt from level 0. Without
+        a cache this is the same as EnvelopePyramid(data).
+        """
+        if cache is None or len(data) == 0:
+            return cls(data, base, factor)
+        key = cache.key('envelope', key, base)
+        level0 = cache.load(key)
+        if level0 is None:
+            pyramid = cls(data, base, factor)
+            cache.store(key, np.stack(pyramid.levels[0]))
+            return pyramid
+        return cls(data, base, factor, level0=level0)
+
+    def bin_size(self, level):
+        """Number of samples covered by one bin of the given level."""
+        return self.base * self.factor ** level
+
+    def query(self, start, stop, max_points=4000):
+        """
+        Return (sample_positions, values) to plot samples start..stop.
+
+        Narrow views return the raw samples. Wider views return a min/max
+        pair per bin, giving at most about max_points points.
+        """
+        start = max(0, int(start))
+        stop = min(self.length, int(stop))
+        if stop <= start:
+            return np.empty(0), np.empty(0)
+
+        n = stop - start
+        if n <= max_points:
+            return np.arange(start, stop), np.asarray(self.data[start:stop])
+
+        bins_wanted = max(1, max_points // 2)
+        if n <= self.base * bins_wanted or not self.levels:
+            # Small enough to reduce straight from the samples
+            size = -(-n // bins_wanted)
+            block = np.asarray(self.data[start:stop])
+            mins, maxs = _reduce_minmax(block, block, size)
+            first = start
+        else:
+            # Finest precomputed level that fits the point budget
+            level = 0
+            while level < len(self.levels) - 1 and n / self.bin_size(level) > bins_wanted:
+                level += 1
+            size = self.bin_size(level)
+            lo = start // size
+            hi = -(-stop // size)
+            mins = self.levels[level][0][lo:hi]
+            maxs = self.levels[level][1][lo:hi]
+            first = lo * size
+
+        # Draw each bin as a vertical min-max stroke at its centre
+        centres = first + (np.arange(len(mins)) + 0.5) * size
+        positions = np.repeat(centres, 2)
+        values = np.empty(2 * len(mins), dtype=mins.dtype)
+        values[0::2] = mins
+        values[1::2] = maxs
+        return positions, values
+
+    def abs_max(self):
+        """Largest absolute sample value, read off the finest level."""
+        if not self.levels:
+            return 0.0
+        mins, maxs = self.levels[0]
+        return float(max(-np.min(mins), np.max(maxs)))
+
+    def scaled(self, factor, data):
+        """Envelope of data = factor * the signal, derived without touching the samples."""
+        pyramid = EnvelopePyramid.__new__(EnvelopePyramid)
+        pyramid.data = data
+        pyramid.length = self.length
+        pyramid.base = self.base
+        pyramid.factor = self.factor
+        if factor >= 0:
+            pyramid.levels = [(mins * factor, maxs * factor) for mins, maxs in self.levels]
+        else:
+            # A negative scale swaps the roles of minimum and maximum
+            pyramid.levels = [(maxs * factor, mins * factor) for mins, maxs in self.levels]
+        return pyramid
+
+    def negated(self, data=None):
+        """Envelope of the inverted signal, derived without touching the samples."""
+        return self.scaled(-1, -self.data if data is None else data)
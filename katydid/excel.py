@@ -0,0 +1,72 @@
+"""
+Excel export of a table of display strings.
+
+The workbook is written in openpyxl's write-only mode: rows are streamed
+to the file as they are appended, so memory stays flat however long the
+table is. Formatting uses named styles registered once per workbook
+instead of font and fill objects on every cell, and column widths are
+computed from the column data before any row is written.
+
+Requires openpyxl; importing this module raises ImportError without it.
+"""
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Named styles shared by all cells that use them
+HEADER_STYLE = "katydid_header"
+HIGHLIGHT_STYLE = "katydid_highlight"
+
+
+def _named_styles():
+    header = NamedStyle(name=HEADER_STYLE)
+    header.font = Font(bold=True)
+    header.alignment = Alignment(horizontal='center')
+
+    highlight = NamedStyle(name=HIGHLIGHT_STYLE)
+    highlight.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    return header, highlight
+
+
+def column_width(header, values):
+    """Excel width fitting the longest of header and values, plus some room."""
+    max_length = max(len(header), max((len(value) for value in values), default=0))
+    return (max_length + 2) * 1.25
+
+
+def write_table_xlsx(file_path, headers, columns, highlight_column=None,
+                     sheet_title="Total Data"):
+    """
+    Write columns of strings (one sequence per header) to an .xlsx file.
+
+    The header row is bold and centred. Non-empty cells of the column
+    at index highlight_column are filled yellow. Empty strings are left
+    as blank cells.
+    """
+    workbook = Workbook(write_only=True)
+    for style in _named_styles():
+        workbook.add_named_style(style)
+    sheet = workbook.create_sheet(sheet_title)
+
+    # Widths must be set before the first row is streamed
+    for col, (header, values) in enumerate(zip(headers, columns), 1):
+        sheet.column_dimensions[get_column_letter(col)].width = column_width(header, values)
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.style = HEADER_STYLE
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    for row in zip(*columns):
+        row = [value if value != "" else None for value in row]
+        if highlight_column is not None and row[highlight_column] is not None:
+            cell = WriteOnlyCell(sheet, value=row[highlight_column])
+            cell.style = HIGHLIGHT_STYLE
+            row[highlight_column] = cell
+        sheet.append(row)
+
+    workbook.save(file_path)
@@ -0,0 +1,144 @@
+"""
+Undo/redo history of analysis edits.
+
+Edits are recorded as small deltas instead of snapshots: the rows of
+pulses that were inserted or deleted, the threshold settings before and
+after a change, and inversion as a sign flip. Undoing an edit never
+copies sample data, however long the recording is.
+
+Pulse rows are recorded by their index in the table, so undo and redo
+restore the table exactly (including the order of pulses that share a
+position). This relies on edits being undone and redone strictly in
+order, which EditHistory guarantees.
+"""
+
+import numpy as np
+
+from katydid.pulses import PEAK_NONE
+
+# Edits kept before the oldest ones are dropped
+DEFAULT_MAX_EDITS = 200
+
+
+class PulseEdit:
+    """Pulses inserted into or deleted from a PulseTable."""
+
+    def __init__(self, inserted, index, positions, types, peak_types):
+        # True for an insert, False for a delete
+        self.inserted = inserted
+        # Row indices of the pulses while they are in the table
+        self.index = index
+        self.positions = positions
+        self.types = types
+        self.peak_types = peak_types
+
+    def __len__(self):
+        return len(self.index)
+
+    def _add(self, pulses):
+        pulses.insert_rows(self.index, self.positions, self.types, self.peak_types)
+
+    def _remove(self, pulses):
+        pulses.delete_rows(self.index)
+
+    def redo(self, pulses):
+        if self.inserted:
+            self._add(pulses)
+        else:
+            self._remove(pulses)
+
+    def undo(self, pulses):
+        if self.inserted:
+            self._remove(pulses)
+        else:
+            self._add(pulses)
+
+
+def insert_pulses(pulses, positions, pulse_type, peak_type=PEAK_NONE):
+    """Insert pulses like PulseTable.insert and return the edit."""
+    positions = np.sort(np.asarray(positions, dtype=np.int64), kind='stable')
+    # New pulses go after existing pulses at the same position
+    slots = np.searchsorted(pulses.positions, positions, side='right')
+    index = slots + np.arange(len(positions))
+    edit = PulseEdit(True, index, positions,
+                     np.full(len(positions), pulse_type, dtype=np.int8),
+                     np.full(len(positions), peak_type, dtype=np.int8))
+    edit.redo(pulses)
+    return edit
+
+
+def delete_pulses(pulses, start, stop, mask=None):
+    """Delete pulses like PulseTable.delete_range and return the edit."""
+    first, last = pulses.range_indices(start, stop)
+    if mask is None:
+        index = np.arange(first, last)
+    else:
+        index = first + np.flatnonzero(np.asarray(mask, dtype=bool))
+    edit = PulseEdit(False, index, pulses.positions[index], pulses.types[index],
+                     pulses.peak_types[index])
+    edit.redo(pulses)
+    return edit
+
+
+class ThresholdEdit:
+    """Change of the threshold settings, each a tuple (abs, rel, using_absolute)."""
+
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+
+
+class InversionEdit:
+    """
+    Inversion of the waveform (a sign flip).
+
+    Inverting clears the pulses and smoothing, so the edit keeps the
+    pulse table that was cleared and the number of smoothing passes to
+    replay when it is undone.
+    """
+
+    def __init__(self, pulses, smoothing_passes):
+        self.pulses = pulses
+        self.smoothing_passes = smoothing_passes
+
+
+class EditHistory:
+    """Linear undo/redo stack. Recording a new edit drops the edits that were undone."""
+
+    def __init__(self, max_edits=DEFAULT_MAX_EDITS):
+        self.max_edits = max_edits
+        self.edits = []
+        # Number of edits currently applied (edits[:position])
+        self.position = 0
+
+    def clear(self):
+        self.edits = []
+        self.position = 0
+
+    def record(self, edit):
+        """Add an edit that has just been applied."""
+        del self.edits[self.position:]
+        self.edits.append(edit)
+        if len(self.edits) > self.max_edits:
+            del self.edits[0]
+        self.position = len(self.edits)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.edits)
+
+    def undo(self):
+        """Step back; returns the edit to revert (None if there is none)."""
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        return self.edits[self.position]
+
+    def redo(self):
+        """Step forward; returns the edit to apply again (None if there is none)."""
+        if not self.can_redo():
+            return None
+        self.position += 1
+        return self.edits[self.position - 1]
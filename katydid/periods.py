@@ -0,0 +1,66 @@
+"""
+Pulse period analysis.
+
+A period is a group of three consecutive pulses (1-3, 2-4, ...). Its
+duration is the time from pulse 1 to pulse 3, and its ratio is the
+time from pulse 1 to pulse 2 divided by that duration.
+"""
+
+import numpy as np
+
+
+class PeriodAnalysis:
+    """
+    Per-pulse and per-period columns of one analysis.
+
+    Pulse i (0-based) is the first pulse of period i, so row i of the
+    pulse columns and row i of the period columns belong together; the
+    last two pulses start no period.
+    """
+
+    def __init__(self, positions, times, amplitudes, durations, ratios):
+        # One entry per pulse, sorted by position
+        self.positions = positions
+        self.times = times            # ms
+        self.amplitudes = amplitudes
+        # One entry per period
+        self.durations = durations    # ms
+        self.ratios = ratios
+
+    @property
+    def num_pulses(self):
+        return len(self.positions)
+
+    @property
+    def num_periods(self):
+        return len(self.durations)
+
+
+def compute_periods(positions, wav_data, sample_rate):
+    """
+    Compute periods and per-pulse information from pulse sample positions.
+
+    Returns a PeriodAnalysis whose columns are NumPy arrays.
+    """
+    # Sort pulses by position to ensure proper ordering
+    positions = np.sort(np.asarray(positions, dtype=np.int64))
+
+    # Amplitude of each pulse (0 for positions past the end of the data)
+    amplitudes = np.zeros(len(positions), dtype=wav_data.dtype)
+    inside = positions < len(wav_data)
+    amplitudes[inside] = wav_data[positions[inside]]
+
+    # Time in milliseconds of each pulse
+    times = positions / sample_rate * 1000
+
+    # Periods from groups of 3 pulses: pulse i, i+1 and i+2
+    if len(positions) >= 3:
+        period_durations = (positions[2:] - positions[:-2]) / sample_rate * 1000  # ms
+        pulse_intervals = (positions[1:-1] - positions[:-2]) / sample_rate * 1000  # ms
+    else:
+        period_durations = np.empty(0)
+        pulse_intervals = np.empty(0)
+    pulse_ratios = np.zeros(len(period_durations))
+    np.divide(pulse_intervals, period_durations, out=pulse_ratios, where=period_durations > 0)
+
+    return PeriodAnalysis(positions, times, amplitudes, period_durations, pulse_ratios)
@@ -0,0 +1,124 @@
+"""
+Columnar pulse storage.
+
+PulseTable keeps pulses as parallel NumPy columns (sample position,
+pulse type, peak type) sorted by position. Range lookups are
+searchsorted calls, and edits are bulk array inserts and deletes, so
+nothing ever re-sorts or scans a list of dicts.
+"""
+
+import numpy as np
+
+# Pulse type codes
+DETECTED = 0
+MANUAL = 1
+
+# Peak type codes (manual pulses have no peak type)
+PEAK_NONE = 0
+PEAK_POSITIVE = 1
+PEAK_NEGATIVE = 2
+
+
+class PulseTable:
+    """Pulses as sorted, parallel NumPy columns."""
+
+    def __init__(self, positions=None, types=None, peak_types=None):
+        self.positions = np.empty(0, dtype=np.int64)
+        self.types = np.empty(0, dtype=np.int8)
+        self.peak_types = np.empty(0, dtype=np.int8)
+        if positions is not None and len(positions) > 0:
+            positions = np.asarray(positions, dtype=np.int64)
+            order = np.argsort(positions, kind='stable')
+            self.positions = positions[order]
+            self.types = np.asarray(types, dtype=np.int8)[order]
+            self.peak_types = np.asarray(peak_types, dtype=np.int8)[order]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def clear(self):
+        """Remove all pulses."""
+        self.__init__()
+
+    def copy(self):
+        """Return an independent copy of the table."""
+        table = PulseTable()
+        table.positions = self.positions.copy()
+        table.types = self.types.copy()
+        table.peak_types = self.peak_types.copy()
+        return table
+
+    def insert(self, positions, pulse_type, peak_type=PEAK_NONE):
+        """
+        Insert pulses, keeping the table sorted.
+
+        New pulses go after existing pulses at the same position. Returns
+        the number of pulses inserted.
+        """
+        positions = np.sort(np.asarray(positions, dtype=np.int64), kind='stable')
+        if len(positions) == 0:
+            return 0
+        slots = np.searchsorted(self.positions, positions, side='right')
+        self.positions = np.insert(self.positions, slots, positions)
+        self.types = np.insert(self.types, slots, np.int8(pulse_type))
+        self.peak_types = np.insert(self.peak_types, slots, np.int8(peak_type))
+        return len(positions)
+
+    def insert_rows(self, index, positions, types, peak_types):
+        """
+        Insert rows so they end up at the given sorted row indices.
+
+        This is the exact inverse of delete_rows(index), used to replay
+        recorded edits (see katydid.history).
+        """
+        if len(index) == 0:
+            return
+        slots = np.asarray(index) - np.arange(len(index))
+        self.positions = np.insert(self.positions, slots, positions)
+        self.types = np.insert(self.types, slots, types)
+        self.peak_types = np.insert(self.peak_types, slots, peak_types)
+
+    def delete_rows(self, index):
+        """Delete the rows at the given row indices."""
+        if len(index) == 0:
+            return
+        self.positions = np.delete(self.positions, index)
+        self.types = np.delete(self.types, index)
+        self.peak_types = np.delete(self.peak_types, index)
+
+    def range_indices(self, start, stop):
+        """Return (first, last) so that positions[first:last] lie in [start, stop]."""
+        first = int(np.searchsorted(self.positions, start, side='left'))
+        last = int(np.searchsorted(self.positions, stop, side='right'))
+        return first, last
+
+    def delete_range(self, start, stop, mask=None):
+        """
+        Delete pulses with start <= position <= stop.
+
+        mask, if given, is a boolean array over that range selecting which
+        of its pulses to delete. Returns the number of pulses deleted.
+        """
+        first, last = self.range_indices(start, stop)
+        keep = np.ones(len(self), dtype=bool)
+        if mask is None:
+            keep[first:last] = False
+        else:
+            keep[first:last] = ~np.asarray(mask, dtype=bool)
+        removed = len(self) - int(np.count_nonzero(keep))
+        if removed:
+            self.positions = self.positions[keep]
+            self.types = self.types[keep]
+            self.peak_types = self.peak_types[keep]
+        return removed
+
+    def nearest_distance(self, positions):
+        """Distance from each position to the closest pulse (inf when empty)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(positions.shape, np.inf)
+        right = np.searchsorted(self.positions, positions, side='left')
+        left = np.clip(right - 1, 0, len(self) - 1)
+        right = np.clip(right, 0, len(self) - 1)
+        return np.minimum(np.abs(self.positions[left] - positions),
+                          np.abs(self.positions[right] - positions))
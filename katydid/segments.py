@@ -0,0 +1,95 @@
+"""
+Combined WAV export of copied waveform segments.
+
+Every segment gets a slot in the output that is at least one second
+long (longer segments get a slot of their own length), so slot offsets
+and the output length are known before any sample is read. Segments
+are then converted one at a time and streamed into the WAV file; only
+a single segment is ever held in memory.
+"""
+
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.io import wavfile
+
+# Worker threads writing the per-copy WAV files
+DEFAULT_WORKERS = 4
+
+
+class CopySegment:
+    """Samples start..stop-1 of the recording, or stop samples of silence."""
+
+    def __init__(self, copy_num, start, stop, silent=False):
+        self.copy_num = copy_num
+        self.start = start
+        self.stop = max(start, stop)
+        self.silent = silent
+
+    @classmethod
+    def silence(cls, copy_num, length):
+        """Placeholder segment for a copy whose samples couldn't be located."""
+        return cls(copy_num, 0, length, silent=True)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def to_int16(self, wav_data):
+        """Segment samples scaled to the full int16 range."""
+        if self.silent or len(self) == 0:
+            return np.zeros(len(self), dtype=np.int16)
+        segment = np.asarray(wav_data[self.start:self.stop])
+        peak = np.max(np.abs(segment))
+        if peak > 0:
+            segment = segment / peak * 32767
+        return segment.astype(np.int16)
+
+
+def slot_offsets(segments, slot_samples):
+    """
+    Start offset of each segment's slot, and the total output length.
+
+    A slot is slot_samples long, or the segment's length if that is longer.
+    """
+    slots = np.maximum(np.array([len(s) for s in segments], dtype=np.int64), slot_samples)
+    offsets = np.zeros(len(segments), dtype=np.int64)
+    if len(segments) > 0:
+        offsets[1:] = np.cumsum(slots)[:-1]
+    return offsets, int(slots.sum())
+
+
+def write_combined_wav(file_path, sample_rate, wav_data, segments, slot_samples,
+                       copy_paths=None, max_workers=DEFAULT_WORKERS):
+    """
+    Stream segments into one mono 16-bit WAV, one slot per segment.
+
+    If copy_paths is given (one path per segment), each segment is also
+    saved as its own WAV file by a pool of writer threads while the
+    combined file is being written. Returns the number of samples written.
+    """
+    _, total = slot_offsets(segments, slot_samples)
+    executor = ThreadPoolExecutor(max_workers) if copy_paths else None
+    pending = []
+    try:
+        with wave.open(file_path, 'wb') as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(int(sample_rate))
+            out.setnframes(total)
+            for i, segment in enumerate(segments):
+                samples = segment.to_int16(wav_data)
+                if executor is not None:
+                    pending.append(executor.submit(wavfile.write, copy_paths[i], sample_rate, samples))
+                out.writeframesraw(samples.astype('<i2', copy=False).tobytes())
+                # Pad the rest of the slot with silence
+                padding = max(0, slot_samples - len(samples))
+                if padding:
+                    out.writeframesraw(bytes(2 * padding))
+        # Surface errors from the per-copy writers
+        for future in pending:
+            future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return total
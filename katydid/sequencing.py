@@ -0,0 +1,128 @@
+"""
+Pulse classification and sequencing for the Data Analyzer table.
+
+Each row of a results CSV is labelled "ex" (a short pulse, ratio < 0.5,
+whose duration and ratio lie in the selected ranges), "in" (a long
+pulse, ratio >= 0.5, right after a valid "ex") or "z" (anything else).
+Runs of ex/in rows are sequences: the first row is marked "B", the rows
+after it "|", and the last row "Eex" or "Ein" after its own label.
+
+Everything is computed on whole columns at once, so reclassifying after
+a range change costs a few array operations regardless of table size.
+"""
+
+import numpy as np
+
+# Label strings, as shown in the ex & in column
+EX = "ex"
+IN = "in"
+Z = "z"
+
+# Fixed-width string dtype of the label and sequencing columns
+LABEL_DTYPE = '<U3'
+
+
+def classify_pulses(ratios, durations, period_range, ratio_range):
+    """
+    Label every row "ex", "in" or "z".
+
+    ratios and durations are float arrays with 0 for missing values.
+    Returns a LABEL_DTYPE array.
+    """
+    period_min, period_max = period_range
+    ratio_min, ratio_max = ratio_range
+
+    in_ranges = ((durations >= period_min) & (durations <= period_max) &
+                 (ratios >= ratio_min) & (ratios <= ratio_max))
+    is_short = ratios < 0.5
+
+    # Valid short pulses
+    is_ex = is_short & in_ranges
+    # Long pulses following a valid short pulse
+    is_in = np.zeros(len(ratios), dtype=bool)
+    is_in[1:] = ~is_short[1:] & is_ex[:-1]
+
+    labels = np.full(len(ratios), Z, dtype=LABEL_DTYPE)
+    labels[is_ex] = EX
+    labels[is_in] = IN
+    return labels
+
+
+def sequence_markers(labels):
+    """
+    Sequencing column for classified rows: B / | / Eex / Ein, or "".
+
+    A sequence is a run of ex/in rows; a run of one row is only marked
+    with its end marker.
+    """
+    valid = (labels == EX) | (labels == IN)
+    previous_valid = np.zeros(len(labels), dtype=bool)
+    previous_valid[1:] = valid[:-1]
+    next_valid = np.zeros(len(labels), dtype=bool)
+    next_valid[:-1] = valid[1:]
+
+    markers = np.full(len(labels), "", dtype=LABEL_DTYPE)
+    markers[valid] = "|"
+    markers[valid & ~previous_valid] = "B"
+    ends = valid & ~next_valid
+    markers[ends] = np.char.add("E", labels[ends])
+    return markers
+
+
+def copy_windows(times, labels, markers, max_error_ms, backward_ms, forward_ms):
+    """
+    Time windows to copy around the error (z) runs of a classified table.
+
+    A run of z rows is copied when it sits between a sequence end
+    (Eex / Ein) and the next sequence begin (B), from backward_ms before
+    the end marker to forward_ms after the begin marker. If max_error_ms
+    is positive, runs whose end-to-begin gap is longer are skipped.
+    Rows without a time or a label are ignored. Returns (window_starts,
+    window_ends) in ms, one entry per copy in row order.
+    """
+    rows = np.flatnonzero((labels != "") & ~np.isnan(times))
+    row_labels = labels[rows]
+    row_markers = markers[rows]
+    valid = (row_labels == EX) | (row_labels == IN)
+
+    # Runs of z rows, as positions in rows
+    is_z = row_labels == Z
+    previous_z = np.zeros(len(rows), dtype=bool)
+    previous_z[1:] = is_z[:-1]
+    next_z = np.zeros(len(rows), dtype=bool)
+    next_z[:-1] = is_z[1:]
+    run_starts = np.flatnonzero(is_z & ~previous_z)
+    run_ends = np.flatnonzero(is_z & ~next_z)
+
+    # Closest end marker before each run and begin marker after it
+    end_markers = np.flatnonzero(valid & np.char.startswith(row_markers, "E"))
+    begin_markers = np.flatnonzero(valid & (row_markers == "B"))
+    before = np.searchsorted(end_markers, run_starts, side='left') - 1
+    after = np.searchsorted(begin_markers, run_ends, side='right')
+    found = (before >= 0) & (after < len(begin_markers))
+
+    end_times = times[rows[end_markers[before[found]]]]
+    begin_times = times[rows[begin_markers[after[found]]]]
+    if max_error_ms > 0:
+        short_enough = begin_times - end_times <= max_error_ms
+        end_times = end_times[short_enough]
+        begin_times = begin_times[short_enough]
+    return end_times - backward_ms, begin_times + forward_ms
+
+
+def mark_copies(times, window_starts, window_ends):
+    """
+    Copy number (1-based) of every row whose time lies in a window.
+
+    Rows outside all windows get 0; where windows overlap the later copy
+    wins.
+    """
+    copy_numbers = np.zeros(len(times), dtype=np.int64)
+    # NaN times sort last and never fall inside a window
+    order = np.argsort(times, kind='stable')
+    sorted_times = times[order]
+    firsts = np.searchsorted(sorted_times, window_starts, side='left')
+    lasts = np.searchsorted(sorted_times, window_ends, side='right')
+    for number, (first, last) in enumerate(zip(firsts, lasts), start=1):
+        copy_numbers[order[first:last]] = number
+    return copy_numbers
@@ -0,0 +1,167 @@
+"""
+Sidecar session files for Wav Analyzer.
+
+The pulses, thresholds and processing history of a recording are saved
+next to it as <name>.katydid.npz, so reopening the recording restores
+the work in milliseconds instead of re-running detection and repeating
+manual edits. Sample data is never stored; processing steps are kept as
+a history (inversion count, smoothing passes) and replayed on load.
+
+A session is only restored if the recording still has the size and
+modification time it had when the session was saved.
+"""
+
+import os
+
+import numpy as np
+
+from katydid.pulses import PulseTable
+
+# Appended to the recording's name (without its extension)
+SESSION_SUFFIX = '.katydid.npz'
+
+# Bumped when the layout of the file changes; other versions are ignored
+SESSION_VERSION = 1
+
+# Threshold settings of a freshly loaded recording
+DEFAULT_ABS_THRESHOLD = 0.5
+DEFAULT_REL_THRESHOLD = 0.5
+
+
+def session_path(wav_path):
+    """Sidecar session file of a recording."""
+    return os.path.splitext(wav_path)[0] + SESSION_SUFFIX
+
+
+def _source_stamp(wav_path):
+    stat = os.stat(wav_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Session:
+    """Saved analysis state of one recording."""
+
+    def __init__(self, pulses=None, abs_threshold=DEFAULT_ABS_THRESHOLD,
+                 rel_threshold=DEFAULT_REL_THRESHOLD,
+                 using_absolute_threshold=True, inversion_count=0, smoothing_passes=0,
+                 region_active=False, region_mode=None, region_left=None, region_right=None,
+                 view_start=0, view_range=None):
+        self.pulses = PulseTable() if pulses is None else pulses
+        self.abs_threshold = abs_threshold
+        self.rel_threshold = rel_threshold
+        self.using_absolute_threshold = using_absolute_threshold
+        # Processing history, replayed on the original samples when restoring
+        self.inversion_count = inversion_count
+        self.smoothing_passes = smoothing_passes
+        # Region selection (positions in ms)
+        self.region_active = region_active
+        self.region_mode = region_mode
+        self.region_left = region_left
+        self.region_right = region_right
+        # View (samples)
+        self.view_start = view_start
+        self.view_range = view_range
+
+    def has_work(self):
+        """
+        True if the session differs from a freshly loaded recording.
+
+        The view alone isn't worth resuming, and an even number of
+        inversions leaves the waveform as it was loaded.
+        """
+        return (len(self.pulses) > 0
+                or self.inversion_count % 2 == 1
+                or self.smoothing_passes > 0
+                or self.abs_threshold != DEFAULT_ABS_THRESHOLD
+                or self.rel_threshold != DEFAULT_REL_THRESHOLD
+                or not self.using_absolute_threshold
+                or self.region_active)
+
+
+def _optional(value):
+    """Store None as NaN so every field is a plain number."""
+    return np.nan if value is None else value
+
+
+def _restore_optional(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def save_session(wav_path, session):
+    """Write the session next to the recording. Returns the session file path."""
+    path = session_path(wav_path)
+    size, mtime_ns = _source_stamp(wav_path)
+    pulses = session.pulses
+
+    # Write to a temporary file first so an interrupted save never leaves a broken session
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            version=SESSION_VERSION,
+            source_size=size,
+            source_mtime_ns=mtime_ns,
+            positions=pulses.positions,
+            types=pulses.types,
+            peak_types=pulses.peak_types,
+            abs_threshold=session.abs_threshold,
+            rel_threshold=session.rel_threshold,
+            using_absolute_threshold=session.using_absolute_threshold,
+            inversion_count=session.inversion_count,
+            smoothing_passes=session.smoothing_passes,
+            region_active=session.region_active,
+            region_mode=session.region_mode or '',
+            region_left=_optional(session.region_left),
+            region_right=_optional(session.region_right),
+            view_start=session.view_start,
+            view_range=_optional(session.view_range),
+        )
+    os.replace(temp_path, path)
+    return path
+
+
+def remove_session(wav_path):
+    """Delete the recording's session file, if there is one. Returns True if it existed."""
+    path = session_path(wav_path)
+    if not os.path.exists(path):
+        return False
+    os.remove(path)
+    return True
+
+
+def load_session(wav_path):
+    """
+    Read the recording's session, or None.
+
+    None is returned when there is no session file, when it was written
+    by another version, or when the recording changed since it was saved.
+    """
+    path = session_path(wav_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != SESSION_VERSION:
+                return None
+            if (int(data['source_size']), int(data['source_mtime_ns'])) != _source_stamp(wav_path):
+                return None
+            pulses = PulseTable(data['positions'], data['types'], data['peak_types'])
+            view_range = _restore_optional(data['view_range'])
+            return Session(
+                pulses=pulses,
+                abs_threshold=float(data['abs_threshold']),
+                rel_threshold=float(data['rel_threshold']),
+                using_absolute_threshold=bool(data['using_absolute_threshold']),
+                inversion_count=int(data['inversion_count']),
+                smoothing_passes=int(data['smoothing_passes']),
+                region_active=bool(data['region_active']),
+                region_mode=str(data['region_mode']) or None,
+                region_left=_restore_optional(data['region_left']),
+                region_right=_restore_optional(data['region_right']),
+                view_start=int(data['view_start']),
+                view_range=None if view_range is None else int(view_range),
+            )
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Ignoring unreadable session file {path}: {e}")
+        return None
@@ -0,0 +1,44 @@
+"""
+Moving-average smoothing.
+
+The average is a running-sum filter (scipy.ndimage.uniform_filter1d), so
+the cost per sample does not depend on the window size. The signal is
+processed in blocks that overlap by half a window, which gives exactly
+the result of filtering the whole signal at once: no seams at block
+boundaries, and zero padding only at the two ends of the recording.
+"""
+
+import numpy as np
+from scipy.ndimage import uniform_filter1d
+
+# Samples filtered per block
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def moving_average(data, window_size, out=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Centred moving average of data over window_size samples.
+
+    Matches np.convolve(data, np.ones(w) / w, mode='same') for an odd
+    window. Results are written to out (allocated if None), which may be
+    data itself to smooth in place. Returns out.
+    """
+    n = len(data)
+    if out is None:
+        out = np.empty(n, dtype=np.result_type(data.dtype, np.float32))
+    half = window_size // 2
+    block_size = max(block_size, half)
+
+    # Original samples just before the current block (already overwritten in out
+    # when smoothing in place, so they are carried over from the previous block)
+    left = np.empty(0, dtype=out.dtype)
+    for start in range(0, n, block_size):
+        end = min(n, start + block_size)
+        chunk = np.concatenate((left, np.asarray(data[start:min(n, end + half)], dtype=out.dtype)))
+        chunk_start = start - len(left)
+
+        smoothed = uniform_filter1d(chunk, window_size, mode='constant', cval=0.0)
+
+        left = chunk[max(0, end - half) - chunk_start:end - chunk_start].copy()
+        out[start:end] = smoothed[start - chunk_start:end - chunk_start]
+    return out